@@ -9,8 +9,18 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
+from api.utils import startup  # noqa: F401  Starts the startup-phase clock reported by /api/ready/
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BlogGen.settings')
+os.environ.setdefault('API_ASYNC_VIEWS', 'true')  # Coroutine-based views for the hot paths
 
 application = get_asgi_application()
+
+# Optionally load the model now instead of on the first generation request.
+# Lives here, not in AppConfig.ready(), so management commands never load it.
+from django.conf import settings  # noqa: E402
+
+if settings.MODEL_WARMUP_ON_START:
+    from api.utils.inference_queue import get_scheduler
+    get_scheduler().warm_up()
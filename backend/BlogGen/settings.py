@@ -38,7 +38,7 @@ INSTALLED_APPS = [
 # --------------------------
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
@@ -57,11 +57,17 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
+# Authenticated users are cached per user id (api.authentication) for this many seconds;
+# user saves and deletes invalidate it. The default cache is per process, so another
+# worker may serve a changed user until the TTL ends: use a shared cache alias to avoid that.
+AUTH_USER_CACHE = env("AUTH_USER_CACHE", default="default")
+AUTH_USER_CACHE_TTL = env.int("AUTH_USER_CACHE_TTL", default=60)
 
 # --------------------------
 # Middleware
 # --------------------------
 MIDDLEWARE = [
+    "api.middleware.MetricsMiddleware",  # First, so its timings cover the rest
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -72,6 +78,9 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Per-endpoint latency/DB histograms, Server-Timing headers and GET /metrics (Prometheus)
+METRICS_ENABLED = env.bool("METRICS_ENABLED", default=True)
+
 # --------------------------
 # CORS Settings
 # --------------------------
@@ -149,3 +158,133 @@ USE_TZ = True
 # Default primary key field type
 # --------------------------
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# --------------------------
+# Inference Queue
+# --------------------------
+# Each worker owns one model instance; keep workers x model threads <= cores.
+INFERENCE_WORKERS = env.int("INFERENCE_WORKERS", default=1)
+# Requests waiting beyond this are rejected with 503 + Retry-After.
+INFERENCE_QUEUE_SIZE = env.int("INFERENCE_QUEUE_SIZE", default=8)
+# ...and so are one user's requests beyond this (one generate click queues up to n jobs).
+INFERENCE_QUEUE_PER_USER = env.int("INFERENCE_QUEUE_PER_USER", default=6)
+# Fair-share weight of staff users relative to everyone else (1).
+FAIR_SHARE_STAFF_WEIGHT = env.float("FAIR_SHARE_STAFF_WEIGHT", default=4.0)
+
+# --------------------------
+# Generation Quotas
+# --------------------------
+# Generated tokens per user per minute (token bucket, one minute of burst); 0 = unlimited.
+QUOTA_TOKENS_PER_MINUTE = env.int("QUOTA_TOKENS_PER_MINUTE", default=4000)
+QUOTA_STAFF_TOKENS_PER_MINUTE = env.int("QUOTA_STAFF_TOKENS_PER_MINUTE", default=0)
+# In-process buckets; use "api.utils.quotas.DatabaseQuotaStore" when running several workers.
+QUOTA_STORE = env("QUOTA_STORE", default="api.utils.quotas.MemoryQuotaStore")
+
+# --------------------------
+# Generation Cache
+# --------------------------
+GENERATION_CACHE_MAX_ENTRIES = env.int("GENERATION_CACHE_MAX_ENTRIES", default=256)
+GENERATION_CACHE_MAX_BYTES = env.int("GENERATION_CACHE_MAX_BYTES", default=16 * 1024 * 1024)
+GENERATION_CACHE_TTL = env.int("GENERATION_CACHE_TTL", default=60 * 60)  # seconds
+# Optional SQLite file for a tier that survives restarts, e.g. BASE_DIR / "generation_cache.sqlite3"
+GENERATION_CACHE_DB = env("GENERATION_CACHE_DB", default="")
+# Upper bound for `n` (candidates per generate request)
+GENERATION_MAX_CANDIDATES = env.int("GENERATION_MAX_CANDIDATES", default=5)
+GENERATION_MAX_WORDS = env.int("GENERATION_MAX_WORDS", default=3000)
+# Per-request deadline in seconds; clients may ask for less (or more, up to the max)
+# with the X-Generation-Timeout header. Generation stops once it passes.
+GENERATION_TIMEOUT = env.float("GENERATION_TIMEOUT", default=300.0)
+GENERATION_TIMEOUT_MAX = env.float("GENERATION_TIMEOUT_MAX", default=900.0)
+
+# --------------------------
+# Long-form Generation
+# --------------------------
+# Blogs needing more tokens than this are written as outline + sections, each
+# call staying inside the model's context window (context_length 1024).
+LONGFORM_SINGLE_SHOT_TOKENS = env.int("LONGFORM_SINGLE_SHOT_TOKENS", default=640)
+LONGFORM_SECTION_TOKENS = env.int("LONGFORM_SECTION_TOKENS", default=384)  # target output per section call
+
+# --------------------------
+# Background Generation Jobs
+# --------------------------
+JOB_POLL_INTERVAL = env.float("JOB_POLL_INTERVAL", default=2.0)  # seconds between queue checks
+JOB_FLUSH_INTERVAL = env.float("JOB_FLUSH_INTERVAL", default=1.0)  # seconds between partial-text writes
+JOB_STALE_AFTER = env.int("JOB_STALE_AFTER", default=600)  # heartbeat age before a running job is requeued
+
+# --------------------------
+# Model Replicas (multi-process)
+# --------------------------
+# >1 runs the model in that many processes; each handles one generation at a time.
+MODEL_REPLICAS = env.int("MODEL_REPLICAS", default=1)
+# 0 = what calibrate_threads measured for this many replicas, else the cores split evenly
+MODEL_THREADS_PER_REPLICA = env.int("MODEL_THREADS_PER_REPLICA", default=0)
+
+# --------------------------
+# ASGI
+# --------------------------
+# Serve generation and history from async views (api/async_views.py). BlogGen/asgi.py
+# turns this on, e.g. `uvicorn BlogGen.asgi:application`; WSGI keeps the DRF views.
+API_ASYNC_VIEWS = env.bool("API_ASYNC_VIEWS", default=False)
+
+# --------------------------
+# Model Loading
+# --------------------------
+# Start loading the model as soon as the WSGI/ASGI app is up instead of on the
+# first generation request. Management commands never load it.
+MODEL_WARMUP_ON_START = env.bool("MODEL_WARMUP_ON_START", default=False)
+# Runtime from api.utils.backends: "ctransformers", "llama_cpp", "fake" (no model file;
+# for load tests) or a dotted path to an InferenceBackend subclass.
+MODEL_BACKEND = env("MODEL_BACKEND", default="ctransformers")
+MODEL_FILE = env("MODEL_FILE", default="llama-2-7b-chat.Q4_K_M.gguf")  # under models/
+# Extra constructor kwargs, e.g. MODEL_BACKEND_OPTIONS='{"tokens_per_second": 50}' for "fake"
+MODEL_BACKEND_OPTIONS = env.json("MODEL_BACKEND_OPTIONS", default={})
+
+# --------------------------
+# Blog Content Storage
+# --------------------------
+# "compressed": new bodies go to BlogContent, one compressed row per distinct text
+# (identical candidates saved twice share it); "text": the plain Blog.content column.
+# Reads handle both, so switching only affects blogs saved afterwards (and whether
+# migration 0008 compresses existing rows). A body goes with the last blog using it.
+BLOG_CONTENT_STORAGE = env("BLOG_CONTENT_STORAGE", default="compressed")
+BLOG_CONTENT_CODEC = env("BLOG_CONTENT_CODEC", default="zlib")  # or "zstd" (needs the zstandard package)
+
+# --------------------------
+# Bulk Import / Export (/api/blogs/bulk/)
+# --------------------------
+BLOG_BULK_BATCH_SIZE = env.int("BLOG_BULK_BATCH_SIZE", default=500)  # rows per INSERT (and per search-index pass)
+BLOG_BULK_MAX_ROWS = env.int("BLOG_BULK_MAX_ROWS", default=100_000)  # per import request
+BLOG_EXPORT_CHUNK_SIZE = env.int("BLOG_EXPORT_CHUNK_SIZE", default=1000)  # rows per export query
+
+# --------------------------
+# Thread Tuning
+# --------------------------
+# `manage.py calibrate_threads` measures threads x prompt batch size on this host and saves
+# the best profile here (one file can hold every host's); the loader picks it up for the
+# configured model instead of MODEL_CONFIG's threads.
+MODEL_PROFILE_PATH = env("MODEL_PROFILE_PATH", default=str(BASE_DIR / "model_profile.json"))
+# Give each model call fewer threads while several run at once (INFERENCE_WORKERS > 1), per the
+# profile's threads-by-concurrency measurements, or an even split of the cores without one.
+MODEL_ADAPTIVE_THREADS = env.bool("MODEL_ADAPTIVE_THREADS", default=False)
+
+# --------------------------
+# Prompt Template
+# --------------------------
+# "plain" sends the bare instruction; "llama2_chat" frames it as a LLaMA-2 chat turn
+# under a fixed system prompt (api/utils/prompts.py).
+PROMPT_TEMPLATE = env("PROMPT_TEMPLATE", default="plain")
+# Snapshot the model state after the template's constant prefix and resume each call
+# from it (llama_cpp and fake backends), so only the instruction is evaluated. Needs a
+# template with a prefix: with the defaults (ctransformers, "plain") it does nothing.
+# llama_cpp reuses the previous call's prefix by itself; the snapshot serves the first
+# call after a restart (with PREFIX_STATE_DIR) or after a different prompt.
+PREFIX_STATE_CACHE = env.bool("PREFIX_STATE_CACHE", default=True)
+# Directory for an on-disk copy of the snapshots, reused after restarts; "" = memory only
+PREFIX_STATE_DIR = env("PREFIX_STATE_DIR", default="")
+
+# --------------------------
+# Similar Blogs
+# --------------------------
+SIMILARITY_DIMENSIONS = env.int("SIMILARITY_DIMENSIONS", default=256)  # 1 KB per blog at float32
+SIMILARITY_MAX_USERS = env.int("SIMILARITY_MAX_USERS", default=64)  # per-user matrices kept in memory
+SIMILARITY_MIN_SCORE = env.float("SIMILARITY_MIN_SCORE", default=0.2)  # cosine cut-off for /blogs/similar/
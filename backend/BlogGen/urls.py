@@ -1,9 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include
-from api.views import home
+from api.views import home, metrics
 
 urlpatterns = [
     path("", home, name="home"),
     path("admin/", admin.site.urls),
+    path("metrics", metrics, name="metrics"),  # Prometheus scrape target
     path("api/", include("api.urls")),  # ✅ Ensure this line is present
 ]
\ No newline at end of file
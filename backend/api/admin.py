@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import User, Blog
+from .models import User, Blog, GenerationJob
 
 admin.site.register(User)
 admin.site.register(Blog)
+admin.site.register(GenerationJob)
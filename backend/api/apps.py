@@ -4,3 +4,24 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+
+    def ready(self):
+        from django.apps import apps
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save
+
+        from .authentication import token_blacklisted, user_deleted, user_saved
+        from .middleware import install_query_timer
+        from .models import Blog, blog_deleted
+        from .utils import startup
+
+        if settings.METRICS_ENABLED:
+            connection_created.connect(install_query_timer)
+        post_save.connect(user_saved, sender=settings.AUTH_USER_MODEL)
+        post_delete.connect(user_deleted, sender=settings.AUTH_USER_MODEL)
+        post_delete.connect(blog_deleted, sender=Blog)
+        if apps.is_installed("rest_framework_simplejwt.token_blacklist"):
+            post_save.connect(token_blacklisted, sender="token_blacklist.BlacklistedToken")
+        startup.mark("apps_ready")
@@ -0,0 +1,174 @@
+# api/async_views.py
+#
+# Async variants of the generation and history endpoints, served under ASGI:
+# BlogGen/asgi.py turns on API_ASYNC_VIEWS and api/urls.py routes these paths
+# here instead of to the DRF views. Waiting for the model or for a slow client
+# costs a coroutine, not a thread; model calls still run on the inference
+# workers, and the ORM is reached through Django's async query API or
+# sync_to_async. Request and response shapes match the DRF views.
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated
+from rest_framework.request import Request
+
+from .authentication import CachedJWTAuthentication, TokenUserAuthentication
+from .exceptions import QuotaExceeded
+from .models import Blog
+from .serializers import BlogSerializer
+from .utils.conditional import make_etag, not_modified, set_validators
+from .utils.generation import acollect, astream_blog_events, finish_info
+from .utils.inference_queue import get_scheduler
+from .utils.metrics import add_model_stages
+from .utils.streaming import StreamStats
+from .views import (
+    HISTORY_VERSION, blog_history_page, history_etag, open_cancel_scope, parse_generation_data, submit_for_user,
+    with_queue_headers,
+)
+
+_jwt = CachedJWTAuthentication()
+_token_user = TokenUserAuthentication()
+
+
+def api_exception_response(exc):
+    """What DRF's exception handler would send for ``exc``, as a plain JsonResponse."""
+    response = JsonResponse({"detail": exc.detail}, status=exc.status_code)
+    if getattr(exc, "wait", None):
+        response["Retry-After"] = str(exc.wait)
+    if isinstance(exc, QuotaExceeded):
+        response["X-RateLimit-Limit"] = str(exc.limit)
+        response["X-RateLimit-Remaining"] = str(exc.remaining)
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        response["WWW-Authenticate"] = _jwt.authenticate_header(None)
+    return response
+
+
+class AsyncAPIView(View):
+    """JWT-authenticated async view; APIExceptions become JSON error responses."""
+
+    authentication = _jwt
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))  # Token auth, like DRF's APIView
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            authenticated = await sync_to_async(self.authentication.authenticate)(request)
+            if authenticated is None:
+                raise NotAuthenticated()
+            request.user = authenticated[0]
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return api_exception_response(exc)
+
+
+# ----------------- Blog Generation (Local Model) -----------------
+class AsyncBlogGenerateView(AsyncAPIView):
+    async def post(self, request):
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"error": "Request body must be JSON"}, status=400)
+        generation, error = parse_generation_data(data)
+        if error:
+            return JsonResponse({"error": error}, status=400)
+        scope, error = open_cancel_scope(request)
+        if error:
+            return JsonResponse({"error": error}, status=400)
+
+        queue_info = get_scheduler().load()
+        try:
+            candidates, reservation = await sync_to_async(submit_for_user)(request, generation, scope)
+            blog_contents = [await acollect(tokens) for tokens, _ in candidates]
+        except APIException:
+            raise
+        except Exception as e:
+            return JsonResponse({"error": f"Model error: {str(e)}"}, status=500)
+        finally:
+            scope.release()  # Also runs when a disconnect cancels this task
+        add_model_stages(tokens for tokens, _ in candidates)
+
+        reasons = [finish_info(tokens).get("cancel_reason") for tokens, _ in candidates]
+        if any(reasons):
+            reason = next(r for r in reasons if r)
+            return JsonResponse(
+                {"error": f"Generation cancelled ({reason})", "request_id": str(scope.id)},
+                status=504 if reason == "deadline" else 409,
+            )
+
+        return with_queue_headers(JsonResponse({
+            "request_id": str(scope.id),
+            "blog_content": blog_contents[0],
+            "blog_contents": blog_contents,
+            "candidates": [{**info, **finish_info(tokens)} for tokens, info in candidates],
+        }, status=200), queue_info, reservation)
+
+
+# ----------------- Blog Generation (Streaming, SSE) -----------------
+class AsyncBlogGenerateStreamView(AsyncAPIView):
+    async def post(self, request):
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"error": "Request body must be JSON"}, status=400)
+        generation, error = parse_generation_data(data)
+        if error:
+            return JsonResponse({"error": error}, status=400)
+        scope, error = open_cancel_scope(request)
+        if error:
+            return JsonResponse({"error": error}, status=400)
+
+        stats = StreamStats()
+        queue_info = get_scheduler().load()
+        # Raises QuotaExceeded (429) or InferenceQueueFull (503), with Retry-After, before the stream starts
+        candidates, reservation = await sync_to_async(submit_for_user)(request, generation, scope)
+        meta = {
+            **queue_info, "request_id": str(scope.id),
+            "n": len(candidates), "candidates": [info for _, info in candidates],
+        }
+        response = StreamingHttpResponse(
+            astream_blog_events([tokens for tokens, _ in candidates], stats, meta, scope),
+            content_type="text/event-stream",
+        )
+        response["X-Request-ID"] = str(scope.id)
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # Stop nginx from buffering the stream
+        return with_queue_headers(response, queue_info, reservation)
+
+
+# ----------------- Blog History (Paginated, Conditional) -----------------
+class AsyncBlogHistoryView(AsyncAPIView):
+    authentication = _token_user
+
+    async def get(self, request):
+        blogs = Blog.objects.filter(author_id=request.user.id)
+        version = await blogs.aaggregate(**HISTORY_VERSION)
+        etag = history_etag(request, version)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        data = await sync_to_async(blog_history_page)(Request(request), blogs)
+        return set_validators(JsonResponse(data, status=200), etag)
+
+
+# ----------------- Blog Detail -----------------
+class AsyncBlogDetailView(AsyncAPIView):
+    authentication = _token_user
+
+    async def get(self, request, pk):
+        created_at = await Blog.objects.filter(pk=pk, author_id=request.user.id).values_list("created_at", flat=True).afirst()
+        if created_at is None:
+            return JsonResponse({"error": "Blog not found"}, status=404)
+
+        etag = make_etag("blog", pk, created_at)
+        response = not_modified(request, etag, created_at)
+        if response is not None:
+            return response
+
+        blog = await Blog.objects.select_related("body").aget(pk=pk)
+        return set_validators(JsonResponse(BlogSerializer(blog).data, status=200), etag, created_at)
@@ -0,0 +1,119 @@
+# api/authentication.py
+#
+# JWT authentication classes. The default (CachedJWTAuthentication) resolves
+# the token's user through a short-TTL cache rather than a query per request;
+# TokenUserAuthentication checks the user the same way but hands read-only
+# views a TokenUser (just request.user.id). The signal receivers at the bottom
+# (connected in apps.ready) keep both honest when users change.
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .utils.metrics import stage
+
+
+class TimedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that reports token validation and the user lookup as request stages."""
+
+    def get_validated_token(self, raw_token):
+        with stage("jwt"):
+            return super().get_validated_token(raw_token)
+
+    def get_user(self, validated_token):
+        with stage("user"):
+            return super().get_user(validated_token)
+
+
+# ----------------- User cache -----------------
+def auth_cache():
+    return caches[settings.AUTH_USER_CACHE]
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def revoked_cache_key(user_id):
+    return f"auth:revoked:{user_id}"
+
+
+def _token_user_id(validated_token):
+    try:
+        return validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(_("Token contained no recognizable user identification"))
+
+
+class CachedJWTAuthentication(TimedJWTAuthentication):
+    """Resolves the token's user from the AUTH_USER_CACHE for AUTH_USER_CACHE_TTL seconds.
+
+    A miss loads the user as simplejwt does (the ``user`` stage, one query)
+    and caches it; only active users are cached, and saving or deleting a
+    user drops its entry. The per-process default cache only sees saves made
+    in the same process, so other workers can serve a changed user until the
+    TTL runs out; point AUTH_USER_CACHE at a shared cache to close that gap.
+    """
+
+    def get_user(self, validated_token):
+        user_id = _token_user_id(validated_token)
+        cache = auth_cache()
+        user = cache.get(user_cache_key(user_id))
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(user_cache_key(user_id), user, settings.AUTH_USER_CACHE_TTL)
+        elif api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+class TokenUserAuthentication(CachedJWTAuthentication):
+    """Authenticates as simplejwt's TokenUser, built from the token's claims.
+
+    ``request.user`` then has ``id``/``pk`` and ``is_authenticated`` but no
+    model fields, so use it only in read-only views that filter by
+    ``author_id``. The user is still checked the way CachedJWTAuthentication
+    does it (a query at most once per AUTH_USER_CACHE_TTL), so a user
+    deactivated or deleted anywhere, even by a ``QuerySet.update`` that fires
+    no signals, loses access within the TTL; the revocation marker set by the
+    signal receivers refuses them at once wherever the cache is shared.
+    """
+
+    def get_user(self, validated_token):
+        user_id = _token_user_id(validated_token)
+        if auth_cache().get(revoked_cache_key(user_id)):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        super().get_user(validated_token)
+        return api_settings.TOKEN_USER_CLASS(validated_token)
+
+
+# ----------------- Invalidation (connected in ApiConfig.ready) -----------------
+def _revoke_for_token_lifetime(user_id):
+    auth_cache().set(revoked_cache_key(user_id), True, api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+
+
+def user_saved(sender, instance, **kwargs):
+    cache = auth_cache()
+    cache.delete(user_cache_key(instance.pk))
+    if instance.is_active:
+        cache.delete(revoked_cache_key(instance.pk))
+    else:
+        _revoke_for_token_lifetime(instance.pk)
+
+
+def user_deleted(sender, instance, **kwargs):
+    auth_cache().delete(user_cache_key(instance.pk))
+    _revoke_for_token_lifetime(instance.pk)
+
+
+def token_blacklisted(sender, instance, **kwargs):
+    """A blacklisted refresh token (rotation, logout) reloads its user on the next request."""
+    user_id = instance.token.user_id
+    if user_id is not None:
+        auth_cache().delete(user_cache_key(user_id))
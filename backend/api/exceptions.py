@@ -1,12 +1,46 @@
 from rest_framework.views import exception_handler
 from rest_framework.response import Response
+from rest_framework.exceptions import APIException
+import math
 import sys
 import traceback
 
+class InferenceQueueFull(APIException):
+    # DRF's default handler turns `wait` into a Retry-After header.
+    status_code = 503
+    default_detail = "The generation queue is full. Please retry shortly."
+    default_code = "queue_full"
+
+    def __init__(self, wait, detail=None):
+        super().__init__(detail)
+        self.wait = max(1, math.ceil(wait))
+
+class ModelUnavailable(APIException):
+    # The inference worker could not load the model; the detail says why.
+    status_code = 503
+    default_detail = "The model could not be loaded."
+    default_code = "model_unavailable"
+
+class QuotaExceeded(APIException):
+    # Over the per-minute generated-token budget; Retry-After says when it covers the request.
+    status_code = 429
+    default_detail = "Generation quota exceeded. Please retry later."
+    default_code = "quota_exceeded"
+
+    def __init__(self, wait, limit, remaining, detail=None):
+        super().__init__(detail)
+        self.wait = max(1, math.ceil(wait))
+        self.limit = limit
+        self.remaining = max(0, int(remaining))
+
 def custom_exception_handler(exc, context):
     # Call default handler
     response = exception_handler(exc, context)
 
+    if isinstance(exc, QuotaExceeded):
+        response["X-RateLimit-Limit"] = str(exc.limit)
+        response["X-RateLimit-Remaining"] = str(exc.remaining)
+
     if response is None:
         # This is an unhandled error → return JSON instead of HTML
         return Response({
@@ -0,0 +1,409 @@
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings, setup_databases, setup_test_environment, teardown_databases
+
+SCENARIOS = ("auth", "generate", "stream", "save", "history", "rerun_storm")
+HISTORY_SCENARIOS = ("history", "rerun_storm")  # The only ones whose cost depends on history size
+AUDIENCES = ("General", "Researchers", "Students", "Professionals")
+SEED_CONTENT = " ".join(["Plan the week, review the goals and protect time for focused work."] * 20)
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(len(values) * q))]
+    return {"p50": round(statistics.median(values), 2), "p95": round(pick(0.95), 2),
+            "p99": round(pick(0.99), 2), "max": round(values[-1], 2)}
+
+
+class _Reply:
+    def __init__(self, status, headers, chunks, close=None):
+        self.status = status
+        self.headers = headers
+        self.chunks = chunks
+        self.close = close or (lambda: None)
+
+
+class HttpTransport:
+    """Talks to a running server over HTTP, one keep-alive session per thread."""
+
+    def __init__(self, base_url):
+        self.api = base_url.rstrip("/") + "/api"
+        self._local = threading.local()
+
+    def send(self, method, path, body=None, headers=None):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            import requests  # Only this transport needs it
+
+            session = self._local.session = requests.Session()
+        response = session.request(method, self.api + path, json=body, headers=headers, stream=True, timeout=600)
+        return _Reply(response.status_code, response.headers, response.iter_content(chunk_size=None), response.close)
+
+    def seed(self, token, count):
+        for i in range(count):
+            self.send("POST", "/save-blog/", {"title": f"Seed blog {i}", "content": SEED_CONTENT},
+                      {"Authorization": f"Bearer {token}"}).close()
+
+
+class ClientTransport:
+    """Django's test client in this process, against the test database."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def send(self, method, path, body=None, headers=None):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = Client(raise_request_exception=False)
+        response = client.generic(
+            method, "/api" + path, json.dumps(body) if body is not None else "",
+            content_type="application/json", headers=headers,
+        )
+        chunks = response.streaming_content if response.streaming else [response.content]
+        return _Reply(response.status_code, response.headers, chunks, response.close)
+
+    def seed(self, token, count):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from api.models import Blog
+        from api.utils.search_index import index_blogs
+
+        author_id = AccessToken(token)["user_id"]
+        blogs = [Blog(author_id=author_id, title=f"Seed blog {i}") for i in range(count)]
+        Blog.set_texts(blogs, [SEED_CONTENT] * count)
+        index_blogs(Blog.objects.bulk_create(blogs))
+
+
+class Recorder:
+    """Latency, status and streaming samples for one benchmark cell."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)  # endpoint -> ms
+        self.statuses = Counter()
+        self.failures = 0  # No HTTP response at all
+        self.ttft = []
+        self.token_rates = []
+
+
+class Bench:
+    def __init__(self, transport, word_count):
+        self.transport = transport
+        self.word_count = word_count
+
+    def call(self, recorder, endpoint, method, path, body=None, token=None, headers=None):
+        """Send one request, read the whole body and record it; returns ``(status, headers, body_bytes)``."""
+        headers = dict(headers or {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        started = time.perf_counter()
+        first_token = None
+        try:
+            reply = self.transport.send(method, path, body, headers)
+            try:
+                data = b""
+                for chunk in reply.chunks:
+                    data += chunk
+                    if first_token is None and b"event: token" in data:
+                        first_token = time.perf_counter() - started
+            finally:
+                reply.close()
+        except Exception:
+            with recorder.lock:
+                recorder.failures += 1
+            return None, {}, b""
+        elapsed = time.perf_counter() - started
+        with recorder.lock:
+            recorder.latencies[endpoint].append(elapsed * 1000)
+            recorder.statuses[reply.status] += 1
+            if first_token is not None:
+                recorder.ttft.append(first_token * 1000)
+                recorder.token_rates.append(data.count(b"event: token") / elapsed)
+        return reply.status, reply.headers, data
+
+    def register(self, recorder):
+        username = f"bench-{uuid.uuid4().hex[:12]}"
+        password = uuid.uuid4().hex
+        status, _, data = self.call(recorder, "register", "POST", "/register/", {
+            "username": username, "email": f"{username}@bench.invalid",
+            "password": password, "confirm_password": password,
+        })
+        if status != 201:
+            raise CommandError(f"Registering a benchmark user failed: {status} {data[:200]!r}")
+        return username, password, json.loads(data)["token"]
+
+    # ----------------- Scenarios (one iteration each) -----------------
+    def auth(self, recorder, state):
+        username, password, _ = self.register(recorder)
+        self.call(recorder, "login", "POST", "/login/", {"username": username, "password": password})
+
+    def generate(self, recorder, state):
+        self.call(recorder, "generate-blog", "POST", "/generate-blog/", self._generation(fresh=True), state["token"])
+
+    def stream(self, recorder, state):
+        self.call(recorder, "generate-blog-stream", "POST", "/generate-blog/stream/",
+                  self._generation(fresh=True), state["token"])
+
+    def save(self, recorder, state):
+        self.call(recorder, "save-blog", "POST", "/save-blog/",
+                  {"title": f"Saved {uuid.uuid4().hex[:8]}", "content": SEED_CONTENT}, state["token"])
+
+    def history(self, recorder, state):
+        status, data = self.cached_get(recorder, state, "blogs", "/blogs/")
+        if status == 200 and data["results"]:
+            self.cached_get(recorder, state, "blog-detail", f"/blogs/{data['results'][0]['id']}/")
+
+    def rerun_storm(self, recorder, state):
+        """One visit to the generator page as ``frontend/app.py`` issues it.
+
+        Every Streamlit rerun re-fetches the history (If-None-Match) and,
+        once a title is typed, the similar-blogs panel. Typing the title,
+        moving the slider and picking an audience are a rerun each; then
+        Generate (three streamed candidates), Save and opening a saved blog,
+        each followed by ``st.rerun()``.
+        """
+        title = f"Storm {uuid.uuid4().hex[:8]}"
+        blog = {**self._generation(fresh=False), "title": title, "n": 3}
+        for _ in range(3):
+            self._rerun(recorder, state, title)
+        self._rerun(recorder, state, title)  # The Generate click
+        self.call(recorder, "generate-blog-stream", "POST", "/generate-blog/stream/", blog, state["token"])
+        self._rerun(recorder, state, title)
+        self._rerun(recorder, state, title)  # The Save click
+        self.call(recorder, "save-blog", "POST", "/save-blog/", {"title": title, "content": SEED_CONTENT},
+                  state["token"])
+        history = self._rerun(recorder, state, title)
+        if history and history["results"]:
+            self._rerun(recorder, state, title)  # The sidebar click
+            self.cached_get(recorder, state, "blog-detail", f"/blogs/{history['results'][0]['id']}/")
+            self._rerun(recorder, state, title)
+
+    def _rerun(self, recorder, state, title):
+        _, history = self.cached_get(recorder, state, "blogs", "/blogs/")
+        self.cached_get(recorder, state, "blog-similar", f"/blogs/similar/?{urlencode({'title': title})}")
+        return history
+
+    def cached_get(self, recorder, state, endpoint, path):
+        """The frontend's ``cached_get``: revalidate with the ETag of the last 200."""
+        cached = state["http_cache"].get(path)
+        headers = {"If-None-Match": cached["etag"]} if cached else None
+        status, reply_headers, data = self.call(recorder, endpoint, "GET", path, token=state["token"], headers=headers)
+        if status == 304 and cached:
+            return 200, cached["data"]
+        if status != 200:
+            return status, None
+        data = json.loads(data)
+        if reply_headers.get("ETag"):
+            state["http_cache"][path] = {"etag": reply_headers["ETag"], "data": data}
+        return 200, data
+
+    def _generation(self, fresh):
+        return {
+            "title": f"Benchmark {uuid.uuid4().hex[:8]}", "audience": AUDIENCES[0],
+            "word_count": self.word_count, "fresh": fresh,
+        }
+
+    # ----------------- Running a cell -----------------
+    def run(self, scenario, concurrency, history_size, iterations):
+        setup = Recorder()
+        states = []
+        for _ in range(concurrency):
+            _, _, token = self.register(setup)
+            if history_size:
+                self.transport.seed(token, history_size)
+            states.append({"token": token, "http_cache": {}})
+
+        recorder = Recorder()
+        step = getattr(self, scenario)
+
+        def worker(state):
+            try:
+                for _ in range(iterations):
+                    step(recorder, state)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(state,), daemon=True) for state in states]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+
+        everything = [ms for samples in recorder.latencies.values() for ms in samples]
+        return {
+            "scenario": scenario,
+            "concurrency": concurrency,
+            "history_size": history_size,
+            "iterations": iterations,
+            "requests": len(everything) + recorder.failures,
+            "errors": recorder.failures + sum(n for status, n in recorder.statuses.items() if status >= 400),
+            "status": {str(status): n for status, n in sorted(recorder.statuses.items())},
+            "duration_s": round(duration, 3),
+            "requests_per_sec": round(len(everything) / duration, 2) if duration else None,
+            "latency_ms": percentiles(everything),
+            "ttft_ms": percentiles(recorder.ttft),
+            "tokens_per_sec": percentiles(recorder.token_rates),
+            "endpoints": {
+                endpoint: {"count": len(samples), **percentiles(samples)}
+                for endpoint, samples in sorted(recorder.latencies.items())
+            },
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "End-to-end API benchmark: register/login, generate (JSON and SSE), save, history and a "
+        "Streamlit rerun storm, at each concurrency level and history size. Runs in-process with "
+        "Django's test client on a throwaway test database and the fake model backend, or against "
+        "a running server with --url (start it with MODEL_BACKEND=fake for model-free numbers). "
+        "--output writes JSON; --compare checks it against an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Base URL of a running server; default is in-process")
+        parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated from {SCENARIOS}")
+        parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated client counts")
+        parser.add_argument("--history-sizes", default="10,500", help="Saved blogs per user for history scenarios")
+        parser.add_argument("--iterations", type=int, default=5, help="Scenario iterations per client")
+        parser.add_argument("--word-count", type=int, default=150)
+        parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Fake backend rate (in-process)")
+        parser.add_argument("--quotas", action="store_true", help="Keep per-user token quotas (in-process)")
+        parser.add_argument("--output", help="Write results as JSON to this file")
+        parser.add_argument("--compare", help="Earlier --output file to compare against")
+        parser.add_argument("--threshold", type=float, default=10.0, help="Percent change flagged as a regression")
+
+    def handle(self, *args, **options):
+        scenarios = [s for s in options["scenarios"].split(",") if s]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        cells = [
+            (scenario, int(concurrency), int(history_size))
+            for scenario in scenarios
+            for concurrency in options["concurrency"].split(",")
+            for history_size in (options["history_sizes"].split(",") if scenario in HISTORY_SCENARIOS else ["0"])
+        ]
+
+        if options["url"]:
+            results = self._run_cells(Bench(HttpTransport(options["url"]), options["word_count"]), cells, options)
+        else:
+            results = self._run_in_process(cells, options)
+
+        report = {"meta": self._meta(options), "results": results}
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                self._compare(json.load(f), report, options["threshold"])
+
+    def _run_in_process(self, cells, options):
+        setup_test_environment()
+        scratch = tempfile.mkdtemp()
+        for connection in connections.all():
+            if connection.vendor == "sqlite" and not connection.settings_dict["TEST"]["NAME"]:
+                # In-memory SQLite shares one cache across threads and fails concurrent
+                # writes outright; a file waits on the busy timeout like a real server would.
+                connection.settings_dict["TEST"]["NAME"] = os.path.join(scratch, f"{connection.alias}.sqlite3")
+        old_config = setup_databases(verbosity=0, interactive=False)
+        overrides = {
+            "MODEL_BACKEND": "fake",
+            "MODEL_BACKEND_OPTIONS": {"tokens_per_second": options["tokens_per_second"]},
+        }
+        if not options["quotas"]:
+            overrides.update(QUOTA_TOKENS_PER_MINUTE=0, QUOTA_STAFF_TOKENS_PER_MINUTE=0)
+        try:
+            with override_settings(**overrides):
+                return self._run_cells(Bench(ClientTransport(), options["word_count"]), cells, options)
+        finally:
+            connections.close_all()
+            teardown_databases(old_config, verbosity=0)
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    def _run_cells(self, bench, cells, options):
+        self.stdout.write(
+            f"{'scenario':>12} {'conc':>4} {'hist':>5} {'reqs':>6} {'err':>4} {'req/s':>8} "
+            f"{'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'ttft_ms':>8} {'tok/s':>7}"
+        )
+        results = []
+        for scenario, concurrency, history_size in cells:
+            result = bench.run(scenario, concurrency, history_size, options["iterations"])
+            results.append(result)
+            latency = result["latency_ms"] or {}
+            ttft = (result["ttft_ms"] or {}).get("p50")
+            rate = (result["tokens_per_sec"] or {}).get("p50")
+            self.stdout.write(
+                f"{scenario:>12} {concurrency:>4} {history_size:>5} {result['requests']:>6} {result['errors']:>4} "
+                f"{result['requests_per_sec'] or 0:>8.1f} {latency.get('p50', 0):>8.1f} {latency.get('p95', 0):>8.1f} "
+                f"{latency.get('p99', 0):>8.1f} {ttft if ttft is not None else '-':>8} "
+                f"{rate if rate is not None else '-':>7}"
+            )
+        return results
+
+    def _meta(self, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, timeout=10,
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+        return {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "target": options["url"] or "in-process",
+            "backend": "fake" if not options["url"] else None,
+            "tokens_per_second": options["tokens_per_second"] if not options["url"] else None,
+            "word_count": options["word_count"],
+            "iterations": options["iterations"],
+            "python": platform.python_version(),
+        }
+
+    def _compare(self, baseline, current, threshold):
+        """Print req/s, p95 and TTFT changes per cell; worse by more than ``threshold`` % is flagged."""
+        key = lambda r: (r["scenario"], r["concurrency"], r["history_size"])
+        before = {key(r): r for r in baseline["results"]}
+        self.stdout.write(
+            f"\nAgainst {baseline['meta'].get('commit') or 'baseline'} ({baseline['meta'].get('timestamp')}):"
+        )
+        regressions = 0
+        for result in current["results"]:
+            old = before.get(key(result))
+            if old is None:
+                continue
+            changes = []
+            for label, new_value, old_value, higher_is_better in (
+                ("req/s", result["requests_per_sec"], old["requests_per_sec"], True),
+                ("p95", (result["latency_ms"] or {}).get("p95"), (old["latency_ms"] or {}).get("p95"), False),
+                ("ttft", (result["ttft_ms"] or {}).get("p50"), (old["ttft_ms"] or {}).get("p50"), False),
+            ):
+                if not new_value or not old_value:
+                    continue
+                change = (new_value - old_value) / old_value * 100
+                worse = -change if higher_is_better else change
+                flag = " REGRESSION" if worse > threshold else ""
+                regressions += bool(flag)
+                changes.append(f"{label} {change:+.1f}%{flag}")
+            self.stdout.write(f"  {'/'.join(map(str, key(result)))}: {', '.join(changes)}")
+        self.stdout.write(f"{regressions} regression(s) beyond {threshold:.0f}%")
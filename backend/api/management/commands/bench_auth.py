@@ -0,0 +1,104 @@
+import statistics
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_databases, setup_test_environment, teardown_databases,
+)
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.authentication import CachedJWTAuthentication, TokenUserAuthentication
+from api.models import Blog, User
+
+AUTH_CLASSES = {
+    "jwt": JWTAuthentication,  # simplejwt: one user query per request
+    "cached": CachedJWTAuthentication,
+    "token_user": TokenUserAuthentication,
+}
+ENDPOINTS = ("/api/blogs/", "/api/blogs/search/?q=time")
+BENCH_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "bench-auth"}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DB queries and time per authenticated request for simplejwt's JWTAuthentication, "
+        "the cached user lookup and the token user, first on authenticate() alone and then on real "
+        "endpoints (first request per user vs. repeats). Runs on a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--requests", type=int, default=2000, help="authenticate() calls per class")
+        parser.add_argument("--repeats", type=int, default=5, help="Requests per user and endpoint")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(CACHES=BENCH_CACHE, AUTH_USER_CACHE="default"):
+                tokens = self._seed(options["users"])
+                self._bench_authenticate(tokens, options["requests"])
+                self._bench_endpoints(tokens, options["repeats"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def _seed(self, count):
+        tokens = []
+        for i in range(count):
+            user = User.objects.create_user(
+                username=f"bench-auth-{i}", email=f"bench-auth-{i}@example.com", password="bench-pass-123",
+            )
+            blog = Blog(author=user, title="Time Management")
+            Blog.set_texts([blog], ["Plan the week and protect time."])
+            blog.save()
+            tokens.append(str(RefreshToken.for_user(user).access_token))
+        return tokens
+
+    def _bench_authenticate(self, tokens, requests):
+        factory = RequestFactory()
+        requests_by_token = [factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}") for token in tokens]
+        self.stdout.write(f"{'auth':>12} {'requests':>8} {'queries/req':>11} {'warm q/req':>10} {'us/req':>8}")
+        for name, auth_class in AUTH_CLASSES.items():
+            caches["default"].clear()
+            auth = auth_class()
+            durations, warm_queries = [], 0
+            with CaptureQueriesContext(connection) as queries:
+                for i in range(requests):
+                    before = len(queries)
+                    started = time.perf_counter()
+                    auth.authenticate(requests_by_token[i % len(tokens)])
+                    durations.append(time.perf_counter() - started)
+                    if i >= len(tokens):  # every user seen once: the cache is warm
+                        warm_queries += len(queries) - before
+            warm = max(requests - len(tokens), 1)
+            self.stdout.write(
+                f"{name:>12} {requests:>8} {len(queries) / requests:>11.3f} {warm_queries / warm:>10.3f} "
+                f"{statistics.median(durations) * 1e6:>8.1f}"
+            )
+
+    def _bench_endpoints(self, tokens, repeats):
+        client = Client()
+        self.stdout.write(f"\n{'endpoint':>26} {'first q':>7} {'repeat q':>8} {'first ms':>8} {'repeat ms':>9}")
+        for path in ENDPOINTS:
+            caches["default"].clear()
+            first, repeat = [], []
+            for token in tokens:
+                for i in range(repeats):
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        response = client.get(path, HTTP_AUTHORIZATION=f"Bearer {token}")
+                        elapsed = time.perf_counter() - started
+                    if response.status_code != 200:
+                        self.stderr.write(f"{path}: HTTP {response.status_code}")
+                    (first if i == 0 else repeat).append((len(queries), elapsed))
+            self.stdout.write(
+                f"{path:>26} {self._mean(first, 0):>7.2f} {self._mean(repeat, 0):>8.2f} "
+                f"{self._mean(first, 1) * 1000:>8.2f} {self._mean(repeat, 1) * 1000:>9.2f}"
+            )
+
+    def _mean(self, samples, index):
+        return statistics.mean(sample[index] for sample in samples) if samples else 0.0
@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from api.utils.longform import estimate_tokens
+from api.utils.model_loader import MODEL_CONFIG, create_llama_model
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure time to first token and tokens/sec of the model backend's stream, generate and batch "
+        "calls. The fake backend needs no model file, e.g. for CI: "
+        "`manage.py bench_backend --backend fake --tokens-per-second 200`. "
+        "Token counts for generate and batch are estimated from their word counts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backend", help="Override MODEL_BACKEND for this run")
+        parser.add_argument("--tokens-per-second", type=float, help="Rate for the fake backend")
+        parser.add_argument("--runs", type=int, default=3)
+        parser.add_argument("--batch-size", type=int, default=4)
+        parser.add_argument("--max-new-tokens", type=int, default=64)
+        parser.add_argument("--prompt", default="Write a 200-word blog for Students about Time Management.")
+
+    def handle(self, *args, **options):
+        backend_options = dict(settings.MODEL_BACKEND_OPTIONS)
+        if options["tokens_per_second"]:
+            backend_options["tokens_per_second"] = options["tokens_per_second"]
+        with override_settings(
+            MODEL_BACKEND=options["backend"] or settings.MODEL_BACKEND, MODEL_BACKEND_OPTIONS=backend_options,
+        ):
+            started = time.perf_counter()
+            llm = create_llama_model()
+            self.stdout.write(f"{settings.MODEL_BACKEND} loaded in {time.perf_counter() - started:.2f}s")
+
+        params = {"max_new_tokens": options["max_new_tokens"], "temperature": MODEL_CONFIG["temperature"]}
+        prompts = [f"{options['prompt']} ({i + 1})" for i in range(options["batch_size"])]
+        self.stdout.write(f"{'call':>8} {'prompts':>7} {'tokens':>7} {'ttft_ms':>8} {'wall_s':>7} {'tok/s':>8}")
+        for _ in range(options["runs"]):
+            started = time.perf_counter()
+            ttft, tokens = None, 0
+            for _chunk in llm.stream(options["prompt"], **params):
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                tokens += 1
+            self._row("stream", 1, tokens, ttft, time.perf_counter() - started)
+
+            started = time.perf_counter()
+            text = llm.generate(options["prompt"], **params)
+            self._row("generate", 1, estimate_tokens(text), None, time.perf_counter() - started)
+
+            started = time.perf_counter()
+            texts = llm.batch(prompts, **params)
+            self._row("batch", len(prompts), sum(map(estimate_tokens, texts)), None, time.perf_counter() - started)
+
+    def _row(self, call, prompts, tokens, ttft, wall):
+        ttft_ms = f"{ttft * 1000:.1f}" if ttft is not None else "-"
+        self.stdout.write(f"{call:>8} {prompts:>7} {tokens:>7} {ttft_ms:>8} {wall:>7.2f} {tokens / wall:>8.1f}")
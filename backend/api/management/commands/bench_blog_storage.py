@@ -0,0 +1,72 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings, setup_databases, setup_test_environment, teardown_databases
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.management.commands.blog_storage_report import storage_stats, write_report
+from api.models import Blog, User
+from api.utils.backends import FakeBackend
+
+MODES = ("text", "compressed")
+
+
+class Command(BaseCommand):
+    help = (
+        "Read latency of the history (with and without excerpts) and detail endpoints when blog bodies are "
+        "stored as plain text vs. compressed and deduplicated, plus the storage each takes. Seeds a throwaway "
+        "test database with generated blogs; --duplicates is the share saved twice, like a re-saved candidate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--blogs", type=int, default=1000, help="Blogs per storage mode")
+        parser.add_argument("--words", type=int, default=600, help="Words per blog")
+        parser.add_argument("--duplicates", type=float, default=0.3)
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and mode")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self._run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def _run(self, options):
+        texts = self._texts(options["blogs"], options["words"], options["duplicates"])
+        client = Client()
+        self.stdout.write(f"{'mode':>10} {'endpoint':>16} {'p50_ms':>8} {'p95_ms':>8}")
+        for mode in MODES:
+            user = User.objects.create_user(username=f"bench-{mode}", email=f"bench-{mode}@example.com")
+            with override_settings(BLOG_CONTENT_STORAGE=mode):
+                blogs = [Blog(author=user, title=f"Blog {i}") for i in range(len(texts))]
+                Blog.set_texts(blogs, texts)
+                blog_ids = [blog.pk for blog in Blog.objects.bulk_create(blogs, batch_size=500)]
+            auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(user).access_token}"}
+            paths = {
+                "history": lambda i: "/api/blogs/",
+                "history+excerpt": lambda i: "/api/blogs/?excerpt=1",
+                "detail": lambda i: f"/api/blogs/{blog_ids[i % len(blog_ids)]}/",
+            }
+            for endpoint, path in paths.items():
+                latencies = []
+                for i in range(options["requests"]):
+                    started = time.perf_counter()
+                    response = client.get(path(i), **auth)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    assert response.status_code == 200, response.content
+                latencies.sort()
+                self.stdout.write(
+                    f"{mode:>10} {endpoint:>16} {statistics.median(latencies):>8.2f} "
+                    f"{latencies[int(len(latencies) * 0.95) - 1]:>8.2f}"
+                )
+        self.stdout.write("")
+        write_report(self.stdout, storage_stats())
+
+    def _texts(self, count, words, duplicates):
+        llm = FakeBackend(tokens_per_second=0)
+        unique = max(1, round(count * (1 - duplicates)))
+        texts = [llm.generate(f"Blog {i}", max_new_tokens=words, seed=i) for i in range(unique)]
+        return (texts * (count // unique + 1))[:count]
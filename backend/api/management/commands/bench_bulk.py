@@ -0,0 +1,73 @@
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.models import User
+
+CONTENT = " ".join(["Plan the week, review the goals and protect time for focused work."] * 20)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rows/sec of saving blogs one request at a time (/api/save-blog/) against one NDJSON upload to "
+        "/api/blogs/bulk/, then of streaming them back out with its export, with the export's peak "
+        "Python memory. Runs on a throwaway test database of the configured engine."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500, help="Blogs saved per-row and per bulk import")
+        parser.add_argument("--export-rows", type=int, default=20000, help="Blogs in the exported history")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self._run(options["rows"], options["export_rows"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def _run(self, rows, export_rows):
+        client = Client()
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {self._token('bench-bulk')}"}
+        self.stdout.write(f"{'path':>12} {'rows':>7} {'seconds':>8} {'rows/s':>9} {'peak_kb':>8}")
+
+        started = time.perf_counter()
+        for i in range(rows):
+            response = client.post(
+                "/api/save-blog/", {"title": f"Blog {i}", "content": CONTENT}, content_type="application/json", **auth,
+            )
+            assert response.status_code == 201, response.content
+        self._row("per-row", rows, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        self._import(client, auth, rows)
+        self._row("bulk", rows, time.perf_counter() - started)
+
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {self._token('bench-bulk-export')}"}
+        self._import(client, auth, export_rows)
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = client.get("/api/blogs/bulk/", **auth)
+        exported = sum(chunk.count(b"\n") for chunk in response.streaming_content)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self._row("export", exported, elapsed, peak)
+
+    def _token(self, username):
+        user = User.objects.create_user(username=username, email=f"{username}@example.com", password="bench-pass-123")
+        return str(RefreshToken.for_user(user).access_token)
+
+    def _import(self, client, auth, rows):
+        body = "".join(json.dumps({"title": f"Blog {i}", "content": CONTENT}) + "\n" for i in range(rows))
+        response = client.post("/api/blogs/bulk/", body, content_type="application/x-ndjson", **auth)
+        assert response.status_code == 201 and response.json()["created"] == rows, response.content
+
+    def _row(self, path, rows, seconds, peak=None):
+        peak_kb = f"{peak / 1024:.0f}" if peak is not None else "-"
+        self.stdout.write(f"{path:>12} {rows:>7} {seconds:>8.2f} {rows / seconds:>9.0f} {peak_kb:>8}")
@@ -0,0 +1,111 @@
+import statistics
+import threading
+import time
+import uuid
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test running servers: p50/p99 latency of GET /api/blogs/ while generations stream concurrently. "
+        "Start the same project under both servers and compare, e.g. "
+        "`python manage.py runserver 8000` (WSGI) and `uvicorn BlogGen.asgi:application --port 8001` (ASGI), then "
+        "`manage.py bench_concurrency --target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", action="append", required=True, help="name=base URL; repeat per server")
+        parser.add_argument("--generations", type=int, default=8, help="Concurrent streaming generations")
+        parser.add_argument("--readers", type=int, default=4, help="Concurrent /blogs/ pollers")
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds per target")
+        parser.add_argument("--word-count", type=int, default=200)
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options["target"]:
+            name, sep, url = target.partition("=")
+            if not sep:
+                raise CommandError(f"--target must look like name=http://host:port, got {target!r}")
+            targets.append((name, url.rstrip("/") + "/api"))
+
+        self.stdout.write(
+            f"{'target':>8} {'reads':>6} {'p50_ms':>8} {'p99_ms':>8} {'max_ms':>8} {'read_err':>8} "
+            f"{'gens':>5} {'gen_err':>7}"
+        )
+        for name, api in targets:
+            result = self._run(api, options)
+            latencies = sorted(result["latencies"])
+            if not latencies:
+                raise CommandError(f"{name}: no successful /blogs/ reads")
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(
+                f"{name:>8} {len(latencies):>6} {statistics.median(latencies):>8.1f} {p99:>8.1f} "
+                f"{latencies[-1]:>8.1f} {result['read_errors']:>8} {result['generations']:>5} "
+                f"{result['generation_errors']:>7}"
+            )
+
+    def _run(self, api, options):
+        # Each generating client is its own user so per-user queue caps and quotas don't skew the run
+        tokens = [self._register(api) for _ in range(options["generations"] + 1)]
+        reader_token, generator_tokens = tokens[0], tokens[1:]
+        deadline = time.monotonic() + options["duration"]
+        lock = threading.Lock()
+        result = {"latencies": [], "read_errors": 0, "generations": 0, "generation_errors": 0}
+
+        def generate(token):
+            session = requests.Session()
+            session.headers["Authorization"] = f"Bearer {token}"
+            while time.monotonic() < deadline:
+                body = {
+                    "title": f"Load test {uuid.uuid4().hex[:8]}", "audience": "Engineers",
+                    "word_count": options["word_count"], "fresh": True,
+                }
+                try:
+                    with session.post(f"{api}/generate-blog/stream/", json=body, stream=True, timeout=600) as response:
+                        ok = response.status_code == 200
+                        for _ in response.iter_content(chunk_size=None):
+                            pass
+                except requests.RequestException:
+                    ok = False
+                with lock:
+                    result["generations" if ok else "generation_errors"] += 1
+                if not ok:
+                    time.sleep(1)  # 429/503: back off instead of spinning
+
+        def read():
+            session = requests.Session()
+            session.headers["Authorization"] = f"Bearer {reader_token}"
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    ok = session.get(f"{api}/blogs/", timeout=60).status_code == 200
+                except requests.RequestException:
+                    ok = False
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    if ok:
+                        result["latencies"].append(elapsed)
+                    else:
+                        result["read_errors"] += 1
+                time.sleep(0.05)
+
+        threads = [threading.Thread(target=generate, args=(token,), daemon=True) for token in generator_tokens]
+        threads += [threading.Thread(target=read, daemon=True) for _ in range(options["readers"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
+
+    def _register(self, api):
+        username = f"bench-{uuid.uuid4().hex[:10]}"
+        password = uuid.uuid4().hex
+        response = requests.post(f"{api}/register/", json={
+            "username": username, "email": f"{username}@bench.invalid",
+            "password": password, "confirm_password": password,
+        }, timeout=30)
+        if response.status_code != 201:
+            raise CommandError(f"Could not register a load-test user at {api}: {response.status_code} {response.text}")
+        return response.json()["token"]
@@ -0,0 +1,47 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.utils.generation import stream_blog
+from api.utils.longform import is_long_form, plan_sections
+from api.utils.model_loader import load_llama_model
+from api.utils.stopping import GenerationOutcome
+
+
+class Command(BaseCommand):
+    help = "Measure length adherence, tokens/sec and tokens saved by early stopping per requested word count."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--word-counts", default="250,500,750,1000", help="Comma-separated word counts to try")
+        parser.add_argument("--runs", type=int, default=1, help="Generations per word count")
+        parser.add_argument("--title", default="Time Management")
+        parser.add_argument("--audience", default="Students")
+        parser.add_argument("--temperature", type=float, default=0.7)
+
+    def handle(self, *args, **options):
+        llm = load_llama_model()
+        params = {"temperature": options["temperature"]}
+        self.stdout.write(
+            f"{'words':>6} {'mode':>10} {'words_out':>9} {'adherence':>9} {'tokens':>7} {'saved':>6} {'wall_s':>7} {'tok/s':>7}  finish"
+        )
+        for word_count in [int(w) for w in options["word_counts"].split(",")]:
+            mode = f"{plan_sections(word_count)[0]} sections" if is_long_form(word_count) else "single"
+            produced, tokens, saved, walls, reasons = [], 0, 0, [], set()
+            for _ in range(options["runs"]):
+                started = time.perf_counter()
+                outcome = GenerationOutcome()
+                chunks = list(stream_blog(llm, options["title"], options["audience"], word_count, params, outcome))
+                walls.append(time.perf_counter() - started)
+                text = "".join(chunks)
+                # Section headings are framing, not body text
+                produced.append(sum(len(line.split()) for line in text.splitlines() if not line.startswith("## ")))
+                tokens += len(chunks)
+                saved += outcome.summary()["tokens_saved"]
+                reasons.add(outcome.summary()["finish_reason"])
+            words_out = statistics.mean(produced)
+            self.stdout.write(
+                f"{word_count:>6} {mode:>10} {words_out:>9.0f} {words_out / word_count:>8.0%} "
+                f"{tokens // options['runs']:>7} {saved // options['runs']:>6} "
+                f"{statistics.mean(walls):>7.2f} {tokens / sum(walls):>7.1f}  {','.join(sorted(reasons))}"
+            )
@@ -0,0 +1,71 @@
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from api.utils import model_loader
+from api.utils.generation import build_prompt
+from api.utils.prompts import get_template
+
+TITLES = ("Time Management", "Remote Work", "Healthy Habits", "Learning Python", "Saving Money", "Public Speaking")
+
+
+class Command(BaseCommand):
+    help = (
+        "Prompt evaluation time (time to first token) per model call with and without resuming from the "
+        "prompt template prefix's state snapshot, and after a restart with the snapshot on disk. The fake "
+        "backend simulates prompt evaluation at --prompt-tokens-per-second, e.g. "
+        "`manage.py bench_prefix_state --backend fake`; llama_cpp measures the real thing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backend", help="Override MODEL_BACKEND for this run")
+        parser.add_argument("--template", default="llama2_chat", help="PROMPT_TEMPLATE to measure")
+        parser.add_argument("--prompt-tokens-per-second", type=float, default=200.0, help="For the fake backend")
+        parser.add_argument("--runs", type=int, default=12, help="Model calls per mode")
+
+    def handle(self, *args, **options):
+        backend = options["backend"] or settings.MODEL_BACKEND
+        backend_options = dict(settings.MODEL_BACKEND_OPTIONS)
+        if backend == "fake":
+            backend_options.setdefault("prompt_tokens_per_second", options["prompt_tokens_per_second"])
+        state_dir = tempfile.mkdtemp()
+        try:
+            with override_settings(
+                MODEL_BACKEND=backend, MODEL_BACKEND_OPTIONS=backend_options, PROMPT_TEMPLATE=options["template"],
+            ):
+                llm = model_loader.create_llama_model()
+                template = get_template()
+                prompt = template.render(build_prompt(TITLES[0], "Students", 300))
+                self.stdout.write(
+                    f"{backend}, template {template.key}: prompt ~{llm.count_tokens(prompt)} tokens, "
+                    f"prefix ~{llm.count_tokens(template.prefix)}"
+                )
+                self.stdout.write(f"{'mode':>14} {'calls':>5} {'first_ms':>9} {'p50_ms':>8} {'mean_ms':>8}")
+                self._run(llm, "no snapshot", options["runs"], PREFIX_STATE_CACHE=False)
+                self._run(llm, "snapshot", options["runs"], PREFIX_STATE_CACHE=True, PREFIX_STATE_DIR=state_dir)
+                self._run(llm, "warm restart", options["runs"], PREFIX_STATE_CACHE=True, PREFIX_STATE_DIR=state_dir)
+        finally:
+            model_loader._prefix_states = None
+            shutil.rmtree(state_dir, ignore_errors=True)
+
+    def _run(self, llm, mode, runs, **overrides):
+        model_loader._prefix_states = None  # A fresh process's cache: empty memory, disk as configured
+        latencies = []
+        with override_settings(**overrides):
+            for i in range(runs):
+                prompt = build_prompt(TITLES[i % len(TITLES)], "Students", 300 + i)
+                started = time.perf_counter()
+                chunks = model_loader.stream_llama(llm, prompt, max_new_tokens=1)
+                next(chunks, None)
+                latencies.append((time.perf_counter() - started) * 1000)
+                chunks.close()
+        rest = latencies[1:] or latencies
+        self.stdout.write(
+            f"{mode:>14} {runs:>5} {latencies[0]:>9.1f} {statistics.median(rest):>8.1f} "
+            f"{statistics.mean(latencies):>8.1f}"
+        )
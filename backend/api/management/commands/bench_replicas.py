@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.utils.model_loader import MODEL_CONFIG, get_model_path
+from api.utils.replica_pool import ReplicaPool
+
+
+class Command(BaseCommand):
+    help = "Measure aggregate generation tokens/sec against the number of model replica processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--replicas", default="1,2,4", help="Comma-separated replica counts to try")
+        parser.add_argument("--threads-per-replica", type=int, default=0, help="0 = split cores evenly")
+        parser.add_argument("--requests-per-replica", type=int, default=2)
+        parser.add_argument("--max-new-tokens", type=int, default=64)
+        parser.add_argument("--prompt", default="Write a 200-word blog for Students about Time Management.")
+
+    def handle(self, *args, **options):
+        model_path = get_model_path()
+        self.stdout.write(f"{'replicas':>8} {'threads':>7} {'requests':>8} {'tokens':>7} {'wall_s':>7} {'tok/s':>8}")
+        for replicas in [int(r) for r in options["replicas"].split(",")]:
+            pool = ReplicaPool(
+                model_path, MODEL_CONFIG, replicas=replicas,
+                threads_per_replica=options["threads_per_replica"] or None,
+                backend=settings.MODEL_BACKEND, options=settings.MODEL_BACKEND_OPTIONS,
+            )
+            try:
+                pool.wait_ready()  # Load time is not part of the measurement
+                requests = replicas * options["requests_per_replica"]
+                started = time.perf_counter()
+                channels = [
+                    pool.generate(options["prompt"], max_new_tokens=options["max_new_tokens"])
+                    for _ in range(requests)
+                ]
+                tokens = sum(sum(1 for _ in channel) for channel in channels)
+                wall = time.perf_counter() - started
+            finally:
+                pool.shutdown()
+            self.stdout.write(
+                f"{replicas:>8} {pool.threads_per_replica:>7} {requests:>8} {tokens:>7} {wall:>7.2f} {tokens / wall:>8.1f}"
+            )
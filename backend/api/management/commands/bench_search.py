@@ -0,0 +1,69 @@
+import random
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Blog, User
+from api.utils.search_index import index_blogs, search_blogs
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a synthetic blog corpus for a throwaway user, index it, and time BM25 searches. "
+        "The user and everything attached to it are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--blogs", type=int, default=100_000)
+        parser.add_argument("--words", type=int, default=300, help="Words per synthetic blog")
+        parser.add_argument("--vocabulary", type=int, default=20_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        vocabulary = [f"w{i}" for i in range(options["vocabulary"])]
+        # Zipf-like term weights, like natural text
+        weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+        user = User.objects.create_user(f"bench-{uuid.uuid4().hex[:8]}", f"{uuid.uuid4().hex}@bench.invalid", None)
+        try:
+            started = time.perf_counter()
+            remaining = options["blogs"]
+            while remaining:
+                size = min(options["batch_size"], remaining)
+                with transaction.atomic():
+                    last_id = Blog.objects.filter(author=user).order_by("-pk").values_list("pk", flat=True).first() or 0
+                    Blog.objects.bulk_create(
+                        Blog(
+                            author=user,
+                            title=" ".join(rng.choices(vocabulary, weights, k=6)),
+                            content=" ".join(rng.choices(vocabulary, weights, k=options["words"])),
+                        )
+                        for _ in range(size)
+                    )
+                    # bulk_create returns no PKs on MySQL, so read the batch back
+                    index_blogs(Blog.objects.filter(author=user, pk__gt=last_id))
+                remaining -= size
+            build = time.perf_counter() - started
+            self.stdout.write(f"Inserted + indexed {options['blogs']} blogs in {build:.1f}s")
+
+            # Queries mix common and rare terms
+            latencies = []
+            for _ in range(options["queries"]):
+                query = " ".join(rng.choices(vocabulary[:2000], k=rng.randint(1, 3)))
+                started = time.perf_counter()
+                search_blogs(user, query, limit=20)
+                latencies.append((time.perf_counter() - started) * 1000)
+            latencies.sort()
+            self.stdout.write(
+                f"search over {options['blogs']} blogs: "
+                f"p50={statistics.median(latencies):.1f}ms "
+                f"p95={latencies[int(len(latencies) * 0.95) - 1]:.1f}ms "
+                f"max={latencies[-1]:.1f}ms"
+            )
+        finally:
+            user.delete()
@@ -0,0 +1,52 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.utils.similarity_index import _UserIndex, embed
+
+
+class Command(BaseCommand):
+    help = "Time /blogs/similar/ lookups against an in-memory index of synthetic blogs (no database writes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--blogs", type=int, default=50_000)
+        parser.add_argument("--words", type=int, default=300, help="Words per synthetic blog")
+        parser.add_argument("--vocabulary", type=int, default=20_000)
+        parser.add_argument("--dimensions", type=int, default=256)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        vocabulary = [f"w{i}" for i in range(options["vocabulary"])]
+        weights = [1 / (rank + 1) for rank in range(len(vocabulary))]  # Zipf-like
+        dimensions = options["dimensions"]
+
+        index = _UserIndex(dimensions)
+        started = time.perf_counter()
+        for blog_id in range(1, options["blogs"] + 1):
+            title = " ".join(rng.choices(vocabulary, weights, k=6))
+            content = " ".join(rng.choices(vocabulary, weights, k=options["words"]))
+            index.add(blog_id, embed(title, content, dimensions))
+        build = time.perf_counter() - started
+        self.stdout.write(
+            f"Embedded {options['blogs']} blogs in {build:.1f}s "
+            f"({index.matrix[:index.size].nbytes / 2**20:.1f} MB matrix)"
+        )
+
+        # Same path as SimilarityIndex.similar, minus the database sync
+        latencies = []
+        for _ in range(options["queries"]):
+            title = " ".join(rng.choices(vocabulary[:2000], k=rng.randint(2, 6)))
+            started = time.perf_counter()
+            index.top_k(embed(title, "", dimensions), 5, 0.0)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        self.stdout.write(
+            f"top-5 over {options['blogs']} blogs: "
+            f"p50={statistics.median(latencies):.2f}ms "
+            f"p95={latencies[int(len(latencies) * 0.95) - 1]:.2f}ms "
+            f"max={latencies[-1]:.2f}ms"
+        )
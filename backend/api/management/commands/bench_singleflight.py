@@ -0,0 +1,74 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.utils import inference_queue
+from api.utils.generation import cache_key_for, generate_blog
+from api.utils.inference_queue import InferenceScheduler
+
+
+class _CountingModel:
+    """Stand-in for the LLM that counts invocations and emits tokens at a fixed pace."""
+
+    def __init__(self, tokens, delay):
+        self.tokens = tokens
+        self.delay = delay
+        self.calls = 0
+
+    def client(self, prompt, stream=False, **params):
+        self.calls += 1
+        return self._emit()
+
+    def _emit(self):
+        for i in range(self.tokens):
+            time.sleep(self.delay)
+            yield f"tok{i} "
+
+
+class Command(BaseCommand):
+    help = "Fire a burst of identical generation requests and count model invocations with and without coalescing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--burst", type=int, default=12, help="Concurrent identical requests")
+        parser.add_argument("--tokens", type=int, default=64, help="Tokens per generation")
+        parser.add_argument("--token-delay", type=float, default=0.005, help="Seconds per token")
+        parser.add_argument("--workers", type=int, default=1, help="Inference workers")
+
+    def handle(self, *args, **options):
+        scenarios = [
+            ("sampled, no opt-in", {"temperature": 0.7}, False),
+            ("sampled, coalesce=true", {"temperature": 0.7}, True),
+            ("deterministic (temperature 0)", {"temperature": 0.0}, False),
+        ]
+        original = inference_queue._scheduler
+        try:
+            for label, params, coalesce in scenarios:
+                calls, elapsed = self._burst(options, params, coalesce)
+                self.stdout.write(
+                    f"{label:32s} requests={options['burst']:3d} model_invocations={calls:3d} wall={elapsed:.2f}s"
+                )
+        finally:
+            inference_queue._scheduler = original
+
+    def _burst(self, options, params, coalesce):
+        burst = options["burst"]
+        model = _CountingModel(options["tokens"], options["token_delay"])
+        inference_queue._scheduler = InferenceScheduler(lambda: model, workers=options["workers"], max_queue=burst)
+
+        blog = ("Benchmarking", "Engineers", 300)
+        key = cache_key_for("Benchmarking", "Engineers", 300, params=params)
+        barrier = threading.Barrier(burst)
+
+        def request():
+            barrier.wait()
+            # fresh=True so every request misses the result cache and only coalescing can help
+            generate_blog(blog, key, params, fresh=True, coalesce=coalesce)
+
+        threads = [threading.Thread(target=request) for _ in range(burst)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return model.calls, time.perf_counter() - started
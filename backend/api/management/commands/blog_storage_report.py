@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+from django.db.models.functions import Length
+
+from api.models import Blog, BlogContent
+
+
+def storage_stats():
+    """Space taken by blog bodies, plain and compressed/deduplicated, in bytes."""
+    blogs = Blog.objects.aggregate(blogs=Count("id"), compressed=Count("body"), logical=Sum("body__size"))
+    plain = Blog.objects.filter(body__isnull=True).aggregate(plain=Sum(Length("content")))
+    bodies = BlogContent.objects.aggregate(bodies=Count("id"), stored=Sum(Length("data")))
+    return {
+        "blogs": blogs["blogs"],
+        "compressed_blogs": blogs["compressed"],
+        "distinct_bodies": bodies["bodies"],
+        "logical_bytes": blogs["logical"] or 0,  # What the compressed blogs' bodies would take as plain text
+        "stored_bytes": bodies["stored"] or 0,
+        "plain_bytes": plain["plain"] or 0,  # Characters; bytes for ASCII text
+        "orphaned_bodies": BlogContent.objects.filter(blogs__isnull=True).count(),
+    }
+
+
+def write_report(stdout, stats):
+    saved = stats["logical_bytes"] - stats["stored_bytes"]
+    stdout.write(
+        f"Blogs: {stats['blogs']} ({stats['compressed_blogs']} compressed, "
+        f"{stats['blogs'] - stats['compressed_blogs']} plain, {stats['plain_bytes']:,} bytes)"
+    )
+    if stats["compressed_blogs"]:
+        stdout.write(
+            f"Compressed: {stats['logical_bytes']:,} bytes of text in {stats['distinct_bodies']} distinct bodies "
+            f"({stats['compressed_blogs'] / max(stats['distinct_bodies'], 1):.2f} blogs each), "
+            f"stored in {stats['stored_bytes']:,} bytes; saved {saved:,} bytes "
+            f"({100 * saved / max(stats['logical_bytes'], 1):.1f}%)"
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the storage used by blog bodies: plain Blog.content vs. shared compressed BlogContent rows, "
+        "and the bytes that compression and deduplication save."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prune", action="store_true", help="Delete bodies no blog refers to any more")
+
+    def handle(self, *args, **options):
+        stats = storage_stats()
+        write_report(self.stdout, stats)
+        if options["prune"]:
+            deleted = BlogContent.objects.prune()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} orphaned bodies"))
+        elif stats["orphaned_bodies"]:
+            # Deleting a blog drops its body; these predate that or lost a race with a save
+            self.stdout.write(f"{stats['orphaned_bodies']} bodies are orphaned; --prune removes them")
@@ -0,0 +1,176 @@
+import os
+import statistics
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from api.utils import thread_profile
+from api.utils.longform import section_prompt
+from api.utils.model_loader import MODEL_CONFIG, get_backend_class, get_model_path, model_id
+from api.utils.prompts import get_template
+
+# A typical call, for ranking settings: a long-form section prompt and a single-shot blog's output
+REFERENCE_PROMPT_TOKENS = 300
+REFERENCE_NEW_TOKENS = 512
+TOLERANCE = 0.03  # Settings this close to the fastest count as tied; the fewest threads wins
+
+
+def parse_ints(value):
+    try:
+        return sorted({int(part) for part in value.split(",") if part.strip()})
+    except ValueError:
+        raise CommandError(f"Expected comma-separated whole numbers, got {value!r}")
+
+
+def calibration_prompt():
+    """A long-form section prompt, the longest prompts the app sends."""
+    headings = ["Why It Matters", "Planning the Week", "Staying Focused", "Conclusion"]
+    summary = "Time is the one resource that cannot be replaced. Small habits compound over a semester."
+    return get_template().render(section_prompt("Time Management", "Students", 1500, headings, 1, summary, 375))
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure prompt-evaluation and generation tokens/sec of the configured model (or --backend fake) "
+        "across thread counts and prompt batch sizes, then across thread counts for several generations "
+        "running at once, and save the best settings as this host's profile in MODEL_PROFILE_PATH. The "
+        "loader uses the profile from then on; MODEL_ADAPTIVE_THREADS uses its per-concurrency thread "
+        "counts. The fake backend's speed does not depend on threads, so it only exercises the command."
+    )
+
+    def add_arguments(self, parser):
+        cpus = os.cpu_count() or 1
+        default_threads = sorted({1, 2, 4, 8, 16, cpus // 2, cpus, MODEL_CONFIG["threads"]} - {0})
+        parser.add_argument("--backend", help="Override MODEL_BACKEND for this run")
+        parser.add_argument("--threads", type=parse_ints, default=[t for t in default_threads if t <= cpus])
+        parser.add_argument("--batch-sizes", type=parse_ints, default=[8, 64, 512], help="Prompt tokens per step")
+        parser.add_argument("--concurrency", type=parse_ints, default=[1, 2, 4], help="Generations at once")
+        parser.add_argument("--max-new-tokens", type=int, default=48, help="Generated per measured call")
+        parser.add_argument("--runs", type=int, default=2, help="Calls per setting (the median counts)")
+        parser.add_argument("--prompt-tokens-per-second", type=float, default=200.0, help="For the fake backend")
+        parser.add_argument("--dry-run", action="store_true", help="Report without saving the profile")
+
+    def handle(self, *args, **options):
+        backend = options["backend"] or settings.MODEL_BACKEND
+        backend_options = dict(settings.MODEL_BACKEND_OPTIONS)
+        if backend == "fake":
+            backend_options.setdefault("prompt_tokens_per_second", options["prompt_tokens_per_second"])
+        with override_settings(MODEL_BACKEND=backend, MODEL_BACKEND_OPTIONS=backend_options):
+            self.backend_class = get_backend_class()
+            if not self.backend_class.supports_thread_control:
+                raise CommandError(f"The {backend} backend can't change its thread count between calls")
+            self.model_path = get_model_path()
+            self.options = options
+            self.prompt = calibration_prompt()
+            profile = self._calibrate()
+            if options["dry_run"]:
+                return
+            thread_profile.save_profile(settings.MODEL_PROFILE_PATH, model_id(), profile)
+            self.stdout.write(self.style.SUCCESS(
+                f"Saved profile for {thread_profile.host_key(model_id())} to {settings.MODEL_PROFILE_PATH}"
+            ))
+
+    def _calibrate(self):
+        options = self.options
+        self.stdout.write(
+            f"{'conc':>4} {'threads':>7} {'batch':>5} {'prompt_tok/s':>12} {'gen_tok/s':>9} {'est_call_s':>10}"
+        )
+        results, models = [], {}
+        for batch_size in options["batch_sizes"]:
+            models[batch_size] = llm = self._load(max(options["threads"]), batch_size)
+            for threads in options["threads"]:
+                results.append(self._cell(1, threads, batch_size, [llm]))
+        single = self._best([r for r in results if r["concurrency"] == 1])
+        batch_size = single["batch_size"]
+
+        threads_by_concurrency = {"1": single["threads"]}
+        llms = [models[batch_size]]
+        for concurrency in options["concurrency"]:
+            if concurrency < 2:
+                continue
+            while len(llms) < concurrency:
+                llms.append(self._load(max(options["threads"]), batch_size))
+            cpus = os.cpu_count() or 1
+            cells = [
+                self._cell(concurrency, threads, batch_size, llms[:concurrency])
+                for threads in options["threads"] if threads * concurrency <= max(cpus, concurrency)
+            ]
+            results.extend(cells)
+            if cells:
+                threads_by_concurrency[str(concurrency)] = self._best(cells)["threads"]
+
+        self.stdout.write(
+            f"Best: threads={single['threads']} batch_size={batch_size}; "
+            f"threads by concurrent generations: {threads_by_concurrency}"
+        )
+        return {
+            "threads": single["threads"],
+            "batch_size": batch_size,
+            "threads_by_concurrency": threads_by_concurrency,
+            "prompt_tokens_per_second": single["prompt_tokens_per_second"],
+            "tokens_per_second": single["tokens_per_second"],
+            "calibrated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "results": results,
+        }
+
+    def _load(self, threads, batch_size):
+        config = {**MODEL_CONFIG, "threads": threads, "batch_size": batch_size}
+        return self.backend_class(self.model_path, config, **settings.MODEL_BACKEND_OPTIONS)
+
+    def _cell(self, concurrency, threads, batch_size, llms):
+        for llm in llms:
+            llm.set_threads(threads)
+        self._run_calls(llms)  # Warm-up: page the weights in, settle the caches
+        runs = [self._run_calls(llms) for _ in range(self.options["runs"])]
+        prompt_seconds = statistics.median(statistics.mean(call[0] for call in run) for run in runs)
+        generate_rate = statistics.median(statistics.mean(call[1] for call in run) for run in runs)
+        prompt_tokens = llms[0].count_tokens(self.prompt)
+        prompt_rate = prompt_tokens / prompt_seconds if prompt_seconds > 0 else None
+        estimate = (REFERENCE_PROMPT_TOKENS / prompt_rate if prompt_rate else 0.0)
+        estimate += REFERENCE_NEW_TOKENS / generate_rate if generate_rate else float("inf")
+        cell = {
+            "concurrency": concurrency,
+            "threads": threads,
+            "batch_size": batch_size,
+            "prompt_tokens_per_second": round(prompt_rate, 1) if prompt_rate else None,
+            "tokens_per_second": round(generate_rate, 2),  # Per generation
+            "estimated_call_seconds": round(estimate, 3),
+        }
+        self.stdout.write(
+            f"{concurrency:>4} {threads:>7} {batch_size:>5} {cell['prompt_tokens_per_second'] or '-':>12} "
+            f"{cell['tokens_per_second']:>9} {cell['estimated_call_seconds']:>10}"
+        )
+        return cell
+
+    def _best(self, cells):
+        """The fewest threads within TOLERANCE of the fastest estimated call."""
+        fastest = min(cell["estimated_call_seconds"] for cell in cells)
+        tied = [cell for cell in cells if cell["estimated_call_seconds"] <= fastest * (1 + TOLERANCE)]
+        return min(tied, key=lambda cell: (cell["threads"], cell["estimated_call_seconds"]))
+
+    def _run_calls(self, llms):
+        """One call on each model at the same time: ``[(prompt_seconds, generated tokens/sec)]``."""
+        results = [None] * len(llms)
+
+        def call(index, llm):
+            started = time.perf_counter()
+            first, tokens = None, 0
+            for _chunk in llm.stream(self.prompt, max_new_tokens=self.options["max_new_tokens"]):
+                if first is None:
+                    first = time.perf_counter()
+                tokens += 1
+            finished = time.perf_counter()
+            first = first or finished
+            rate = (tokens - 1) / (finished - first) if tokens > 1 and finished > first else 0.0
+            results[index] = (first - started, rate)
+
+        workers = [threading.Thread(target=call, args=(i, llm)) for i, llm in enumerate(llms)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return results
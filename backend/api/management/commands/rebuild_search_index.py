@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Blog, SearchDocument
+from api.utils.search_index import index_blogs
+
+
+class Command(BaseCommand):
+    help = "Rebuild the blog full-text search index from scratch (optionally for one user)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", help="Only rebuild this user's index")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        blogs = Blog.objects.select_related("body").order_by("pk")
+        documents = SearchDocument.objects.all()
+        if options["username"]:
+            blogs = blogs.filter(author__username=options["username"])
+            documents = documents.filter(author__username=options["username"])
+
+        documents.delete()  # Postings go with their documents
+        batch, indexed = [], 0
+        for blog in blogs.iterator(chunk_size=options["batch_size"]):
+            batch.append(blog)
+            if len(batch) >= options["batch_size"]:
+                with transaction.atomic():
+                    index_blogs(batch)
+                indexed += len(batch)
+                batch = []
+        if batch:
+            with transaction.atomic():
+                index_blogs(batch)
+            indexed += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} blogs"))
@@ -0,0 +1,46 @@
+import time
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from api.utils import startup
+from api.utils.model_loader import create_llama_model
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the model ahead of traffic. With --url, asks a running server to load it "
+        "(POST /api/ready/, with an admin's --token) and waits until it reports ready; without, loads it in this "
+        "process to check the model file and prime the OS page cache for the server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Base URL of a running server, e.g. http://127.0.0.1:8000")
+        parser.add_argument("--token", help="Access token of a staff user, required with --url")
+        parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for readiness")
+
+    def handle(self, *args, **options):
+        if options["url"]:
+            if not options["token"]:
+                raise CommandError("--url needs --token: only admins may warm up a server")
+            self._warm_server(options["url"].rstrip("/"), options["token"], options["timeout"])
+            return
+
+        started = time.perf_counter()
+        create_llama_model()
+        self.stdout.write(f"Model loaded in {time.perf_counter() - started:.2f}s {startup.phases()}")
+
+    def _warm_server(self, base_url, token, timeout):
+        response = requests.post(f"{base_url}/api/ready/", headers={"Authorization": f"Bearer {token}"}, timeout=30)
+        if response.status_code in (401, 403):
+            raise CommandError(f"Server refused the warm-up: {response.json()}")
+        deadline = time.monotonic() + timeout
+        while response.status_code != 200:
+            body = response.json()
+            if body.get("load_error"):
+                raise CommandError(f"Server failed to load the model: {body['load_error']}")
+            if time.monotonic() > deadline:
+                raise CommandError(f"Server not ready after {timeout:.0f}s")
+            time.sleep(1)
+            response = requests.get(f"{base_url}/api/ready/", timeout=30)
+        self.stdout.write(f"Server ready: {response.json()}")
@@ -0,0 +1,62 @@
+# api/middleware.py
+
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .utils import metrics
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """``connection_created`` receiver: time every query into the current request's ``db`` stage."""
+    connection.execute_wrappers.append(metrics.time_queries)
+
+
+class MetricsMiddleware:
+    """Records latency and DB queries per endpoint and adds a ``Server-Timing`` header.
+
+    Stages timed elsewhere while the request runs (``jwt``, ``user``, ``db``
+    and, for generation, ``queue``/``prompt``/``generate``) land in the
+    header too. Streaming responses are measured up to their headers.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings, token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self._finish(request, response, timings, started)
+
+    async def __acall__(self, request):
+        timings, token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self._finish(request, response, timings, started)
+
+    def _finish(self, request, response, timings, started):
+        total = time.perf_counter() - started
+        endpoint = getattr(request.resolver_match, "url_name", None) or "unmatched"
+        metrics.REQUEST_SECONDS.observe(total, endpoint, request.method, str(response.status_code))
+        metrics.REQUEST_QUERIES.observe(timings.queries, endpoint)
+        response["Server-Timing"] = timings.header(total)
+        return response
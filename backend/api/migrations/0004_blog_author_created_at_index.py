@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-17 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_generationjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['author', 'created_at'], name='api_blog_author__78e331_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-17 18:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_blog_author_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('blog', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='api.blog')),
+                ('length', models.PositiveIntegerField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('term_frequency', models.PositiveIntegerField()),
+                ('doc_length', models.PositiveIntegerField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='api.searchdocument')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchdocument',
+            index=models.Index(fields=['author', 'length'], name='api_searchd_author__b3f92e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchposting',
+            index=models.Index(fields=['author', 'term'], name='api_searchp_author__4b234e_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchposting',
+            constraint=models.UniqueConstraint(fields=('document', 'term'), name='unique_search_posting'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-17 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuotaBucket',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('tokens', models.FloatField()),
+                ('updated_at', models.FloatField()),
+            ],
+        ),
+    ]
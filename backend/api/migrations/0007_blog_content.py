@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_quotabucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('codec', models.CharField(max_length=8)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='blog',
+            name='content',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='body',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='blogs', to='api.blogcontent'),
+        ),
+    ]
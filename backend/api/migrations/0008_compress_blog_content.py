@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import migrations
+
+from api.utils.content_store import compress, decompress, digest
+
+BATCH_SIZE = 500
+CODEC = "zlib"  # Always available; BLOG_CONTENT_CODEC only applies to bodies saved later
+
+
+def compress_bodies(apps, schema_editor):
+    """Move every plain Blog.content into shared, compressed BlogContent rows.
+
+    Skipped with BLOG_CONTENT_STORAGE="text": reads handle both forms, so
+    those deployments keep their plain bodies (blog_storage_report shows them).
+    """
+    if settings.BLOG_CONTENT_STORAGE == "text":
+        return
+    Blog = apps.get_model("api", "Blog")
+    BlogContent = apps.get_model("api", "BlogContent")
+    last_id = 0
+    while True:
+        blogs = list(Blog.objects.filter(pk__gt=last_id, body__isnull=True).exclude(content="").order_by("pk")[:BATCH_SIZE])
+        if not blogs:
+            return
+        digests = {blog.pk: digest(blog.content) for blog in blogs}
+        known = set(BlogContent.objects.filter(digest__in=set(digests.values())).values_list("digest", flat=True))
+        new = {}
+        for blog in blogs:
+            d = digests[blog.pk]
+            if d not in known and d not in new:
+                text = blog.content
+                new[d] = BlogContent(digest=d, codec=CODEC, data=compress(text, CODEC), size=len(text.encode("utf-8")))
+        BlogContent.objects.bulk_create(new.values())
+        ids = dict(BlogContent.objects.filter(digest__in=set(digests.values())).values_list("digest", "id"))
+        for blog in blogs:
+            blog.body_id = ids[digests[blog.pk]]
+            blog.content = ""
+        Blog.objects.bulk_update(blogs, ["body", "content"])
+        last_id = blogs[-1].pk
+
+
+def restore_bodies(apps, schema_editor):
+    Blog = apps.get_model("api", "Blog")
+    last_id = 0
+    while True:
+        blogs = list(Blog.objects.filter(pk__gt=last_id, body__isnull=False).select_related("body").order_by("pk")[:BATCH_SIZE])
+        if not blogs:
+            return
+        for blog in blogs:
+            blog.content = decompress(blog.body.codec, blog.body.data)
+            blog.body = None
+        Blog.objects.bulk_update(blogs, ["body", "content"])
+        last_id = blogs[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_blog_content"),
+    ]
+
+    operations = [
+        migrations.RunPython(compress_bodies, restore_bodies),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_compress_blog_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='quota_tokens',
+            field=models.FloatField(default=0),
+        ),
+    ]
@@ -1,16 +1,172 @@
-from django.db import models
+import uuid
+from functools import cached_property
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import AbstractUser
+from .utils.content_store import compress, decompress, digest
 
 # ✅ Custom User Model
 class User(AbstractUser):
     email = models.EmailField(unique=True)
 
+# ✅ Blog bodies: stored once per distinct text, compressed
+class BlogContentManager(models.Manager):
+    def intern(self, texts):
+        """The BlogContent for each of ``texts``, creating rows for bodies not stored yet.
+
+        Inserts first and reads after: the unique digest index settles
+        concurrent saves of the same body (the loser's row is skipped), and no
+        locking read over missing digests means no gap locks to deadlock on.
+        """
+        digests = [digest(text) for text in texts]
+        bodies = dict(zip(digests, texts))
+        codec = settings.BLOG_CONTENT_CODEC
+        with transaction.atomic():
+            self.bulk_create(
+                [
+                    BlogContent(digest=d, codec=codec, data=compress(text, codec), size=len(text.encode("utf-8")))
+                    for d, text in bodies.items()
+                ],
+                ignore_conflicts=True,  # Stored already, maybe concurrently by someone else: theirs is identical
+            )
+            rows = self.only("id", "digest")
+            found = {content.digest: content for content in rows.filter(digest__in=list(bodies))}
+            unseen = [d for d in bodies if d not in found]
+            if unseen:
+                # Committed by another transaction after our snapshot was taken (MySQL's
+                # REPEATABLE READ); the rows exist, so this locking read locks only them.
+                found.update((content.digest, content) for content in rows.select_for_update().filter(digest__in=unseen))
+        contents = [found[d] for d in digests]
+        for content, text in zip(contents, texts):
+            content.__dict__["text"] = text  # Known already; saves decompressing it again
+        return contents
+
+    def prune(self, ids=None):
+        """Delete the bodies (of ``ids``, or all) that no blog refers to; returns how many went.
+
+        A body a concurrent save just reused fails the delete (foreign key /
+        PROTECT); it is in use again, so it is kept.
+        """
+        orphans = self.filter(blogs__isnull=True)
+        if ids is not None:
+            orphans = orphans.filter(pk__in=ids)
+        try:
+            with transaction.atomic():
+                deleted, _ = orphans.delete()
+        except (IntegrityError, models.ProtectedError):
+            return 0
+        return deleted
+
+class BlogContent(models.Model):
+    digest = models.CharField(max_length=64, unique=True)  # SHA-256 of the UTF-8 text
+    codec = models.CharField(max_length=8)  # See api.utils.content_store.CODECS
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()  # Uncompressed bytes
+
+    objects = BlogContentManager()
+
+    @cached_property
+    def text(self):
+        return decompress(self.codec, self.data)
+
 # ✅ Blog Model (Now Correctly Uses `author` ForeignKey)
 class Blog(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="blogs")  # ✅ Fix: Use "author" instead of "user"
     title = models.CharField(max_length=255)
-    content = models.TextField()
+    content = models.TextField(blank=True)  # Plain body; empty when it lives in `body`
+    body = models.ForeignKey(BlogContent, null=True, blank=True, on_delete=models.PROTECT, related_name="blogs")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Serves the per-user history query (filter by author, newest first) straight from the index
+        indexes = [models.Index(fields=["author", "created_at"])]
+
     def __str__(self):
         return self.title
+
+    @property
+    def text(self):
+        """The blog's body. Compressed bodies load (one query unless select_related) and decompress on first use."""
+        return self.body.text if self.body_id else self.content
+
+    @staticmethod
+    def set_texts(blogs, texts):
+        """Give unsaved ``blogs`` their bodies, stored the way BLOG_CONTENT_STORAGE says."""
+        if settings.BLOG_CONTENT_STORAGE == "text":
+            for blog, text in zip(blogs, texts):
+                blog.content = text
+        else:
+            for blog, content in zip(blogs, BlogContent.objects.intern(texts)):
+                blog.body = content
+
+def blog_deleted(sender, instance, **kwargs):
+    """``post_delete`` receiver: drop the blog's body once no other blog shares it."""
+    if instance.body_id:
+        transaction.on_commit(lambda: BlogContent.objects.prune([instance.body_id]))
+
+# ✅ Asynchronous Generation Job (submit → poll → fetch / cancel)
+class GenerationJob(models.Model):
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    STATUS_CANCELLED = "cancelled"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+        (STATUS_CANCELLED, "Cancelled"),
+    ]
+    FINISHED_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED, STATUS_CANCELLED)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="generation_jobs")
+    title = models.CharField(max_length=255)
+    audience = models.CharField(max_length=100)
+    word_count = models.PositiveIntegerField()
+    params = models.JSONField(default=dict, blank=True)  # Per-request sampling overrides
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    cancel_requested = models.BooleanField(default=False)
+    progress_tokens = models.PositiveIntegerField(default=0)
+    max_tokens = models.PositiveIntegerField(default=0)
+    quota_tokens = models.FloatField(default=0)  # Reserved from the author's quota at submit; the unused part goes back at the end
+    partial_text = models.TextField(blank=True)
+    result = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Doubles as the running job's heartbeat
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"{self.title} ({self.status})"
+
+# ✅ Full-text search: per-author inverted index over Blog title + content
+class SearchDocument(models.Model):
+    blog = models.OneToOneField(Blog, on_delete=models.CASCADE, primary_key=True, related_name="search_document")
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    length = models.PositiveIntegerField()  # Indexed token count, for BM25 length normalisation
+
+    class Meta:
+        indexes = [models.Index(fields=["author", "length"])]
+
+class SearchPosting(models.Model):
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    term = models.CharField(max_length=64)
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name="postings")
+    term_frequency = models.PositiveIntegerField()
+    doc_length = models.PositiveIntegerField()  # Copied from the document so scoring needs no join
+
+    class Meta:
+        indexes = [models.Index(fields=["author", "term"])]
+        constraints = [models.UniqueConstraint(fields=["document", "term"], name="unique_search_posting")]
+
+# ✅ Generation quota buckets (used by the database quota store)
+class QuotaBucket(models.Model):
+    key = models.CharField(max_length=64, primary_key=True)
+    tokens = models.FloatField()  # Generated-token budget left at `updated_at`
+    updated_at = models.FloatField()  # Unix time of the last refill
@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+class BlogHistoryPagination(CursorPagination):
+    # Newest first; the cursor encodes a created_at position, so deep pages
+    # cost the same as the first one (no OFFSET scan).
+    ordering = "-created_at"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
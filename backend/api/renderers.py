@@ -0,0 +1,33 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+from .utils.streaming import sse_event
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets ``Accept: text/event-stream`` clients through content negotiation.
+
+    Successful streams bypass renderers entirely (they are StreamingHttpResponse);
+    this only renders error responses raised before the stream starts.
+    """
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event("error", data).encode(self.charset)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Lets ``Accept: application/x-ndjson`` clients reach the bulk export.
+
+    The export itself is a StreamingHttpResponse; this renders error
+    responses (and the import's result) as a single JSON line.
+    """
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return (json.dumps(data) + "\n").encode(self.charset)
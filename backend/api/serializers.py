@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Blog, User
+from django.conf import settings
+from .models import Blog, GenerationJob, User
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -7,6 +8,52 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email']
 
 class BlogSerializer(serializers.ModelSerializer):
+    content = serializers.CharField(source="text", read_only=True)  # Decompressed here, i.e. only for full blogs
+
     class Meta:
         model = Blog
         fields = ['id', 'title', 'content', 'created_at']
+
+class GenerationOptionsSerializer(serializers.Serializer):
+    # Optional knobs shared by the generate endpoints (title/audience/word_count are checked in the view).
+    n = serializers.IntegerField(min_value=1, max_value=settings.GENERATION_MAX_CANDIDATES, default=1)
+    variant = serializers.IntegerField(min_value=0, default=0)
+    temperature = serializers.FloatField(min_value=0, required=False)
+    stop = serializers.ListField(
+        child=serializers.CharField(max_length=32, trim_whitespace=False), max_length=4, required=False
+    )
+    fresh = serializers.BooleanField(default=False)
+    coalesce = serializers.BooleanField(default=False)
+
+    def sampling_params(self):
+        return {k: self.validated_data[k] for k in ("temperature", "stop") if k in self.validated_data}
+
+class GenerationJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = GenerationJob
+        fields = [
+            'id', 'status', 'title', 'audience', 'word_count', 'params', 'progress',
+            'partial_text', 'result', 'error', 'created_at', 'started_at', 'finished_at',
+        ]
+
+    def get_progress(self, job):
+        percent = None
+        if job.max_tokens:
+            percent = 100.0 if job.status == GenerationJob.STATUS_SUCCEEDED else round(100 * job.progress_tokens / job.max_tokens, 1)
+        return {"tokens": job.progress_tokens, "max_tokens": job.max_tokens, "percent": percent}
+
+class BlogListSerializer(serializers.ModelSerializer):
+    # History rows carry no content; `excerpt` is only present when the view annotates it.
+    excerpt = serializers.CharField(read_only=True, required=False)
+
+    class Meta:
+        model = Blog
+        fields = ['id', 'title', 'created_at', 'excerpt']
+
+    def to_representation(self, blog):
+        data = super().to_representation(blog)
+        if not hasattr(blog, "excerpt"):
+            data.pop("excerpt", None)
+        return data
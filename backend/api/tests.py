@@ -1,3 +1,691 @@
-from django.test import TestCase
+import json
+import math
+import threading
+import time
+from importlib import import_module
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.test import SimpleTestCase, override_settings
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import auth_cache, token_blacklisted
+from .exceptions import InferenceQueueFull, ModelUnavailable
+from .models import Blog, BlogContent, GenerationJob, SearchDocument, SearchPosting, User
+from .utils import inference_queue, jobs, quotas, replica_pool
+from .utils.metrics import MODEL_TOKENS
+from .utils.backends import FakeBackend
+from .utils.inference_queue import InferenceScheduler
+from .utils.generation import cache_key_for
+from .utils.jobs import JobRunner
+from .utils.longform import token_budget
+from .utils.replica_pool import ReplicaPool
+from .utils.search_index import BM25_B, BM25_K1, TITLE_WEIGHT, index_blog
+from .utils.similarity_index import SimilarityIndex
+from .utils.singleflight import SingleFlight
+from .utils.stopping import StopCriteria, stream_with_stops
+from .utils.streaming import TokenChannel
+
+
+def fake_model():
+    return FakeBackend(tokens_per_second=10000)
+
+
+def missing_model():
+    raise FileNotFoundError("models/missing.gguf")
+
+
+class SchedulerTestCase(APITransactionTestCase):
+    """Swaps in a one-worker scheduler over ``model_factory`` and logs in a user.
+
+    Transactional, so the inference worker's own connection sees the test's rows.
+    """
+
+    model_factory = staticmethod(fake_model)
+
+    def setUp(self):
+        self.scheduler = InferenceScheduler(self.model_factory, workers=1, max_queue=8)
+        original, inference_queue._scheduler = inference_queue._scheduler, self.scheduler
+        self.addCleanup(setattr, inference_queue, "_scheduler", original)
+        self.user = User.objects.create_user(username="writer", email="writer@example.com", password="pass-123")
+        self.client.force_authenticate(self.user)
+
+
+@override_settings(API_ASYNC_VIEWS=False)
+class ModelLoadFailureTests(SchedulerTestCase):
+    model_factory = staticmethod(missing_model)
+
+    def test_generate_returns_503(self):
+        response = self.client.post(
+            "/api/generate-blog/", {"title": "Focus", "audience": "Students", "word_count": 50, "fresh": True},
+            format="json", HTTP_X_GENERATION_TIMEOUT="5",
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("could not be loaded", response.data["detail"])
+
+    def test_stream_ends_with_error_frame(self):
+        response = self.client.post(
+            "/api/generate-blog/stream/", {"title": "Focus", "audience": "Students", "word_count": 50, "fresh": True},
+            format="json", HTTP_X_GENERATION_TIMEOUT="5",
+        )
+        body = b"".join(response.streaming_content).decode()
+        self.assertIn("event: error", body)
+        self.assertIn("event: done", body)
+
+    def test_job_fails(self):
+        job = GenerationJob.objects.create(author=self.user, title="Focus", audience="Students", word_count=50)
+        JobRunner(self.scheduler)._dispatch()
+        for _ in range(50):
+            job.refresh_from_db()
+            if job.status in GenerationJob.FINISHED_STATUSES:
+                break
+            time.sleep(0.1)
+        self.assertEqual(job.status, GenerationJob.STATUS_FAILED)
+        self.assertIn("could not be loaded", job.error)
+
+
+class ReplicaLoadFailureTests(SimpleTestCase):
+    @mock.patch.object(replica_pool, "LOAD_RETRY_DELAY", 0.1)
+    @mock.patch.object(replica_pool, "MAX_LOAD_FAILURES", 2)
+    def test_failed_loads_fail_requests_then_give_up(self):
+        pool = ReplicaPool("unused.gguf", {"threads": 1}, replicas=1, pin_cores=False, backend="no-such-backend")
+        self.addCleanup(pool.shutdown)
+        channel = pool.generate("Hello")  # Queued while the replica loads
+        with self.assertRaises(ModelUnavailable) as raised:
+            channel.text()
+        self.assertIn("Unknown model backend", str(raised.exception.detail))
+        replica = pool._replicas[0]
+        self.assertEqual(replica.load_failures, 1)
+
+        for _ in range(300):  # Respawned after the delay, fails again, and is left down
+            if replica.load_failures == 2:
+                break
+            time.sleep(0.1)
+        self.assertEqual(replica.restart_at, float("inf"))
+        self.assertFalse(pool.wait_ready())
+        with self.assertRaises(ModelUnavailable):
+            pool.generate("Hello")
+
+
+class ReadinessTests(SchedulerTestCase):
+    def test_anyone_can_probe(self):
+        self.client.force_authenticate(None)
+        self.assertIn(self.client.get("/api/ready/").status_code, (200, 503))
+
+    def test_warm_up_needs_admin(self):
+        self.assertEqual(self.client.post("/api/ready/").status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.post("/api/ready/").status_code, 401)
+        self.assertFalse(self.scheduler._threads)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+        self.assertIn(self.client.post("/api/ready/").status_code, (200, 202))
+        self.assertTrue(self.scheduler._threads)
+
+
+class ConcurrentSaveTests(APITransactionTestCase):
+    def test_same_body_saved_concurrently(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("Shared-cache in-memory SQLite fails concurrent writers instead of waiting")
+        users = [
+            User.objects.create_user(username=f"saver-{i}", email=f"saver-{i}@example.com", password="pass-123")
+            for i in range(4)
+        ]
+        barrier = threading.Barrier(len(users))
+        statuses = []
+
+        def save(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                for _ in range(2):
+                    response = client.post("/api/save-blog/", {"title": "Focus", "content": "Same body."}, format="json")
+                    statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=save, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses, [201] * 8)
+        self.assertEqual(BlogContent.objects.count(), 1)
+        self.assertEqual(set(Blog.objects.values_list("body_id", flat=True)), {BlogContent.objects.get().pk})
+
+
+class BlogContentTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", email="writer@example.com", password="pass-123")
+
+    def save(self, content, title="Focus"):
+        blog = Blog(author=self.user, title=title)
+        Blog.set_texts([blog], [content])
+        blog.save()
+        return blog
+
+    def test_identical_bodies_share_one_compressed_row(self):
+        text = "Plan the week ahead, one block at a time. " * 40
+        first, second = self.save(text), self.save(text, title="Focus again")
+        self.save("Sleep well.")
+        self.assertEqual(first.body_id, second.body_id)
+        self.assertEqual(BlogContent.objects.count(), 2)
+        content = BlogContent.objects.get(pk=first.body_id)
+        self.assertEqual(content.size, len(text))
+        self.assertLess(len(content.data), len(text) // 10)
+        self.assertEqual(Blog.objects.get(pk=second.pk).text, text)
+        self.assertEqual(first.content, "")
+
+    @override_settings(BLOG_CONTENT_STORAGE="text")
+    def test_text_storage_keeps_the_plain_column(self):
+        blog = Blog.objects.get(pk=self.save("Sleep well.").pk)
+        self.assertIsNone(blog.body_id)
+        self.assertEqual(blog.text, "Sleep well.")
+        self.assertFalse(BlogContent.objects.exists())
+
+    def test_body_goes_with_its_last_blog(self):
+        first, second = self.save("Same body."), self.save("Same body.")
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(BlogContent.objects.filter(pk=second.body_id).exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()  # Cascades to the remaining blog
+        self.assertFalse(BlogContent.objects.exists())
+
+    def test_prune_keeps_bodies_in_use(self):
+        kept = self.save("Kept.")
+        Blog.objects.bulk_create([Blog(author=self.user, title="Old", body=BlogContent.objects.intern(["Old."])[0])])
+        with mock.patch.object(transaction, "on_commit"):  # As if the blog went before the receiver existed
+            Blog.objects.filter(title="Old").delete()
+
+        out = StringIO()
+        call_command("blog_storage_report", stdout=out)
+        self.assertIn("1 bodies are orphaned", out.getvalue())
+        call_command("blog_storage_report", "--prune", stdout=out)
+        self.assertIn("Deleted 1 orphaned bodies", out.getvalue())
+        self.assertEqual(list(BlogContent.objects.values_list("pk", flat=True)), [kept.body_id])
+
+    def test_migration_respects_text_storage(self):
+        compress_bodies = import_module("api.migrations.0008_compress_blog_content").compress_bodies
+        with override_settings(BLOG_CONTENT_STORAGE="text"):
+            blog = self.save("Plain body.")
+            compress_bodies(django_apps, None)
+        blog.refresh_from_db()
+        self.assertEqual((blog.body_id, blog.content), (None, "Plain body."))
+
+        compress_bodies(django_apps, None)
+        blog.refresh_from_db()
+        self.assertEqual(blog.content, "")
+        self.assertEqual(blog.text, "Plain body.")
+
+
+@override_settings(QUOTA_TOKENS_PER_MINUTE=int(token_budget(50) * 1.5))
+class JobQuotaTests(SchedulerTestCase):
+    def setUp(self):
+        super().setUp()
+        original, quotas._store = quotas._store, quotas.MemoryQuotaStore()
+        self.addCleanup(setattr, quotas, "_store", original)
+        self.runner = JobRunner(self.scheduler)
+        self.runner.start = lambda: None  # The test dispatches by hand
+        original, jobs._runner = jobs._runner, self.runner
+        self.addCleanup(setattr, jobs, "_runner", original)
+
+    def remaining(self):
+        return quotas._store._buckets[f"user:{self.user.pk}"][0]
+
+    def submit(self, **data):
+        return self.client.post("/api/jobs/", {"title": "Focus", "audience": "Students", "word_count": 50, **data}, format="json")
+
+    def test_jobs_are_charged_and_refunded(self):
+        response = self.submit()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.submit().status_code, 429)
+        reserved = self.remaining()
+
+        tenants = []
+        submit = self.scheduler.submit
+        self.scheduler.submit = lambda *args, **kwargs: tenants.append(kwargs["tenant"]) or submit(*args, **kwargs)
+        self.runner._dispatch()
+        self.assertEqual([tenant.key for tenant in tenants], [self.user.pk])
+
+        for _ in range(50):
+            job = GenerationJob.objects.get(pk=response.data["id"])
+            if job.status in GenerationJob.FINISHED_STATUSES:
+                break
+            time.sleep(0.1)
+        self.assertEqual(job.status, GenerationJob.STATUS_SUCCEEDED)
+        self.assertGreater(self.remaining(), reserved)  # Unused budget went back
+
+    def test_cancelling_a_queued_job_refunds_it(self):
+        before = quotas.quota_limit(self.user)
+        response = self.submit()
+        self.assertEqual(self.client.delete(f"/api/jobs/{response.data['id']}/").status_code, 200)
+        self.assertAlmostEqual(self.remaining(), before, delta=1)
+
+    def test_n_above_one_is_rejected(self):
+        self.assertEqual(self.submit(n=2).status_code, 400)
+        self.assertFalse(GenerationJob.objects.exists())
+
+
+@override_settings(API_ASYNC_VIEWS=False, QUOTA_TOKENS_PER_MINUTE=int(token_budget(50) * 3))
+class QueueFullQuotaTests(SchedulerTestCase):
+    def setUp(self):
+        super().setUp()
+        original, quotas._store = quotas._store, quotas.MemoryQuotaStore()
+        self.addCleanup(setattr, quotas, "_store", original)
+        self.client.force_authenticate(self.user)
+
+    def test_candidates_queued_before_the_queue_filled_are_cancelled(self):
+        queued = []
+
+        def submit(fn, *args, **kwargs):  # Room for one candidate; held here instead of running
+            if queued:
+                raise InferenceQueueFull(wait=1)
+            queued.append((fn, args))
+
+        self.scheduler.submit = submit
+        response = self.client.post(
+            "/api/generate-blog/", {"title": "Focus", "audience": "Students", "word_count": 50, "n": 2, "fresh": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(quotas._store._buckets[f"user:{self.user.pk}"][0], quotas.quota_limit(self.user))
+
+        fn, args = queued[0]
+        fn(fake_model(), *args)  # The worker reaches it later
+        channel = args[1]
+        self.assertEqual(channel.info["cancel_reason"], "queue_full")
+        self.assertEqual(channel.info["model_tokens"], 0)
+
+
+@override_settings(JOB_POLL_INTERVAL=0.01)
+class JobDispatcherTests(SimpleTestCase):
+    def test_dispatcher_survives_errors(self):
+        runner = JobRunner(scheduler=None)
+        calls = []
+
+        def dispatch():
+            calls.append(None)
+            if len(calls) == 1:
+                raise OperationalError("Lost connection to MySQL server during query")
+            if len(calls) == 3:
+                raise SystemExit  # Ends the dispatcher thread for the test
+
+        runner._dispatch = dispatch
+        with self.assertLogs("api.utils.jobs", "ERROR"):
+            runner.start()
+            runner._thread.join(timeout=5)
+        self.assertEqual(len(calls), 3)
+
+
+class FakeBackendContextTests(SimpleTestCase):
+    def evaluated(self, llm, prompt):
+        """Prompt tokens the call evaluates (FakeBackend sleeps for exactly those)."""
+        with mock.patch("api.utils.backends.time.sleep") as sleep:
+            llm.generate(prompt, max_new_tokens=1)
+        return round(sleep.call_args.args[0] * llm.prompt_tokens_per_second) if sleep.called else 0
+
+    def test_prefix_state_is_restored_only_when_the_context_lacks_it(self):
+        llm = FakeBackend(prompt_tokens_per_second=1000)
+        prefix = "You are a blog writer. Keep it short and clear. "
+        state = llm.save_prefix_state(prefix)
+        instruction = "Write about focus."
+
+        llm.load_prefix_state(state)
+        self.assertEqual(self.evaluated(llm, prefix + instruction), llm.count_tokens(instruction))
+        llm.load_prefix_state(state)  # The context starts with the prefix already: kept as is
+        self.assertEqual(llm._context, prefix + instruction)
+
+        self.assertEqual(self.evaluated(llm, "Other text."), llm.count_tokens("Other text."))
+        llm.load_prefix_state(state)
+        self.assertEqual(llm._context, prefix)
+        self.assertEqual(self.evaluated(llm, prefix + instruction), llm.count_tokens(instruction))
+
+
+class StopCriteriaTests(SimpleTestCase):
+    def feed(self, criteria, chunks):
+        return "".join(stream_with_stops(iter(chunks), criteria))
+
+    def test_stop_sequence_split_across_tokens(self):
+        criteria = StopCriteria(100)
+        self.assertEqual(criteria.feed("Done. [I"), "Done. ")  # "[I" might start "[INST]"
+        self.assertEqual(criteria.feed("NS"), "")
+        self.assertIsNone(criteria.finish_reason)
+        self.assertEqual(criteria.feed("T] Next"), "")
+        self.assertEqual(criteria.finish_reason, "stop_sequence")
+        self.assertEqual(criteria.tokens_saved, 97)
+
+    def test_held_back_text_is_released_when_the_match_fails(self):
+        criteria = StopCriteria(100)
+        self.assertEqual(criteria.feed("Use [I"), "Use ")
+        self.assertEqual(criteria.feed("NTERVAL] often"), "[INTERVAL] often")
+        self.assertEqual(criteria.feed("</"), "")
+        self.assertEqual(criteria.flush(), "</")  # The model ended inside a possible match
+        self.assertEqual(criteria.finish_reason, "end_of_text")
+
+    def test_repeated_ngram(self):
+        loop = "one two three four five six seven eight "
+        criteria = StopCriteria(100)
+        text = self.feed(criteria, [loop] * 5)
+        self.assertEqual(criteria.finish_reason, "repetition")
+        self.assertEqual(text, loop * 3)  # The third time round completes the limit
+        self.assertEqual(criteria.tokens_saved, 97)
+
+    def test_repeated_paragraph(self):
+        paragraph = "Sleep well, eat well and plan your week.\n\n"
+        criteria = StopCriteria(100)
+        self.feed(criteria, ["Intro words go here first.\n\n", paragraph, "Something else entirely now.\n\n",
+                             paragraph, "Never reached."])
+        self.assertEqual(criteria.finish_reason, "repetition")
+        self.assertEqual(criteria.tokens, 4)
+
+    def test_short_paragraphs_may_repeat(self):
+        criteria = StopCriteria(100)
+        self.feed(criteria, ["Tips:\n\n", "Plan ahead.\n\n", "Tips:\n\n"])
+        self.assertEqual(criteria.finish_reason, "end_of_text")
+        self.assertEqual(criteria.tokens_saved, 0)
+
+    def test_word_target_waits_for_a_sentence_end(self):
+        criteria = StopCriteria(100, word_target=3)
+        self.assertEqual(self.feed(criteria, ["One two three four", " five.", " Six."]), "One two three four five.")
+        self.assertEqual(criteria.finish_reason, "word_count")
+
+    def test_running_out_of_tokens(self):
+        criteria = StopCriteria(2)
+        self.feed(criteria, ["One", " two"])
+        self.assertEqual(criteria.finish_reason, "max_tokens")
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_cancelled_run_is_not_joined(self):
+        flight = SingleFlight()
+        first, shared = flight.attach("key", TokenChannel)
+        self.assertEqual(flight.attach("key", TokenChannel), (first, True))
+
+        first.cancel_token.cancel("client_disconnect")  # Its worker has not closed it yet
+        second, shared = flight.attach("key", TokenChannel)
+        self.assertIsNot(second, first)
+        self.assertFalse(shared)
+
+        first.close()  # Closing the old run leaves the new one registered
+        self.assertEqual(flight.attach("key", TokenChannel), (second, True))
+
+
+class GenerationCacheKeyTests(SimpleTestCase):
+    def test_longform_settings_change_the_key(self):
+        key = cache_key_for("Time management", "students", 1500)
+        self.assertEqual(cache_key_for("time  management", "Students", "1500"), key)
+        with override_settings(LONGFORM_SECTION_TOKENS=256):
+            self.assertNotEqual(cache_key_for("Time management", "students", 1500), key)
+        with override_settings(LONGFORM_SINGLE_SHOT_TOKENS=2048):
+            self.assertNotEqual(cache_key_for("Time management", "students", 1500), key)
+
+
+class SimilarityIndexTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", email="writer@example.com", password="pass-123")
+        self.index = SimilarityIndex()
+
+    def save(self, title, content):
+        blog = Blog(author=self.user, title=title)
+        Blog.set_texts([blog], [content])
+        blog.save()
+        return blog
+
+    def ids(self, title):
+        return [blog_id for blog_id, _ in self.index.similar(self.user, title, min_score=0.1)]
+
+    def test_delete_then_add_rebuilds(self):
+        time_blog = self.save("Time management for students", "Plan the week ahead.")
+        self.save("Sleep habits for students", "Go to bed at the same time.")
+        self.assertIn(time_blog.pk, self.ids("time management"))
+
+        time_blog.delete()
+        pasta = self.save("Cooking pasta at home", "Boil water, add salt.")  # Same count, higher last id
+        self.assertNotIn(time_blog.pk, self.ids("time management"))
+        self.assertEqual(self.ids("cooking pasta")[0], pasta.pk)
+
+    def test_new_blogs_are_added_incrementally(self):
+        self.save("Time management for students", "Plan the week ahead.")
+        self.ids("time management")
+        pasta = self.save("Cooking pasta at home", "Boil water, add salt.")
+        self.assertEqual(self.ids("cooking pasta")[0], pasta.pk)
+        self.assertEqual(self.index.stats()["rows"], 2)
+
+
+@override_settings(API_ASYNC_VIEWS=False)
+class SearchIndexTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", email="writer@example.com", password="pass-123")
+        self.client.force_authenticate(self.user)
+
+    def save(self, title, content):
+        response = self.client.post("/api/save-blog/", {"title": title, "content": content}, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def search(self, q):
+        response = self.client.get("/api/blogs/search/", {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_saved_blogs_are_indexed(self):
+        blog_id = self.save("Cooking pasta at home", "Boil water, add salt, then the pasta.")
+        counts = dict(SearchPosting.objects.filter(document_id=blog_id).values_list("term", "term_frequency"))
+        self.assertEqual(counts["pasta"], 1 + TITLE_WEIGHT)
+        self.assertEqual(counts["salt"], 1)
+        self.assertNotIn("the", counts)
+        self.assertEqual(SearchDocument.objects.get(pk=blog_id).length, sum(counts.values()))
+
+    def test_bm25_ranking(self):
+        title_hit = self.save("Pasta for beginners", "Boil water first.")
+        short = self.save("Weeknight dinners", "Quick pasta dishes.")
+        long = self.save("Italian food", "Pasta " + "and bread and cheese and olives " * 10)
+        self.save("Sleep habits", "Go to bed at the same time.")
+
+        data = self.search("pasta")
+        self.assertEqual(data["count"], 3)
+        self.assertEqual([hit["id"] for hit in data["results"]], [title_hit, short, long])
+        self.assertIn("<mark>pasta</mark>", data["results"][1]["snippet"])
+
+        # Matches the textbook formula computed here from the stored postings
+        n, avgdl = 4, sum(SearchDocument.objects.values_list("length", flat=True)) / 4
+        tf, length = SearchPosting.objects.filter(document_id=short, term="pasta").values_list(
+            "term_frequency", "doc_length").get()
+        idf = math.log(1 + (n - 3 + 0.5) / (3 + 0.5))
+        expected = idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl))
+        self.assertAlmostEqual(data["results"][1]["score"], expected, places=3)
+
+        # A rarer term outweighs a common one
+        rare = self.save("Bread and olives", "Olives on bread, pasta on the side.")
+        self.assertEqual(self.search("pasta olives")["results"][0]["id"], rare)
+
+        page = self.client.get("/api/blogs/search/", {"q": "pasta", "page": 2, "page_size": 2}).data
+        self.assertEqual(page["count"], 4)
+        self.assertEqual(len(page["results"]), 2)
+
+    def test_deleted_blogs_leave_the_index(self):
+        blog_id = self.save("Cooking pasta at home", "Boil water, add salt.")
+        Blog.objects.filter(pk=blog_id).delete()
+        self.assertFalse(SearchPosting.objects.exists())
+        self.assertEqual(self.search("pasta")["count"], 0)
+
+    def test_reindexing_replaces_postings(self):
+        blog_id = self.save("Cooking pasta at home", "Boil water, add salt.")
+        blog = Blog.objects.get(pk=blog_id)
+        blog.title = "Cooking rice at home"
+        blog.save()
+        index_blog(blog)
+        self.assertEqual(self.search("pasta")["count"], 0)
+        self.assertEqual(self.search("rice")["results"][0]["id"], blog_id)
+
+    def test_rebuild_search_index(self):
+        other = User.objects.create_user(username="other", email="other@example.com", password="pass-123")
+        blogs = [Blog(author=self.user, title="Cooking pasta"), Blog(author=other, title="Pasta sauces")]
+        Blog.set_texts(blogs, ["Boil water.", "Tomatoes and basil."])
+        Blog.objects.bulk_create(blogs)  # Bypasses the API, so nothing is indexed yet
+        self.assertEqual(self.search("pasta")["count"], 0)
+
+        call_command("rebuild_search_index", "--username", "writer", stdout=StringIO())
+        self.assertEqual(self.search("pasta")["count"], 1)
+        self.assertFalse(SearchDocument.objects.filter(author=other).exists())
+
+        out = StringIO()
+        call_command("rebuild_search_index", "--batch-size", "1", stdout=out)
+        self.assertIn("Indexed 2 blogs", out.getvalue())
+        self.assertEqual(SearchDocument.objects.count(), 2)
+        self.assertEqual(SearchPosting.objects.filter(term="pasta").count(), 2)
+
+
+@override_settings(API_ASYNC_VIEWS=False)
+class HistoryConditionalTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", email="writer@example.com", password="pass-123")
+        self.client.force_authenticate(self.user)
+
+    def save(self, title):
+        return self.client.post("/api/save-blog/", {"title": title, "content": "Plan the week ahead."}, format="json")
+
+    def test_save_in_the_same_second_is_not_hidden(self):
+        self.save("First")
+        first = self.client.get("/api/blogs/")
+        self.assertEqual(first.status_code, 200)
+        self.save("Second")  # Within the same second as the fetch
+
+        since = http_date(time.time() + 1)  # Any date at or after the fetch
+        response = self.client.get("/api/blogs/", HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 2)
+
+        response = self.client.get("/api/blogs/", HTTP_IF_NONE_MATCH=first["ETag"], HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+
+    def test_unchanged_history_is_304(self):
+        self.save("First")
+        first = self.client.get("/api/blogs/")
+        response = self.client.get("/api/blogs/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+
+class BulkImportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", email="writer@example.com", password="pass-123")
+        self.client.force_authenticate(self.user)
+
+    def import_lines(self, *items):
+        body = "".join(json.dumps(item) + "\n" for item in items)
+        return self.client.post("/api/blogs/bulk/", body, content_type="application/x-ndjson")
+
+    def test_round_trip_keeps_created_at(self):
+        response = self.import_lines(
+            {"title": "Older", "content": "Plan the week.", "created_at": "2024-01-02T03:04:05.123Z"},
+            {"title": "Undated", "content": "Sleep well."},
+        )
+        self.assertEqual(response.status_code, 201)
+        exported = b"".join(self.client.get("/api/blogs/bulk/").streaming_content).decode().splitlines()
+
+        Blog.objects.all().delete()
+        self.assertEqual(self.import_lines(*map(json.loads, exported)).status_code, 201)
+        dates = dict(Blog.objects.values_list("title", "created_at"))
+        self.assertEqual(dates["Older"].isoformat(), "2024-01-02T03:04:05.123000+00:00")
+        self.assertEqual(dates["Undated"], parse_datetime(json.loads(exported[1])["created_at"]))
+
+    def test_rows_saved_meanwhile_are_left_alone(self):
+        """Without ids from bulk_create (MySQL), only the batch's own rows are re-read."""
+        bulk_create = Blog.objects.bulk_create
+
+        def save_another_then_insert(blogs):
+            other = Blog(author=self.user, title="Saved meanwhile")
+            Blog.set_texts([other], ["Written in another tab."])
+            other.save()
+            return bulk_create(blogs)
+
+        with mock.patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False), \
+                mock.patch.object(Blog.objects, "bulk_create", save_another_then_insert):
+            response = self.import_lines(
+                {"title": "Older", "content": "Plan the week.", "created_at": "2024-01-02T03:04:05Z"},
+                {"title": "Oldest", "content": "Sleep well.", "created_at": "2023-01-02T03:04:05Z"},
+            )
+        self.assertEqual(response.status_code, 201)
+        blogs = {blog.title: blog for blog in Blog.objects.select_related("body")}
+        self.assertEqual(blogs["Older"].created_at.year, 2024)
+        self.assertEqual(blogs["Oldest"].created_at.year, 2023)
+        self.assertEqual(blogs["Saved meanwhile"].created_at.year, time.gmtime().tm_year)
+        self.assertEqual(blogs["Oldest"].text, "Sleep well.")
+        self.assertFalse(Blog.objects.filter(content__startswith="bulk-import:").exists())
+
+    def test_bad_created_at_is_rejected(self):
+        response = self.import_lines({"title": "Older", "content": "Plan the week.", "created_at": "last Tuesday"})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Blog.objects.exists())
+
+
+@override_settings(API_ASYNC_VIEWS=False)
+class TokenRevocationTests(APITestCase):
+    def setUp(self):
+        auth_cache().clear()
+        self.user = User.objects.create_user(username="writer", email="writer@example.com", password="pass-123")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+        self.assertEqual(self.client.get("/api/blogs/").status_code, 200)  # The user is cached now
+
+    def import_blog(self):
+        return self.client.post("/api/blogs/bulk/", '{"title": "Focus", "content": "Plan."}\n', content_type="application/x-ndjson")
+
+    def test_deactivated_user_is_refused(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/blogs/").status_code, 401)
+        self.assertEqual(self.import_blog().status_code, 401)
+
+    def test_deactivation_without_signals_is_seen_after_the_ttl(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)  # No post_save
+        auth_cache().clear()  # The TTL ran out
+        self.assertEqual(self.client.get("/api/blogs/").status_code, 401)
+        self.assertEqual(self.client.get("/api/blogs/bulk/").status_code, 401)
+
+    def test_deleted_user_is_refused(self):
+        self.user.delete()
+        self.assertEqual(self.client.get("/api/blogs/").status_code, 401)
+        self.assertEqual(self.import_blog().status_code, 401)
+        auth_cache().clear()  # Another process, which never saw the delete signal
+        self.assertEqual(self.import_blog().status_code, 401)
+
+    def test_blacklisting_drops_the_cached_user(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        token_blacklisted(sender=None, instance=SimpleNamespace(token=SimpleNamespace(user_id=self.user.pk)))
+        self.assertEqual(self.client.get("/api/blogs/").status_code, 401)
+
+
+class MetricsFormatTests(SchedulerTestCase):
+    HISTOGRAM_SUFFIXES = ("_bucket", "_sum", "_count")
+
+    def test_samples_belong_to_their_declared_family(self):
+        MODEL_TOKENS.inc(3)
+        body = self.client.get("/metrics").content.decode()
+        family, kinds, names = None, {}, set()
+        for line in body.splitlines():
+            if line.startswith("# TYPE "):
+                family, kind = line.split()[2:4]
+                kinds[family] = kind
+                continue
+            if line.startswith("#") or not line:
+                continue
+            name, value = line.split("{")[0].split(" ")[0], line.rsplit(" ", 1)[1]
+            float(value)
+            allowed = {family} | ({family + suffix for suffix in self.HISTOGRAM_SUFFIXES} if kinds[family] == "histogram" else set())
+            self.assertIn(name, allowed, line)
+            names.add(name)
+        self.assertEqual(kinds["model_generated_tokens_total"], "counter")
+        self.assertEqual(kinds["inference_jobs_completed_total"], "counter")
+        self.assertIn("model_generated_tokens_total", names)
@@ -1,11 +1,40 @@
+from django.conf import settings
 from django.urls import path
-from api.views import RegisterAPIView, LoginAPIView, BlogGenerateAPIView, SaveBlogAPIView, BlogHistoryAPIView, home
+from api.utils import startup
+from api.views import RegisterAPIView, LoginAPIView, BlogGenerateAPIView, BlogGenerateStreamAPIView, BlogGenerateCancelAPIView, GenerationJobListAPIView, GenerationJobDetailAPIView, InferenceStatusAPIView, ReadinessAPIView, SaveBlogAPIView, BlogHistoryAPIView, BlogBulkAPIView, BlogDetailAPIView, BlogSearchAPIView, BlogSimilarAPIView, home
 
 urlpatterns = [
     path("", home, name="home"),
     path("register/", RegisterAPIView.as_view(), name="register"),
     path("login/", LoginAPIView.as_view(), name="login"),
     path("generate-blog/", BlogGenerateAPIView.as_view(), name="generate-blog"),
+    path("generate-blog/stream/", BlogGenerateStreamAPIView.as_view(), name="generate-blog-stream"),
+    path("generate-blog/<uuid:request_id>/", BlogGenerateCancelAPIView.as_view(), name="generate-blog-cancel"),
+    path("jobs/", GenerationJobListAPIView.as_view(), name="jobs"),
+    path("jobs/<uuid:job_id>/", GenerationJobDetailAPIView.as_view(), name="job-detail"),
+    path("ready/", ReadinessAPIView.as_view(), name="ready"),
+    path("inference/status/", InferenceStatusAPIView.as_view(), name="inference-status"),
     path("save-blog/", SaveBlogAPIView.as_view(), name="save-blog"),  # ✅ FIXED: Added missing endpoint
     path("blogs/", BlogHistoryAPIView.as_view(), name="blogs"),
+    path("blogs/bulk/", BlogBulkAPIView.as_view(), name="blog-bulk"),
+    path("blogs/search/", BlogSearchAPIView.as_view(), name="blog-search"),
+    path("blogs/similar/", BlogSimilarAPIView.as_view(), name="blog-similar"),
+    path("blogs/<int:pk>/", BlogDetailAPIView.as_view(), name="blog-detail"),
 ]
+
+if settings.API_ASYNC_VIEWS:
+    # Under ASGI the hot paths are served by coroutines (see api/async_views.py)
+    from api.async_views import AsyncBlogDetailView, AsyncBlogGenerateStreamView, AsyncBlogGenerateView, AsyncBlogHistoryView
+
+    async_views = {
+        "generate-blog": AsyncBlogGenerateView,
+        "generate-blog-stream": AsyncBlogGenerateStreamView,
+        "blogs": AsyncBlogHistoryView,
+        "blog-detail": AsyncBlogDetailView,
+    }
+    urlpatterns = [
+        path(str(p.pattern), async_views[p.name].as_view(), name=p.name) if p.name in async_views else p
+        for p in urlpatterns
+    ]
+
+startup.mark("urls_loaded")
@@ -0,0 +1,283 @@
+# backend/api/utils/backends.py
+#
+# Inference runtimes behind one interface. Settings pick one by name
+# (MODEL_BACKEND); model_loader builds it and replica processes build it
+# from plain arguments, so nothing here touches Django.
+
+import importlib
+import math
+import os
+import random
+import time
+import zlib
+
+# Per-request sampling params use ctransformers' names; backends translate.
+SAMPLING_PARAMS = ("max_new_tokens", "temperature", "top_k", "top_p", "repetition_penalty", "seed")
+
+
+class InferenceBackend:
+    """A loaded model that completes prompts.
+
+    ``stream`` yields text chunks (about one token each) as they are
+    produced and is what the generation path uses; closing the generator
+    stops the model. ``generate`` returns the whole completion and ``batch``
+    completes several prompts with the same params. Keyword ``params`` are
+    per-request overrides of the ``config`` the backend was loaded with.
+    """
+
+    needs_model_file = True
+    # Runtimes that can snapshot their state after a prompt prefix and resume
+    # from it (see prefix_state) set this and implement the two methods below.
+    supports_prefix_state = False
+    # ...and those whose thread count can change between calls, set_threads.
+    supports_thread_control = False
+
+    def __init__(self, model_path, config, **options):
+        self.model_path = model_path
+        self.config = dict(config)
+
+    def stream(self, prompt, **params):
+        raise NotImplementedError
+
+    def generate(self, prompt, **params):
+        return "".join(self.stream(prompt, **params))
+
+    def batch(self, prompts, **params):
+        return [self.generate(prompt, **params) for prompt in prompts]
+
+    def count_tokens(self, text):
+        """Prompt size in tokens; estimated from words unless the runtime exposes its tokenizer."""
+        return math.ceil(len(text.split()) * 1.4)  # Llama tokenizer on English prose, as in longform
+
+    def sampling(self, params):
+        """Config defaults overlaid with the request's sampling params."""
+        return {k: v for k, v in {**self.config, **params}.items() if k in SAMPLING_PARAMS}
+
+    def save_prefix_state(self, prefix):
+        """Evaluate ``prefix`` from an empty context and return a picklable snapshot of the state."""
+        raise NotImplementedError
+
+    def load_prefix_state(self, state):
+        """Restore a snapshot, so the next call only evaluates what its prompt adds to that prefix."""
+        raise NotImplementedError
+
+    def set_threads(self, threads):
+        """CPU threads for the following calls (``config["threads"]`` is what the model was loaded with)."""
+        raise NotImplementedError
+
+
+class CTransformersBackend(InferenceBackend):
+    """GGUF models through ctransformers (the default).
+
+    Uses ctransformers directly: LangChain's wrapper buffers completions and
+    drops per-call sampling options, and only its ``client`` was ever used.
+    ctransformers has no way to save or restore model state, so there are no
+    prefix snapshots here. Threads and prompt batch size are per-call options.
+    """
+
+    supports_thread_control = True
+
+    def __init__(self, model_path, config, model_type="llama", **options):
+        super().__init__(model_path, config)
+        from ctransformers import AutoModelForCausalLM
+
+        self.llm = AutoModelForCausalLM.from_pretrained(model_path, model_type=model_type, **self.config)
+        self.threads = self.config.get("threads")
+
+    def stream(self, prompt, **params):
+        return self.llm(prompt, stream=True, threads=self.threads, **self.sampling(params))
+
+    def generate(self, prompt, **params):
+        return self.llm(prompt, threads=self.threads, **self.sampling(params))
+
+    def set_threads(self, threads):
+        self.threads = threads
+
+    def count_tokens(self, text):
+        return len(self.llm.tokenize(text))
+
+
+class LlamaCppBackend(InferenceBackend):
+    """GGUF models through llama-cpp-python (optional: ``pip install llama-cpp-python``)."""
+
+    _PARAM_NAMES = {"max_new_tokens": "max_tokens", "repetition_penalty": "repeat_penalty"}
+    supports_prefix_state = True
+    supports_thread_control = True
+
+    def __init__(self, model_path, config, **options):
+        super().__init__(model_path, config)
+        try:
+            from llama_cpp import Llama
+        except ImportError as e:
+            raise ImportError("MODEL_BACKEND=llama_cpp needs the llama-cpp-python package") from e
+
+        self.llm = Llama(
+            model_path=model_path,
+            n_ctx=self.config.get("context_length", 1024),
+            n_threads=self.config.get("threads"),
+            n_batch=self.config.get("batch_size", 512),  # Prompt tokens evaluated per step
+            use_mmap=self.config.get("mmap", True),
+            verbose=False,
+            **options,
+        )
+
+    def stream(self, prompt, **params):
+        for chunk in self.llm(prompt, stream=True, **self._translate(params)):
+            yield chunk["choices"][0]["text"]
+
+    def generate(self, prompt, **params):
+        return self.llm(prompt, **self._translate(params))["choices"][0]["text"]
+
+    def count_tokens(self, text):
+        return len(self.llm.tokenize(text.encode("utf-8")))
+
+    def save_prefix_state(self, prefix):
+        self.llm.reset()
+        self.llm.eval(self.llm.tokenize(prefix.encode("utf-8")))
+        return self.llm.save_state()
+
+    def load_prefix_state(self, state):
+        # Completions keep the longest common token prefix of the context and evaluate the rest,
+        # so a context that starts with the prefix already (the last call's) is left alone:
+        # restoring would only copy the same state back, which takes longer than it saves.
+        n = state.n_tokens
+        if self.llm.n_tokens >= n and (self.llm.input_ids[:n] == state.input_ids[:n]).all():
+            return
+        self.llm.load_state(state)
+
+    def set_threads(self, threads):
+        import llama_cpp
+
+        llama_cpp.llama_set_n_threads(self.llm._ctx.ctx, threads, threads)  # Generation, prompt batches
+
+    def _translate(self, params):
+        return {self._PARAM_NAMES.get(k, k): v for k, v in self.sampling(params).items()}
+
+
+class FakeBackend(InferenceBackend):
+    """Deterministic stand-in that needs no model file.
+
+    Emits ``tokens_per_second`` word tokens after ``first_token_ms``, up to
+    ``max_new_tokens``, so queueing, streaming and throughput can be
+    benchmarked on any machine. With ``prompt_tokens_per_second`` set, each
+    call first spends the time evaluating its prompt would take, less what
+    it shares with the context: like llama_cpp, the context keeps the last
+    prompt, and ``load_prefix_state`` replaces it with a snapshot's prefix
+    unless it starts with that already. Speed does not depend on threads: ``set_threads``
+    is only recorded. The text is sentences and paragraphs drawn
+    from a fixed vocabulary, seeded by the prompt, the request's ``seed``
+    and ``temperature``: the same request always gets the same text.
+    ``batch`` decodes its prompts in lockstep, one token each per step,
+    like a batched runtime would.
+    """
+
+    needs_model_file = False
+    supports_prefix_state = True
+    supports_thread_control = True
+
+    _WORDS = (
+        "the a model system team data users practice time result process simple better every small "
+        "build measure learn write test review plan change improve understand start keep share "
+        "clear useful common important early often quickly carefully together first next each "
+        "work code design problem question idea goal step example pattern habit tool project "
+        "because while when after before so and but with for from into about through"
+    ).split()
+
+    def __init__(self, model_path=None, config=None, tokens_per_second=20.0, first_token_ms=0.0,
+                 prompt_tokens_per_second=0.0, **options):
+        super().__init__(model_path, config or {})
+        self.tokens_per_second = float(tokens_per_second)
+        self.first_token_ms = float(first_token_ms)
+        self.prompt_tokens_per_second = float(prompt_tokens_per_second)
+        self.threads = self.config.get("threads")
+        self._context = ""  # Prompt text the simulated context holds
+
+    def stream(self, prompt, **params):
+        chunks = self._chunks(prompt, params)
+        self._evaluate(prompt)
+        started = time.monotonic()
+        for i, chunk in enumerate(chunks):
+            self._wait_until(started, i)
+            yield chunk
+
+    def generate(self, prompt, **params):
+        chunks = self._chunks(prompt, params)
+        self._evaluate(prompt)
+        self._wait_until(time.monotonic(), len(chunks) - 1)
+        return "".join(chunks)
+
+    def batch(self, prompts, **params):
+        outputs = [self._chunks(prompt, params) for prompt in prompts]
+        for prompt in prompts:
+            self._evaluate(prompt)
+        self._wait_until(time.monotonic(), max((len(chunks) for chunks in outputs), default=0) - 1)
+        return ["".join(chunks) for chunks in outputs]
+
+    def save_prefix_state(self, prefix):
+        self._context = ""
+        self._evaluate(prefix)
+        return {"prefix": prefix}
+
+    def load_prefix_state(self, state):
+        if not self._context.startswith(state["prefix"]):
+            self._context = state["prefix"]
+
+    def set_threads(self, threads):
+        self.threads = threads
+
+    def _evaluate(self, prompt):
+        """Sleep for the prompt's evaluation, skipping what it shares with the start of the context."""
+        shared, self._context = os.path.commonprefix([self._context, prompt]), prompt
+        if self.prompt_tokens_per_second <= 0:
+            return
+        tokens = max(0, self.count_tokens(prompt) - self.count_tokens(shared))
+        time.sleep(tokens / self.prompt_tokens_per_second)
+
+    def _wait_until(self, started, index):
+        """Sleep until token ``index`` is due (schedule-based, so per-token overhead doesn't drift)."""
+        if index < 0:
+            return
+        due = started + self.first_token_ms / 1000
+        if self.tokens_per_second > 0:
+            due += index / self.tokens_per_second
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _chunks(self, prompt, params):
+        sampling = self.sampling(params)
+        seed = zlib.crc32(f"{prompt}\0{sampling.get('seed')}\0{sampling.get('temperature')}".encode("utf-8"))
+        rng = random.Random(seed)
+        chunks, sentence, sentences = [], 0, 0
+        for _ in range(int(sampling.get("max_new_tokens", 512))):
+            word = rng.choice(self._WORDS)
+            if sentence == 0:
+                word = word.capitalize()
+            sentence += 1
+            if sentence >= rng.randint(8, 16):
+                sentence, sentences = 0, sentences + 1
+                chunks.append(word + (".\n\n" if sentences % 4 == 0 else ". "))
+            else:
+                chunks.append(word + " ")
+        return chunks
+
+
+BACKENDS = {
+    "ctransformers": CTransformersBackend,
+    "llama_cpp": LlamaCppBackend,
+    "fake": FakeBackend,
+}
+
+
+def get_backend_class(name):
+    """Look up a backend by registry name, or import one given as ``module.Class``."""
+    if name in BACKENDS:
+        return BACKENDS[name]
+    module, _, attr = name.rpartition(".")
+    if not module:
+        raise ValueError(f"Unknown model backend {name!r}; expected one of {sorted(BACKENDS)} or a dotted path")
+    return getattr(importlib.import_module(module), attr)
+
+
+def create_backend(name, model_path, config, options=None):
+    return get_backend_class(name)(model_path, config, **(options or {}))
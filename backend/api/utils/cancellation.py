@@ -0,0 +1,158 @@
+# backend/api/utils/cancellation.py
+
+import threading
+import time
+import uuid
+from collections import Counter
+
+from .model_loader import model_config
+
+
+class CancelToken:
+    """Checked by the inference worker between tokens.
+
+    Set explicitly with ``cancel(reason)`` or implicitly once ``deadline``
+    (a ``time.monotonic()`` value) passes; the first reason wins.
+    """
+
+    def __init__(self, deadline=None):
+        self.deadline = deadline
+        self.reason = None
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        if self.reason is None and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline")
+        return self.reason is not None
+
+    def cancel(self, reason):
+        with self._lock:
+            if self.reason is None:
+                self.reason = reason
+
+    def extend_deadline(self, deadline):
+        """Keep running until the latest of the readers' deadlines (None means no deadline)."""
+        with self._lock:
+            if self.reason is None and (self.deadline is None or (deadline is not None and deadline > self.deadline)):
+                self.deadline = deadline
+
+
+class CancelScope:
+    """One HTTP request's hold on the generations it reads.
+
+    Holding a channel subscribes to it; releasing the scope unsubscribes, and
+    a channel whose last reader is gone cancels its generation. So a client
+    that disconnects, is cancelled explicitly or runs out of time stops the
+    model, unless another coalesced request is still reading the same output.
+    """
+
+    def __init__(self, owner_id, timeout, request_id=None):
+        self.id = request_id or uuid.uuid4()
+        self.owner_id = owner_id
+        self.deadline = time.monotonic() + timeout
+        self.reason = None
+        self._channels = []
+        self._lock = threading.Lock()
+
+    @property
+    def expired(self):
+        return time.monotonic() >= self.deadline
+
+    def hold(self, tokens):
+        subscribe = getattr(tokens, "subscribe", None)
+        if subscribe is None:
+            return  # Cached text; nothing is running
+        subscribe(self.deadline)
+        with self._lock:
+            self._channels.append(tokens)
+
+    def release(self, reason=None):
+        with self._lock:
+            channels, self._channels = self._channels, []
+            if self.reason is None:
+                self.reason = reason
+        for channel in channels:
+            channel.unsubscribe(reason or "client_disconnect")
+        get_cancel_registry().forget(self)
+
+
+class CancelRegistry:
+    """In-flight requests by id, for ``DELETE /api/generate-blog/<id>/``."""
+
+    def __init__(self):
+        self._scopes = {}
+        self._lock = threading.Lock()
+
+    def open(self, owner_id, timeout, request_id=None):
+        scope = CancelScope(owner_id, timeout, request_id)
+        with self._lock:
+            self._scopes[scope.id] = scope
+        return scope
+
+    def forget(self, scope):
+        with self._lock:
+            if self._scopes.get(scope.id) is scope:
+                del self._scopes[scope.id]
+
+    def cancel(self, request_id, owner_id):
+        """Cancel the caller's own request; returns False if there is no such request."""
+        with self._lock:
+            scope = self._scopes.get(request_id)
+        if scope is None or scope.owner_id != owner_id:
+            return False
+        scope.release("cancelled")
+        return True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._scopes)
+
+
+class CancellationStats:
+    """Counts of cancelled generations and the model CPU time they gave back.
+
+    Reclaimed CPU is estimated as the tokens not generated times the recent
+    seconds-per-token times the model's thread count.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reasons = Counter()
+        self._tokens_saved = 0
+        self._cpu_reclaimed = 0.0
+        self._seconds_per_token = None
+
+    def record_rate(self, tokens, seconds):
+        if tokens:
+            with self._lock:
+                sample = seconds / tokens
+                self._seconds_per_token = sample if self._seconds_per_token is None else (
+                    0.8 * self._seconds_per_token + 0.2 * sample
+                )
+
+    def record_cancel(self, reason, tokens_saved):
+        with self._lock:
+            self._reasons[reason] += 1
+            self._tokens_saved += tokens_saved
+            self._cpu_reclaimed += tokens_saved * (self._seconds_per_token or 0.0) * model_config()["threads"]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cancelled": sum(self._reasons.values()),
+                "by_reason": dict(self._reasons),
+                "tokens_saved": self._tokens_saved,
+                "cpu_seconds_reclaimed": round(self._cpu_reclaimed, 2),
+                "in_flight_requests": len(_registry),
+            }
+
+
+_registry = CancelRegistry()
+_stats = CancellationStats()
+
+def get_cancel_registry():
+    return _registry
+
+def get_cancellation_stats():
+    return _stats
@@ -0,0 +1,37 @@
+# backend/api/utils/conditional.py
+
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def not_modified(request, etag, last_modified=None):
+    """Return a 304 response if the client's validators still match, else None.
+
+    ``last_modified`` is a datetime (or None). HTTP dates have whole-second
+    resolution, so pass it only for resources that cannot change after it
+    (a saved blog); anything that can change twice in a second is validated
+    by ``etag`` alone. If-None-Match takes precedence when a client sends
+    both. Callers compute the validators from a cheap query, so an unchanged
+    resource is answered without loading or serializing anything.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    # Per-user data: browsers/proxies may keep it but must revalidate every time.
+    response["Cache-Control"] = "private, no-cache"
+    response["Vary"] = "Authorization"
+    return response
@@ -0,0 +1,48 @@
+# backend/api/utils/content_store.py
+#
+# Encoding of blog bodies stored in BlogContent rows: one row per distinct
+# body (keyed by digest), compressed with the codec named on the row so the
+# codec setting can change without rewriting old rows. No Django here, so
+# migrations can use it too.
+
+import hashlib
+import zlib
+
+CODECS = ("zlib", "zstd")
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+
+
+def digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("BLOG_CONTENT_CODEC=zstd needs the zstandard package") from e
+    return zstandard
+
+
+def compress(text, codec):
+    data = text.encode("utf-8")
+    if codec == "zlib":
+        return zlib.compress(data, ZLIB_LEVEL)
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    raise ValueError(f"Unknown content codec {codec!r}; expected one of {CODECS}")
+
+
+def decompress(codec, data):
+    data = bytes(data)  # BinaryField values may come back as memoryview
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    if codec == "zstd":
+        return _zstd().ZstdDecompressor().decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown content codec {codec!r}; expected one of {CODECS}")
+
+
+def stored_text(content, codec, data):
+    """A body from a ``values()`` row: the compressed one when the blog has it, else the plain column."""
+    return content if codec is None else decompress(codec, data)
@@ -0,0 +1,299 @@
+# backend/api/utils/generation.py
+
+import time
+
+from django.conf import settings
+
+from ..exceptions import InferenceQueueFull
+from .cancellation import get_cancellation_stats
+from .generation_cache import get_generation_cache, make_cache_key, normalize_request
+from .inference_queue import BACKGROUND, get_scheduler
+from .longform import LENGTH_SLACK, is_long_form, stream_longform, token_budget
+from .metrics import model_job
+from .model_loader import MODEL_CONFIG, stream_llama
+from .singleflight import get_singleflight
+from .stopping import DEFAULT_STOP_SEQUENCES, GenerationOutcome, StopCriteria, stream_with_stops
+from .streaming import StreamStats, TokenChannel, sse_event
+
+
+def build_prompt(title, audience, word_count):
+    return f"Write a {word_count}-word blog for {audience} about {title}."
+
+
+def cache_key_for(title, audience, word_count, variant=0, params=None):
+    return make_cache_key(build_prompt(*normalize_request(title, audience, word_count)), variant, params)
+
+
+def is_deterministic(params):
+    return (params or {}).get("temperature", MODEL_CONFIG["temperature"]) == 0
+
+
+def stream_blog(llm, title, audience, word_count, params=None, outcome=None, cancel=None):
+    """Yield the blog's text chunks, sized to ``word_count``.
+
+    Short blogs are a single call whose ``max_new_tokens`` comes from the
+    word count. Blogs that would not fit in one call go through the
+    outline-then-sections pipeline in ``longform``. Every call runs under
+    StopCriteria, so it ends at the word target, on repetition or on a stop
+    sequence (``params["stop"]`` plus the defaults) or when ``cancel`` (a
+    CancelToken) is set; ``outcome`` collects why.
+    """
+    params = dict(params or {})
+    stop_sequences = tuple(params.pop("stop", ())) + DEFAULT_STOP_SEQUENCES
+    outcome = outcome if outcome is not None else GenerationOutcome()
+    if is_long_form(word_count):
+        return stream_longform(llm, title, audience, word_count, params, stop_sequences, outcome, cancel)
+    prompt = build_prompt(title, audience, word_count)
+    max_new_tokens = min(
+        int(token_budget(word_count) * LENGTH_SLACK), settings.LONGFORM_SINGLE_SHOT_TOKENS
+    )
+    criteria = outcome.add(StopCriteria(max_new_tokens, int(word_count), stop_sequences))
+    return stream_with_stops(
+        stream_llama(llm, prompt, **{**params, "max_new_tokens": max_new_tokens}), criteria, cancel
+    )
+
+
+def finish_info(tokens):
+    """``finish_reason``/``tokens_saved`` of a finished generation; empty for cached text."""
+    return getattr(tokens, "info", None) or {}
+
+
+def _pump_tokens(llm, blog, channel, cache_key, params, submitted_at):
+    with model_job(time.monotonic() - submitted_at) as timings:
+        channel.timings = timings.stages  # Queue/prompt/generate stages, for the request's Server-Timing
+        _generate_into(llm, blog, channel, cache_key, params)
+
+
+def _generate_into(llm, blog, channel, cache_key, params):
+    cancel = channel.cancel_token
+    if cancel.cancelled:
+        # Every reader left or timed out while this waited in the queue
+        saved = token_budget(blog[2])
+        get_cancellation_stats().record_cancel(cancel.reason, saved)
+        channel.close(info={
+            "finish_reason": "cancelled", "cancel_reason": cancel.reason, "tokens_saved": saved, "model_tokens": 0,
+        })
+        return
+
+    chunks = []
+    outcome = GenerationOutcome()
+    started = time.monotonic()
+    try:
+        for chunk in stream_blog(llm, *blog, params, outcome=outcome, cancel=cancel):
+            chunks.append(chunk)
+            channel.put(chunk)
+    except Exception as e:
+        channel.close(e)
+        raise
+    get_cancellation_stats().record_rate(len(chunks), time.monotonic() - started)
+    info = outcome.summary()
+    if info["finish_reason"] == "cancelled":
+        # Partial text is not cached
+        get_cancellation_stats().record_cancel(cancel.reason, info["tokens_saved"])
+        channel.close(info={**info, "cancel_reason": cancel.reason})
+        return
+    # Cache before closing so a request arriving just after the in-flight
+    # entry is dropped finds the result instead of starting a new run.
+    # Cached even if the client went away mid-stream; the work is already paid for.
+    if cache_key:
+        get_generation_cache().set(cache_key, "".join(chunks))
+    channel.close(info=info)
+
+
+def _start(blog, cache_key, params, tenant):
+    channel = TokenChannel()
+    get_scheduler().submit(
+        _pump_tokens, blog, channel, cache_key, params, time.monotonic(), tenant=tenant, cost=token_budget(blog[2]),
+        on_error=channel.close,  # A model that fails to load ends the stream instead of leaving readers waiting
+    )
+    return channel
+
+
+def submit_generation(blog, cache_key=None, params=None, fresh=False, coalesce=False, tenant=BACKGROUND):
+    """Return ``(tokens, info)`` for one generation of ``blog``, a ``(title, audience, word_count)``.
+
+    ``tokens`` iterates the generated text chunk by chunk. ``info`` says where
+    it came from: ``cached`` (the stored text as a single chunk) or
+    ``coalesced`` (attached to an identical generation already running).
+    Deterministic (temperature 0) requests always coalesce; sampled ones only
+    when the caller opts in, since sharing removes the variety they asked for.
+    InferenceQueueFull is raised before anything is sent, so the caller can
+    still answer with a proper 503. ``tenant`` is who the work is queued for
+    (see InferenceScheduler); a coalesced request rides on the leader's turn.
+    """
+    params = params or {}
+    if cache_key and not fresh:
+        text = get_generation_cache().get(cache_key)
+        if text is not None:
+            return [text], {"cached": True, "coalesced": False}
+
+    if cache_key and (coalesce or is_deterministic(params)):
+        channel, shared = get_singleflight().attach(cache_key, lambda: _start(blog, cache_key, params, tenant))
+    else:
+        channel, shared = _start(blog, cache_key, params, tenant), False
+    return channel, {"cached": False, "coalesced": shared}
+
+
+def generate_blog(blog, cache_key=None, params=None, fresh=False, coalesce=False, tenant=BACKGROUND):
+    """Blocking form of ``submit_generation``: returns ``(text, info)``."""
+    tokens, info = submit_generation(blog, cache_key, params, fresh, coalesce, tenant)
+    return "".join(tokens), info
+
+
+def submit_candidates(title, audience, word_count, n=1, variant=0, params=None, fresh=False, coalesce=False,
+                      tenant=BACKGROUND):
+    """Queue ``n`` candidates for one request; returns a list of ``(tokens, info)``.
+
+    Every candidate is enqueued up front, so
+    they run in parallel across the inference workers rather than one after
+    another. Candidate ``i`` uses cache slot ``variant + i``, which keeps the
+    samples distinct. Each candidate is its own model call: on backends with
+    prefix-state support (llama_cpp) it resumes from the template preamble's
+    snapshot (see prefix_state) and only evaluates the rest of the prompt;
+    ctransformers has no snapshots, so there it evaluates the whole prompt.
+    If the queue fills part-way, InferenceQueueFull propagates and the
+    candidates this call queued are cancelled first: nobody will read them,
+    and the caller refunds their quota.
+    """
+    candidates = []
+    try:
+        for i in range(n):
+            candidates.append(submit_generation(
+                (title, audience, word_count), cache_key_for(title, audience, word_count, variant + i, params),
+                params, fresh, coalesce, tenant,
+            ))
+    except InferenceQueueFull:
+        for tokens, info in candidates:
+            if not (info["cached"] or info["coalesced"]):  # Coalesced runs belong to their leader
+                tokens.cancel_token.cancel("queue_full")
+        raise
+    return candidates
+
+
+class _EventFrames:
+    """The SSE frames of ``stream_blog_events``/``astream_blog_events``.
+
+    Both build every frame here and only differ in how they wait for tokens.
+    """
+
+    def __init__(self, stats, meta, scope):
+        self.stats = stats or StreamStats()
+        self.meta = meta or {}
+        self.scope = scope
+        self.tokens_saved = 0
+        self.completed = False
+
+    def start(self):
+        return sse_event("start", self.meta)
+
+    def check_deadline(self):
+        if self.scope is not None and self.scope.expired:
+            raise TimeoutError("Generation deadline exceeded")
+
+    def token(self, index, chunk):
+        self.check_deadline()
+        self.stats.record_token()
+        payload = {"index": index, "text": chunk}
+        if self.stats.tokens == 1:
+            payload["ttft_ms"] = self.stats.ttft_ms
+        return sse_event("token", payload)
+
+    def failed(self, index, error):
+        """``(frame, stop)`` for a candidate that raised; a passed deadline stops the stream."""
+        if isinstance(error, TimeoutError) and self.scope is not None:
+            self.scope.release("deadline")
+            return sse_event("error", {"index": index, "error": str(error)}), True
+        return sse_event("error", {"index": index, "error": f"Model error: {str(error)}"}), False
+
+    def candidate_done(self, index, produced, tokens):
+        info = finish_info(tokens)
+        self.tokens_saved += info.get("tokens_saved", 0)
+        return sse_event("candidate_done", {"index": index, "tokens": produced, **info})
+
+    def done(self):
+        return sse_event("done", {**self.stats.summary(), "tokens_saved": self.tokens_saved})
+
+    def release(self):
+        if self.scope is not None:
+            self.scope.release(None if self.completed else "client_disconnect")
+
+
+def stream_blog_events(candidates, stats=None, meta=None, scope=None):
+    """Yield SSE frames for one or more candidates.
+
+    ``start`` first, then for each candidate in turn its ``token`` frames
+    (tagged with ``index``) and a ``candidate_done`` frame carrying its
+    ``finish_reason`` and ``tokens_saved``, then ``done``.
+    Candidates are generated in parallel and buffered, so later ones usually
+    stream out at once. The first ``token`` frame carries ``ttft_ms``;
+    ``done`` carries the total token count and tokens/sec. Model failures are
+    reported as ``error`` frames because the HTTP status has already been sent.
+    ``scope`` (a CancelScope holding the candidates) is released at the end;
+    if the client disconnects first, the server closes this generator and the
+    release cancels generations nobody else is reading. A scope whose
+    deadline passes ends the stream with an ``error`` frame.
+    """
+    frames = _EventFrames(stats, meta, scope)
+    try:
+        yield frames.start()
+        for index, tokens in enumerate(candidates):
+            produced = 0
+            try:
+                frames.check_deadline()
+                for chunk in tokens:
+                    yield frames.token(index, chunk)
+                    produced += 1
+            except Exception as e:
+                frame, stop = frames.failed(index, e)
+                yield frame
+                if stop:
+                    break
+                continue
+            yield frames.candidate_done(index, produced, tokens)
+        yield frames.done()
+        frames.completed = True
+    finally:
+        frames.release()
+
+
+async def _achunks(tokens):
+    if hasattr(tokens, "__aiter__"):
+        async for chunk in tokens:
+            yield chunk
+    else:
+        for chunk in tokens:  # Cached text
+            yield chunk
+
+
+async def acollect(tokens):
+    """Async ``"".join(tokens)``: waits on the event loop, not in a thread."""
+    return "".join([chunk async for chunk in _achunks(tokens)])
+
+
+async def astream_blog_events(candidates, stats=None, meta=None, scope=None):
+    """Async form of ``stream_blog_events`` for ASGI; same frames, same release rules.
+
+    A disconnecting client cancels the response task, which raises
+    CancelledError in here and releases the scope on the way out.
+    """
+    frames = _EventFrames(stats, meta, scope)
+    try:
+        yield frames.start()
+        for index, tokens in enumerate(candidates):
+            produced = 0
+            try:
+                frames.check_deadline()
+                async for chunk in _achunks(tokens):
+                    yield frames.token(index, chunk)
+                    produced += 1
+            except Exception as e:
+                frame, stop = frames.failed(index, e)
+                yield frame
+                if stop:
+                    break
+                continue
+            yield frames.candidate_done(index, produced, tokens)
+        yield frames.done()
+        frames.completed = True
+    finally:
+        frames.release()
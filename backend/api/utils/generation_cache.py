@@ -0,0 +1,163 @@
+# backend/api/utils/generation_cache.py
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .model_loader import MODEL_CONFIG, model_id
+from .prompts import get_template
+
+# Config keys that change what the model produces (threads only changes speed).
+_OUTPUT_CONFIG_KEYS = ("max_new_tokens", "temperature", "context_length", "top_k", "top_p", "repetition_penalty", "stop")
+# Settings that decide single-shot vs outline + sections and the per-call token budgets.
+_OUTPUT_SETTINGS = ("LONGFORM_SINGLE_SHOT_TOKENS", "LONGFORM_SECTION_TOKENS")
+
+
+def normalize_request(title, audience, word_count):
+    """Canonical form of the generation inputs, so trivial variations share an entry."""
+    try:
+        word_count = int(word_count)
+    except (TypeError, ValueError):
+        word_count = str(word_count).strip()
+    return (" ".join(str(title).split()).casefold(), " ".join(str(audience).split()).casefold(), word_count)
+
+
+def make_cache_key(prompt, variant=0, params=None):
+    """Key on the prompt, its template, the model (backend and file) and every config value that affects output.
+
+    ``params`` are per-request sampling overrides of the model config.
+    ``variant`` separates otherwise-identical requests that are meant to get
+    different samples (e.g. the frontend's candidate slots).
+    """
+    config = {k: v for k, v in {**MODEL_CONFIG, **(params or {})}.items() if k in _OUTPUT_CONFIG_KEYS}
+    config.update((name, getattr(settings, name)) for name in _OUTPUT_SETTINGS)
+    raw = json.dumps(
+        {"prompt": prompt, "template": get_template().key, "model": model_id(), "config": config, "variant": str(variant)},
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """LRU + TTL cache of generated text bounded by entry count and bytes.
+
+    With ``db_path`` set, entries are also written to a SQLite file, which is
+    consulted on memory misses and survives restarts.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=16 * 1024 * 1024, ttl=3600, db_path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (text, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS generation_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry[0]
+                self._remove(key)
+
+            text = self._disk_get(key, now)
+            if text is not None:
+                self._disk_hits += 1
+                self._hits += 1
+                self._store(key, text, now)
+                return text
+
+            self._misses += 1
+            return None
+
+    def set(self, key, text):
+        now = time.time()
+        with self._lock:
+            self._store(key, text, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO generation_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, text, now + self.ttl),
+                )
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else None,
+            }
+
+    def _store(self, key, text, now):
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (text, now + self.ttl, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _disk_get(self, key, now):
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT value, expires_at FROM generation_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            self._db.execute("DELETE FROM generation_cache WHERE key = ?", (key,))
+            self._db.commit()
+            return None
+        return row[0]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_generation_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = GenerationCache(
+                    max_entries=settings.GENERATION_CACHE_MAX_ENTRIES,
+                    max_bytes=settings.GENERATION_CACHE_MAX_BYTES,
+                    ttl=settings.GENERATION_CACHE_TTL,
+                    db_path=settings.GENERATION_CACHE_DB or None,
+                )
+    return _cache
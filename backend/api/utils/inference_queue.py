@@ -0,0 +1,229 @@
+# backend/api/utils/inference_queue.py
+
+import itertools
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from ..exceptions import InferenceQueueFull, ModelUnavailable
+from .metrics import QUEUE_DEPTH, QUEUE_WAIT_SECONDS
+from .model_loader import create_llama_model, load_llama_model
+from .replica_pool import get_replica_pool, replica_pool_ready
+
+
+# Who a job is queued for: ``key`` identifies the user, ``weight`` their share.
+Tenant = namedtuple("Tenant", ["key", "weight"])
+BACKGROUND = Tenant("background", 1)
+
+
+class InferenceScheduler:
+    """Bounded, per-user fair queue in front of the model.
+
+    Only the worker threads ever touch a model instance. Request threads
+    enqueue a callable and wait on the returned Future; once ``max_queue``
+    jobs are waiting (or ``max_per_tenant`` for one user), ``submit`` raises
+    InferenceQueueFull so load beyond capacity is turned away instead of
+    piling up blocked threads.
+
+    Jobs are queued per tenant and dispatched by weighted fair queuing: each
+    job gets a virtual finish time of ``max(now, tenant's last) + cost /
+    weight`` and the smallest goes next. A user who queues many jobs only
+    delays their own; a tenant with weight 4 gets four times the share of
+    one with weight 1 while both have work waiting.
+    """
+
+    def __init__(self, model_factory, workers=1, max_queue=8, ready_check=None, max_per_tenant=None):
+        self.model_factory = model_factory
+        self.ready_check = ready_check
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_per_tenant = max_per_tenant or max_queue
+        self._queues = {}  # tenant key -> deque of queued jobs, oldest first
+        self._depth = 0
+        self._virtual_time = 0.0
+        self._last_finish = {}  # tenant key -> virtual finish time of its newest job
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._busy = 0
+        self._completed = 0
+        self._rejected = 0
+        self._avg_service = None  # EWMA of seconds per job
+        self._avg_wait = None  # EWMA of seconds spent queued
+        self._eager = False
+        self._loaded = 0
+        self._load_error = None
+
+    def submit(self, fn, *args, tenant=BACKGROUND, cost=1, on_error=None, **kwargs):
+        """Queue ``fn(llm, *args, **kwargs)`` for ``tenant`` and return a Future for its result.
+
+        ``cost`` is the job's expected size (e.g. its token budget) in the
+        fair-share accounting. If the worker cannot load its model, ``fn``
+        never runs: the Future gets ModelUnavailable and ``on_error`` (if
+        given) is called with it, so callers that dropped the Future still
+        hear about the failure.
+        """
+        future = Future()
+        with self._cond:
+            queue = self._queues.get(tenant.key)
+            if self._depth >= self.max_queue or (queue is not None and len(queue) >= self.max_per_tenant):
+                self._rejected += 1
+                raise InferenceQueueFull(wait=self._estimate_wait())
+            self._start_workers()
+            QUEUE_DEPTH.observe(self._depth)
+            finish = max(self._virtual_time, self._last_finish.get(tenant.key, 0.0)) + cost / max(tenant.weight, 1e-9)
+            self._last_finish[tenant.key] = finish
+            if queue is None:
+                queue = self._queues[tenant.key] = deque()
+            queue.append((finish, next(self._sequence), future, fn, args, kwargs, on_error, time.monotonic()))
+            self._depth += 1
+            self._cond.notify()
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        return self.submit(fn, *args, **kwargs).result()
+
+    def warm_up(self):
+        """Start the workers and have each load its model now rather than on its first job."""
+        with self._cond:
+            self._eager = True
+            self._start_workers()
+
+    def model_status(self):
+        with self._cond:
+            loaded, error = self._loaded, self._load_error
+        ready = loaded == self.workers and (self.ready_check is None or self.ready_check())
+        return {"ready": ready, "loaded_workers": loaded, "workers": self.workers, "load_error": error}
+
+    def load(self):
+        """Queue depth and the wait a job submitted now should expect."""
+        with self._cond:
+            return {"queue_depth": self._depth, "estimated_wait_s": _round(self._estimate_wait())}
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "busy": self._busy,
+                "queue_depth": self._depth,
+                "max_queue": self.max_queue,
+                "max_per_user": self.max_per_tenant,
+                "queued_by_user": {str(key): len(queue) for key, queue in self._queues.items()},
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_service_s": _round(self._avg_service),
+                "avg_queue_wait_s": _round(self._avg_wait),
+                "estimated_wait_s": _round(self._estimate_wait()),
+            }
+
+    def _estimate_wait(self):
+        # Everything ahead of a new job (queued + running) drains `workers` at a time.
+        if self._avg_service is None:
+            return 0.0 if self._busy < self.workers else 1.0
+        ahead = self._depth + self._busy
+        return ahead * self._avg_service / self.workers
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._worker, name=f"inference-{len(self._threads)}", daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _load_model(self):
+        try:
+            llm = self.model_factory()
+        except Exception as e:
+            with self._cond:
+                self._load_error = f"{type(e).__name__}: {e}"
+            raise ModelUnavailable(detail=f"The model could not be loaded ({self._load_error})") from e
+        with self._cond:
+            self._loaded += 1
+            self._load_error = None
+        return llm
+
+    def _worker(self):
+        llm = None
+        if self._eager:
+            try:
+                llm = self._load_model()
+            except Exception:
+                pass  # Reported via model_status(); retried on the first job
+        while True:
+            with self._cond:
+                while not self._depth:
+                    self._cond.wait()
+                future, fn, args, kwargs, on_error, enqueued_at = self._next_job()
+                self._busy += 1
+
+            started = time.monotonic()
+            QUEUE_WAIT_SECONDS.observe(started - enqueued_at)
+            try:
+                if future.set_running_or_notify_cancel():
+                    if llm is None:
+                        try:
+                            llm = self._load_model()
+                        except ModelUnavailable as e:
+                            if on_error is not None:
+                                on_error(e)
+                            raise
+                    future.set_result(fn(llm, *args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._busy -= 1
+                    self._completed += 1
+                    self._avg_wait = _ewma(self._avg_wait, started - enqueued_at)
+                    self._avg_service = _ewma(self._avg_service, time.monotonic() - started)
+
+    def _next_job(self):
+        """Pop the queued job with the smallest virtual finish time (caller holds the lock)."""
+        key = min(self._queues, key=lambda k: self._queues[k][0][:2])
+        queue = self._queues[key]
+        finish, _, future, fn, args, kwargs, on_error, enqueued_at = queue.popleft()
+        self._depth -= 1
+        self._virtual_time = max(self._virtual_time, finish)
+        if not queue:
+            del self._queues[key]
+            del self._last_finish[key]  # Its newest job just left; next time it starts from "now"
+        return future, fn, args, kwargs, on_error, enqueued_at
+
+
+def _ewma(previous, sample, alpha=0.2):
+    return sample if previous is None else (1 - alpha) * previous + alpha * sample
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                if settings.MODEL_REPLICAS > 1:
+                    # One worker per replica process; the pool routes each
+                    # generation to the least-loaded replica.
+                    workers = settings.MODEL_REPLICAS
+                    factory = lambda: get_replica_pool().proxy()
+                    ready_check = replica_pool_ready
+                else:
+                    workers = settings.INFERENCE_WORKERS
+                    # A model instance is not safe to share between threads, so extra
+                    # workers get their own instance (weights are mmapped and shared).
+                    factory = load_llama_model if workers == 1 else create_llama_model
+                    ready_check = None
+                _scheduler = InferenceScheduler(
+                    factory, workers=workers, max_queue=settings.INFERENCE_QUEUE_SIZE, ready_check=ready_check,
+                    max_per_tenant=settings.INFERENCE_QUEUE_PER_USER,
+                )
+    return _scheduler
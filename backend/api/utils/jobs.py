@@ -0,0 +1,191 @@
+# backend/api/utils/jobs.py
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from ..exceptions import InferenceQueueFull
+from ..models import GenerationJob
+from .generation import stream_blog
+from .inference_queue import BACKGROUND, Tenant, get_scheduler
+from .longform import token_budget
+from .quotas import release_tokens
+from .stopping import GenerationOutcome
+
+logger = logging.getLogger(__name__)
+
+
+class JobRunner:
+    """Feeds queued GenerationJobs from the database to the inference workers.
+
+    The database is the queue: a job is claimed by atomically flipping it from
+    ``queued`` to ``running``, so several server processes can share it and
+    jobs outlive the process that accepted them. Claiming only happens while
+    the inference queue has spare room, so background jobs never push
+    interactive requests into 503s. Running jobs write their partial text
+    back every JOB_FLUSH_INTERVAL seconds; a running job whose heartbeat
+    (``updated_at``) is older than JOB_STALE_AFTER belonged to a process that
+    died and is put back in the queue.
+
+    Jobs are charged to their author like interactive requests: the token
+    budget is reserved from the quota at submit and the unused part goes
+    back when the job ends, and each job is queued under the author's
+    fair-share tenant (at background weight), so jobs are no way around
+    either.
+    """
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self._wake = threading.Event()
+        self._cancelled = set()  # Fast path for cancels issued in this process
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch_loop, name="generation-jobs", daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self.start()
+        self._wake.set()
+
+    def cancel(self, job):
+        """Cancel a job; returns the job as it stands after the request."""
+        if GenerationJob.objects.filter(pk=job.pk, status=GenerationJob.STATUS_QUEUED).update(
+            status=GenerationJob.STATUS_CANCELLED, cancel_requested=True, finished_at=timezone.now(), updated_at=timezone.now()
+        ):
+            release_tokens(job.author, job.quota_tokens)  # Never ran
+            return GenerationJob.objects.get(pk=job.pk)
+        if job.status == GenerationJob.STATUS_RUNNING:
+            GenerationJob.objects.filter(pk=job.pk).update(cancel_requested=True)
+            with self._lock:
+                self._cancelled.add(job.pk)
+        return GenerationJob.objects.get(pk=job.pk)
+
+    def _dispatch_loop(self):
+        while True:
+            self._wake.wait(timeout=settings.JOB_POLL_INTERVAL)
+            self._wake.clear()
+            # Drops a connection the database closed, so a blip doesn't fail every pass after it
+            close_old_connections()
+            try:
+                self._dispatch()
+            except Exception:
+                # A lost connection or lock timeout must not stop dispatching for good; retry next pass
+                logger.exception("Generation job dispatch failed")
+            finally:
+                close_old_connections()
+
+    def _dispatch(self):
+        """Hand queued jobs to the inference queue while it has room."""
+        self._requeue_stale()
+        while self.scheduler.load()["queue_depth"] < self.scheduler.workers:
+            job = self._claim_next()
+            if job is None:
+                break
+            try:
+                self.scheduler.submit(
+                    self._run_job, job.pk,
+                    tenant=Tenant(job.author_id, BACKGROUND.weight), cost=token_budget(job.word_count),
+                    on_error=lambda e, job_id=job.pk: self._load_failed(job_id, e),
+                )
+            except InferenceQueueFull:
+                GenerationJob.objects.filter(pk=job.pk).update(status=GenerationJob.STATUS_QUEUED, started_at=None)
+                break
+
+    def _requeue_stale(self):
+        cutoff = timezone.now() - timedelta(seconds=settings.JOB_STALE_AFTER)
+        GenerationJob.objects.filter(status=GenerationJob.STATUS_RUNNING, updated_at__lt=cutoff).update(
+            status=GenerationJob.STATUS_QUEUED, started_at=None, partial_text="", progress_tokens=0
+        )
+
+    def _claim_next(self):
+        """Claim the oldest queued job; returns it (pk, author, word count) or None."""
+        candidates = GenerationJob.objects.filter(status=GenerationJob.STATUS_QUEUED).order_by("created_at")
+        for job_id in candidates.values_list("pk", flat=True)[:5]:
+            claimed = GenerationJob.objects.filter(pk=job_id, status=GenerationJob.STATUS_QUEUED).update(
+                status=GenerationJob.STATUS_RUNNING, started_at=timezone.now(), updated_at=timezone.now()
+            )
+            if claimed:
+                return GenerationJob.objects.only("pk", "author_id", "word_count").get(pk=job_id)
+        return None
+
+    def _run_job(self, llm, job_id):
+        outcome = GenerationOutcome()
+        try:
+            job = GenerationJob.objects.get(pk=job_id)
+            params = job.params or {}
+            max_tokens = token_budget(job.word_count)
+            GenerationJob.objects.filter(pk=job_id).update(max_tokens=max_tokens, updated_at=timezone.now())
+
+            chunks = []
+            last_flush = time.monotonic()
+            cancelled = False
+            for chunk in stream_blog(llm, job.title, job.audience, job.word_count, params, outcome=outcome):
+                chunks.append(chunk)
+                if job_id in self._cancelled:
+                    cancelled = True
+                    break
+                if time.monotonic() - last_flush >= settings.JOB_FLUSH_INTERVAL:
+                    last_flush = time.monotonic()
+                    # Matches nothing once a cancel was requested from any process.
+                    if not GenerationJob.objects.filter(pk=job_id, cancel_requested=False).update(
+                        partial_text="".join(chunks), progress_tokens=len(chunks), updated_at=timezone.now()
+                    ):
+                        cancelled = True
+                        break
+
+            text = "".join(chunks)
+            used = outcome.summary()["model_tokens"]
+            if cancelled:
+                self._finish(job_id, GenerationJob.STATUS_CANCELLED, used, partial_text=text, progress_tokens=len(chunks))
+            else:
+                self._finish(
+                    job_id, GenerationJob.STATUS_SUCCEEDED, used,
+                    partial_text=text, result=text, progress_tokens=len(chunks),
+                )
+        except Exception as e:
+            self._finish(
+                job_id, GenerationJob.STATUS_FAILED, outcome.summary()["model_tokens"], error=f"Model error: {str(e)}",
+            )
+        finally:
+            with self._lock:
+                self._cancelled.discard(job_id)
+            close_old_connections()
+            self._wake.set()  # A worker just freed up
+
+    def _load_failed(self, job_id, error):
+        """The worker could not load the model, so ``_run_job`` never ran for this job."""
+        try:
+            self._finish(job_id, GenerationJob.STATUS_FAILED, error=str(error.detail))
+        finally:
+            close_old_connections()
+            self._wake.set()
+
+    def _finish(self, job_id, status, used_tokens=0, **fields):
+        """End a running job and give its author back the quota it reserved but did not use."""
+        now = timezone.now()
+        if GenerationJob.objects.filter(pk=job_id, status=GenerationJob.STATUS_RUNNING).update(
+            status=status, finished_at=now, updated_at=now, **fields
+        ):
+            job = GenerationJob.objects.select_related("author").only("author", "quota_tokens").get(pk=job_id)
+            release_tokens(job.author, job.quota_tokens - used_tokens)
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+def get_job_runner():
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = JobRunner(get_scheduler())
+    return _runner
@@ -0,0 +1,134 @@
+# backend/api/utils/longform.py
+
+import math
+import re
+
+from django.conf import settings
+
+from .model_loader import MODEL_CONFIG, stream_llama
+from .prompts import get_template
+from .stopping import DEFAULT_STOP_SEQUENCES, GenerationOutcome, StopCriteria, stream_with_stops
+
+TOKENS_PER_WORD = 1.4  # Llama tokenizer on English prose, with a little headroom
+LENGTH_SLACK = 1.15  # max_new_tokens over the estimate, so the model can finish its sentence
+OUTLINE_TOKENS_PER_SECTION = 24
+SUMMARY_TOKENS = 160  # Rolling summary budget inside each section prompt
+
+_BULLET_RE = re.compile(r"^\s*(?:[-*#•]+|\d+[.)]|section\s+\d+[:.]?)\s*", re.IGNORECASE)
+_SENTENCE_RE = re.compile(r"(.+?[.!?])(?:\s|$)", re.DOTALL)
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text.split()) * TOKENS_PER_WORD)
+
+
+def token_budget(word_count):
+    """Tokens needed for ``word_count`` words of output."""
+    return math.ceil(int(word_count) * TOKENS_PER_WORD)
+
+
+def is_long_form(word_count):
+    return token_budget(word_count) > settings.LONGFORM_SINGLE_SHOT_TOKENS
+
+
+def plan_sections(word_count):
+    """``(sections, words_per_section)`` so each section fits LONGFORM_SECTION_TOKENS."""
+    sections = max(2, math.ceil(token_budget(word_count) / settings.LONGFORM_SECTION_TOKENS))
+    return sections, math.ceil(int(word_count) / sections)
+
+
+def outline_prompt(title, audience, sections):
+    return (
+        f"List {sections} section headings for a blog for {audience} about {title}. "
+        f"Write one heading per line and nothing else."
+    )
+
+
+def parse_outline(text, sections):
+    """Pull ``sections`` headings out of the outline call, padding if it came up short."""
+    headings = []
+    for line in text.splitlines():
+        heading = _BULLET_RE.sub("", line).strip().strip('"*').rstrip(":").strip()
+        if heading and heading.casefold() not in {h.casefold() for h in headings}:
+            headings.append(heading)
+    headings = headings[:sections]
+    while len(headings) < sections:
+        headings.append("Conclusion" if len(headings) == sections - 1 else f"Part {len(headings) + 1}")
+    return headings
+
+
+def section_prompt(title, audience, word_count, headings, index, summary, words):
+    outline = "\n".join(f"{i + 1}. {heading}" for i, heading in enumerate(headings))
+    so_far = f"Covered so far: {summary}\n" if summary else ""
+    return (
+        f"You are writing a {word_count}-word blog for {audience} about {title}.\n"
+        f"Outline:\n{outline}\n{so_far}"
+        f"Write only section {index + 1}, \"{headings[index]}\", in about {words} words. "
+        f"Do not repeat earlier sections or write a heading."
+    )
+
+
+def summarize_section(heading, text):
+    """Extractive one-liner for the rolling summary: the heading and first sentence.
+
+    Costs nothing, unlike asking the model for a summary between sections.
+    """
+    match = _SENTENCE_RE.search(text.strip())
+    sentence = (match.group(1) if match else text.strip())[:300]
+    return f"{heading}: {sentence}"
+
+
+def fit_summary(points, budget=SUMMARY_TOKENS):
+    """Newest points first until the budget is spent, returned oldest first."""
+    kept, used = [], 0
+    for point in reversed(points):
+        cost = estimate_tokens(point)
+        if used + cost > budget:
+            break
+        kept.append(point)
+        used += cost
+    return " ".join(reversed(kept))
+
+
+def stream_longform(llm, title, audience, word_count, params=None,
+                    stop_sequences=DEFAULT_STOP_SEQUENCES, outcome=None, cancel=None):
+    """Yield a long blog as an outline call followed by one call per section.
+
+    Every call stays inside the context window: each section prompt carries
+    the outline plus a rolling summary of what was already written, and its
+    ``max_new_tokens`` is whatever the section needs, capped by what is left
+    of the window. Sections are framed with ``## heading`` lines and stream
+    token by token as they are generated; each section call stops at its
+    share of the word count (see ``stopping``). Once ``cancel`` is set no
+    further section is started.
+    """
+    params = dict(params or {})
+    outcome = outcome if outcome is not None else GenerationOutcome()
+    context = MODEL_CONFIG["context_length"]
+    sections, words = plan_sections(word_count)
+
+    section_tokens = math.ceil(words * TOKENS_PER_WORD * LENGTH_SLACK)
+    outline_tokens = OUTLINE_TOKENS_PER_SECTION * sections + 16
+    criteria = outcome.add(StopCriteria(outline_tokens, stop_sequences=stop_sequences))
+    outline = "".join(stream_with_stops(
+        stream_llama(llm, outline_prompt(title, audience, sections), **{**params, "max_new_tokens": outline_tokens}),
+        criteria, cancel,
+    ))
+    headings = parse_outline(outline, sections)
+
+    points = []
+    for index, heading in enumerate(headings):
+        if cancel is not None and cancel.cancelled:
+            outcome.skip(section_tokens * (sections - index))
+            return
+        prompt = section_prompt(title, audience, word_count, headings, index, fit_summary(points), words)
+        max_new_tokens = min(section_tokens, context - estimate_tokens(get_template().render(prompt)) - 16)
+        criteria = outcome.add(StopCriteria(max_new_tokens, words, stop_sequences))
+        yield f"## {heading}\n\n"
+        chunks = []
+        model_chunks = stream_llama(llm, prompt, **{**params, "max_new_tokens": max_new_tokens})
+        for chunk in stream_with_stops(model_chunks, criteria, cancel):
+            chunks.append(chunk)
+            yield chunk
+        yield "\n\n"
+        points.append(summarize_section(heading, "".join(chunks)))
@@ -0,0 +1,264 @@
+# backend/api/utils/metrics.py
+
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label values."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        self._series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[slot] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for label_values, values in sorted(series.items()):
+            labels = dict(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), values):
+                cumulative += count
+                yield "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield "_sum", labels, values[-1]
+            yield "_count", labels, cumulative
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            yield "_total", dict(zip(self.labels, label_values)), value
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by endpoint", LATENCY_BUCKETS, ("endpoint", "method", "status"),
+)
+REQUEST_QUERIES = Histogram("http_request_db_queries", "DB queries per request", QUERY_BUCKETS, ("endpoint",))
+MODEL_PROMPT_TOKENS = Histogram("model_prompt_tokens", "Prompt tokens per model call (estimated)", TOKEN_BUCKETS)
+MODEL_PROMPT_SECONDS = Histogram("model_prompt_seconds", "Prompt evaluation (time to first token) per model call",
+                                 LATENCY_BUCKETS)
+MODEL_TOKENS_PER_SECOND = Histogram("model_tokens_per_second", "Generation speed per model call", RATE_BUCKETS)
+MODEL_TOKENS = Counter("model_generated_tokens", "Tokens generated by the model")
+QUEUE_DEPTH = Histogram("inference_queue_depth", "Jobs already queued when a job is submitted", DEPTH_BUCKETS)
+QUEUE_WAIT_SECONDS = Histogram("inference_queue_wait_seconds", "Time jobs wait for an inference worker",
+                               LATENCY_BUCKETS)
+
+_METRICS = [
+    REQUEST_SECONDS, REQUEST_QUERIES, MODEL_PROMPT_TOKENS, MODEL_PROMPT_SECONDS, MODEL_TOKENS_PER_SECOND,
+    MODEL_TOKENS, QUEUE_DEPTH, QUEUE_WAIT_SECONDS,
+]
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _family(name, kind):
+    # Text format 0.0.4 names a counter's family after its sample, so HELP/TYPE carry the suffix too
+    return f"{name}_total" if kind == "counter" else name
+
+
+def render(scraped=()):
+    """The registry in Prometheus text format.
+
+    ``scraped`` adds ``(name, kind, help, value)`` samples read from other
+    components' stats at scrape time; counters get the ``_total`` suffix.
+    """
+    lines = []
+    for metric in _METRICS:
+        lines.append(f"# HELP {_family(metric.name, metric.kind)} {metric.help}")
+        lines.append(f"# TYPE {_family(metric.name, metric.kind)} {metric.kind}")
+        for suffix, labels, value in metric.samples():
+            lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    for name, kind, help, value in scraped:
+        lines.append(f"# HELP {_family(name, kind)} {help}")
+        lines.append(f"# TYPE {_family(name, kind)} {kind}")
+        lines.append(f"{_family(name, kind)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ----------------- Per-request stage timings -----------------
+class RequestTimings:
+    """Stage durations for one request, sent back as a ``Server-Timing`` header."""
+
+    def __init__(self):
+        self.stages = {}  # name -> seconds
+        self.queries = 0
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def merge_parallel(self, stages):
+        """Stages of work that ran alongside others (e.g. candidates): keep the longest."""
+        for stage, seconds in stages.items():
+            self.stages[stage] = max(self.stages.get(stage, 0.0), seconds)
+
+    def header(self, total):
+        parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages.items()]
+        if self.queries:
+            parts = [part + f';desc="{self.queries} queries"' if part.startswith("db;") else part for part in parts]
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _request_timings.set(timings)
+
+
+def end_request(token):
+    _request_timings.reset(token)
+
+
+def current_timings():
+    return _request_timings.get()
+
+
+@contextmanager
+def stage(name):
+    """Time a block as stage ``name`` of the current request (no-op outside one)."""
+    timings = _request_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def time_queries(execute, sql, params, many, context):
+    """DB execute wrapper (installed on every connection) feeding the ``db`` stage."""
+    timings = _request_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add("db", time.perf_counter() - started)
+        timings.queries += 1
+
+
+def add_model_stages(channels):
+    """Fold the worker-side stages of ``channels`` (generated in parallel) into the current request."""
+    timings = _request_timings.get()
+    if timings is None:
+        return
+    for channel in channels:
+        stages = getattr(channel, "timings", None)
+        if stages:
+            timings.merge_parallel(stages)
+
+
+# ----------------- Model calls -----------------
+class ModelTimings:
+    """Prompt evaluation and generation time across one job's model calls."""
+
+    def __init__(self, queue_wait):
+        self.stages = {"queue": queue_wait, "prompt": 0.0, "generate": 0.0}
+        self.tokens = 0
+
+
+_model_timings = contextvars.ContextVar("model_timings", default=None)
+
+
+@contextmanager
+def model_job(queue_wait):
+    """Collect the ModelTimings of the model calls made inside the block (on an inference worker)."""
+    timings = ModelTimings(queue_wait)
+    token = _model_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _model_timings.reset(token)
+
+
+def instrument_model_call(chunks, prompt_tokens):
+    """Pass a model call's chunks through, recording prompt time and tokens/sec.
+
+    The first chunk marks the end of prompt evaluation. Closing this
+    generator closes ``chunks``, so stopping early still stops the model.
+    """
+    MODEL_PROMPT_TOKENS.observe(prompt_tokens)
+    started = time.perf_counter()
+    first = None
+    tokens = 0
+    try:
+        for chunk in chunks:
+            if first is None:
+                first = time.perf_counter()
+            tokens += 1
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+        finished = time.perf_counter()
+        prompt_seconds = (first or finished) - started
+        generate_seconds = finished - first if first is not None else 0.0
+        MODEL_PROMPT_SECONDS.observe(prompt_seconds)
+        MODEL_TOKENS.inc(tokens)
+        if tokens > 1 and generate_seconds > 0:
+            MODEL_TOKENS_PER_SECOND.observe((tokens - 1) / generate_seconds)
+        timings = _model_timings.get()
+        if timings is not None:
+            timings.stages["prompt"] += prompt_seconds
+            timings.stages["generate"] += generate_seconds
+            timings.tokens += tokens
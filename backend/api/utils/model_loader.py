@@ -1,29 +1,139 @@
 # backend/api/utils/model_loader.py
 
 import os
-from langchain_community.llms import CTransformers
+import threading
+import time
+from contextlib import contextmanager
 from django.conf import settings
+from . import backends, startup, thread_profile
+from .metrics import instrument_model_call
+from .prefix_state import PrefixStateCache
+from .prompts import get_template
 
 _model_instance = None  # Singleton instance
+_prefix_states = None
+_prefix_states_lock = threading.Lock()
+_profiles = {}  # (profile path, model id) -> profile or None
+_active_calls = 0  # Model calls running in this process, for MODEL_ADAPTIVE_THREADS
+_active_calls_lock = threading.Lock()
+
+MODEL_CONFIG = {
+    "max_new_tokens": 512,
+    "temperature": 0.7,
+    "context_length": 1024,
+    "threads": 6,  # Without a calibrated profile (manage.py calibrate_threads)
+    "mmap": True  # Instances and replica processes share the weight pages
+}
+
+def get_backend_class():
+    return backends.get_backend_class(settings.MODEL_BACKEND)
+
+def model_id():
+    """Identifies what produces the text, for cache keys."""
+    return f"{settings.MODEL_BACKEND}:{settings.MODEL_FILE}"
+
+def get_model_path():
+    """Absolute path of the model file; None for backends that don't load one."""
+    if not get_backend_class().needs_model_file:
+        return None
+    model_path = os.path.abspath(os.path.join(settings.BASE_DIR, "..", "models", settings.MODEL_FILE))
+
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found at {model_path}")
+    return model_path
+
+def get_thread_profile():
+    """This host's calibrated profile for the configured model, or None."""
+    key = (settings.MODEL_PROFILE_PATH, model_id())
+    if key not in _profiles:
+        _profiles[key] = thread_profile.load_profile(*key)
+    return _profiles[key]
+
+def model_config():
+    """MODEL_CONFIG with this host's calibrated threads and prompt batch size, when there are some."""
+    config = dict(MODEL_CONFIG)
+    profile = get_thread_profile()
+    if profile:
+        config.update(threads=profile["threads"], batch_size=profile["batch_size"])
+    return config
+
+def create_llama_model():
+    """Build a fresh model instance (each has its own context/KV cache).
+
+    MODEL_BACKEND picks the runtime. Each backend imports its runtime when
+    it is built rather than at module level: that takes seconds and nothing
+    but model loading needs it, so management commands and URLconf imports
+    stay fast.
+    """
+    model_path = get_model_path()
+
+    started = time.perf_counter()
+    llm = get_backend_class()(model_path, model_config(), **settings.MODEL_BACKEND_OPTIONS)
+    startup.record("model_load_s", time.perf_counter() - started)
+    return llm
 
 def load_llama_model():
     global _model_instance
     if _model_instance is not None:
         return _model_instance
 
-    model_path = os.path.abspath(os.path.join(settings.BASE_DIR, "..", "models", "llama-2-7b-chat.Q4_K_M.gguf"))
+    _model_instance = create_llama_model()
+    return _model_instance
 
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model file not found at {model_path}")
+def get_prefix_states():
+    global _prefix_states
+    if _prefix_states is None:
+        with _prefix_states_lock:
+            if _prefix_states is None:
+                _prefix_states = PrefixStateCache(directory=settings.PREFIX_STATE_DIR or None)
+    return _prefix_states
 
-    _model_instance = CTransformers(
-        model=model_path,
-        model_type="llama",
-        config={
-            "max_new_tokens": 512,
-            "temperature": 0.7,
-            "context_length": 1024,
-            "threads": 6  # Adjust based on your CPU (you can go 4–8)
-        }
-    )
-    return _model_instance
+def prefix_state_key(template):
+    """What a prefix snapshot depends on: model, context size, template version and the model file itself."""
+    parts = [model_id(), f"ctx{MODEL_CONFIG['context_length']}", template.key]
+    model_path = get_model_path()
+    if model_path:
+        stat = os.stat(model_path)
+        parts.append(f"{stat.st_size}-{int(stat.st_mtime)}")
+    return "|".join(parts)
+
+@contextmanager
+def _thread_share(llm):
+    """With MODEL_ADAPTIVE_THREADS, give the call starting now its share of the cores."""
+    global _active_calls
+    if not (settings.MODEL_ADAPTIVE_THREADS and llm.supports_thread_control):
+        yield
+        return
+    with _active_calls_lock:
+        _active_calls += 1
+        running = _active_calls
+    try:
+        # Calls already running keep their count; each call sets its own as it starts
+        default = llm.config.get("threads", MODEL_CONFIG["threads"])
+        llm.set_threads(thread_profile.threads_for(get_thread_profile(), running, default))
+        yield
+    finally:
+        with _active_calls_lock:
+            _active_calls -= 1
+
+def _model_call(llm, template, prompt, params):
+    # Runs when iteration starts, on the thread that runs the call
+    with _thread_share(llm):
+        if template.prefix and settings.PREFIX_STATE_CACHE and llm.supports_prefix_state:
+            llm.load_prefix_state(get_prefix_states().state_for(llm, prefix_state_key(template), template.prefix))
+        yield from llm.stream(prompt, **params)
+
+def stream_llama(llm, prompt, **params):
+    """Yield text chunks as the model emits them.
+
+    ``llm`` is an InferenceBackend (or a replica proxy); ``params`` are
+    per-request sampling overrides of MODEL_CONFIG (``temperature``,
+    ``max_new_tokens``, ...). Every model call passes through here, so this
+    is where the instruction ``prompt`` is framed by PROMPT_TEMPLATE, where
+    backends that can resume from the template prefix's snapshot do so,
+    where adaptive thread counts are applied, and where prompt size, prompt
+    time and tokens/sec are measured.
+    """
+    template = get_template()
+    prompt = template.render(prompt)
+    return instrument_model_call(_model_call(llm, template, prompt, params), llm.count_tokens(prompt))
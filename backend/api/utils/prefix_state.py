@@ -0,0 +1,93 @@
+# backend/api/utils/prefix_state.py
+#
+# Model state snapshots taken right after evaluating a prompt prefix that
+# every call shares (the prompt template's preamble). Restoring one before a
+# call means the runtime only evaluates the rest of the prompt. Snapshots are
+# opaque, picklable backend objects (InferenceBackend.save_prefix_state). No
+# Django here.
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+class PrefixStateCache:
+    """Snapshots by key, kept in memory (LRU) with an optional copy on disk.
+
+    ``key`` must change whenever the snapshot would: model file, context
+    size and template version. With a ``directory``, snapshots are written
+    there as they are built and read back after a restart instead of
+    re-evaluating the prefix.
+    """
+
+    def __init__(self, directory=None, max_entries=4):
+        self.directory = directory or None
+        self.max_entries = max_entries
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_loads = 0
+        self.builds = 0
+        self.build_seconds = 0.0
+
+    def state_for(self, llm, key, prefix):
+        """The snapshot for ``key``, evaluating ``prefix`` on ``llm`` if neither memory nor disk has it."""
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None:
+                self._states.move_to_end(key)
+                self.hits += 1
+                return state
+
+        # Built outside the lock: it takes a prompt evaluation. Two workers may both build at startup.
+        state = self._read(key)
+        if state is not None:
+            self.disk_loads += 1
+        else:
+            started = time.perf_counter()
+            state = llm.save_prefix_state(prefix)
+            self.build_seconds += time.perf_counter() - started
+            self.builds += 1
+            self._write(key, state)
+        with self._lock:
+            self._states[key] = state
+            while len(self._states) > self.max_entries:
+                self._states.popitem(last=False)
+        return state
+
+    def stats(self):
+        return {
+            "entries": len(self._states),
+            "hits": self.hits,
+            "disk_loads": self.disk_loads,
+            "builds": self.builds,
+            "build_seconds": round(self.build_seconds, 3),
+        }
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + ".state")
+
+    def _read(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                stored_key, state = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            return None  # Unreadable (e.g. written by another runtime version): rebuild it
+        return state if stored_key == key else None
+
+    def _write(self, key, state):
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((key, state), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))  # Readers never see half a snapshot
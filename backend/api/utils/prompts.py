@@ -0,0 +1,46 @@
+# backend/api/utils/prompts.py
+#
+# How instructions are framed for the model. PROMPT_TEMPLATE picks one; every
+# model call renders its instruction through it (model_loader.stream_llama).
+# A template's prefix is the same for every call, which is what lets the
+# model state after it be snapshotted once (see prefix_state).
+
+from django.conf import settings
+
+SYSTEM_PROMPT = (
+    "You are a professional blog writer. Write clear, engaging, well-structured articles in plain prose "
+    "for the audience you are given, using short paragraphs and concrete examples. Stay on the topic, "
+    "keep to the requested length, and do not add a preamble, notes or questions at the end: reply "
+    "with the blog text only."
+)
+
+
+class PromptTemplate:
+    """``prefix + instruction + suffix``. Bump ``version`` whenever the text changes."""
+
+    def __init__(self, name, version, prefix="", suffix=""):
+        self.name = name
+        self.version = version
+        self.prefix = prefix
+        self.suffix = suffix
+
+    @property
+    def key(self):
+        return f"{self.name}:v{self.version}"
+
+    def render(self, instruction):
+        return f"{self.prefix}{instruction}{self.suffix}"
+
+
+TEMPLATES = {
+    "plain": PromptTemplate("plain", 1),
+    # LLaMA-2 chat format; the runtime adds the BOS token
+    "llama2_chat": PromptTemplate("llama2_chat", 1, f"[INST] <<SYS>>\n{SYSTEM_PROMPT}\n<</SYS>>\n\n", " [/INST]"),
+}
+
+
+def get_template():
+    try:
+        return TEMPLATES[settings.PROMPT_TEMPLATE]
+    except KeyError:
+        raise ValueError(f"Unknown PROMPT_TEMPLATE {settings.PROMPT_TEMPLATE!r}; expected one of {sorted(TEMPLATES)}")
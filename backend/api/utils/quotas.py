@@ -0,0 +1,155 @@
+# backend/api/utils/quotas.py
+
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from ..exceptions import QuotaExceeded
+from ..models import QuotaBucket
+
+
+def _refill(tokens, updated_at, capacity, rate, now):
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+
+class MemoryQuotaStore:
+    """Token buckets in this process only; for tests and single-process servers."""
+
+    def __init__(self):
+        self._buckets = {}  # key -> [tokens, updated_at]
+        self._lock = threading.Lock()
+
+    def take(self, key, amount, capacity, rate):
+        """Take ``amount`` if available; returns ``(allowed, remaining)``."""
+        now = time.time()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated_at, capacity, rate, now)
+            allowed = tokens >= amount
+            if allowed:
+                tokens -= amount
+            self._buckets[key] = [tokens, now]
+            return allowed, tokens
+
+    def adjust(self, key, delta, capacity, rate):
+        """Give back (``delta`` > 0) or charge extra (< 0) once the real usage is known."""
+        now = time.time()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            self._buckets[key] = [max(-capacity, min(capacity, _refill(tokens, updated_at, capacity, rate, now) + delta)), now]
+
+
+class DatabaseQuotaStore:
+    """Token buckets in the QuotaBucket table, shared by every server process.
+
+    Each update locks the user's row (``select_for_update``) so concurrent
+    workers cannot both spend the same budget.
+    """
+
+    def take(self, key, amount, capacity, rate):
+        now = time.time()
+        with transaction.atomic():
+            bucket, _ = QuotaBucket.objects.select_for_update().get_or_create(
+                key=key, defaults={"tokens": capacity, "updated_at": now}
+            )
+            tokens = _refill(bucket.tokens, bucket.updated_at, capacity, rate, now)
+            allowed = tokens >= amount
+            if allowed:
+                tokens -= amount
+            QuotaBucket.objects.filter(key=key).update(tokens=tokens, updated_at=now)
+        return allowed, tokens
+
+    def adjust(self, key, delta, capacity, rate):
+        now = time.time()
+        with transaction.atomic():
+            bucket, _ = QuotaBucket.objects.select_for_update().get_or_create(
+                key=key, defaults={"tokens": capacity, "updated_at": now}
+            )
+            tokens = _refill(bucket.tokens, bucket.updated_at, capacity, rate, now) + delta
+            QuotaBucket.objects.filter(key=key).update(tokens=max(-capacity, min(capacity, tokens)), updated_at=now)
+
+
+class QuotaReservation:
+    """Generated tokens reserved up front for one request, settled as candidates finish."""
+
+    def __init__(self, store, key, limit, amounts):
+        self.store = store
+        self.key = key
+        self.limit = limit
+        self.amounts = amounts  # Reserved tokens per candidate
+        self.remaining = None
+
+    @property
+    def headers(self):
+        return {"X-RateLimit-Limit": str(self.limit), "X-RateLimit-Remaining": str(max(0, int(self.remaining)))}
+
+    def refund(self):
+        self._adjust(sum(self.amounts))
+
+    def settle(self, candidates):
+        """Refund cached/coalesced candidates now and the unused part of the rest when they end."""
+        for (tokens, info), amount in zip(candidates, self.amounts):
+            if info["cached"] or info["coalesced"] or not hasattr(tokens, "on_close"):
+                self._adjust(amount)
+            else:
+                tokens.on_close(lambda tokens=tokens, amount=amount: self._adjust(
+                    amount - tokens.info.get("model_tokens", 0)
+                ))
+
+    def _adjust(self, delta):
+        if delta:
+            self.store.adjust(self.key, delta, self.limit, self.limit / 60.0)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_quota_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(settings.QUOTA_STORE)()
+    return _store
+
+
+def _bucket_key(user):
+    return f"user:{user.pk}"
+
+
+def quota_limit(user):
+    """Generated tokens per minute for ``user``; 0 means unlimited."""
+    return settings.QUOTA_STAFF_TOKENS_PER_MINUTE if user.is_staff else settings.QUOTA_TOKENS_PER_MINUTE
+
+
+def reserve_tokens(user, amounts):
+    """Reserve ``amounts`` (one per candidate) from the user's per-minute budget.
+
+    Returns a QuotaReservation, or None when the user has no limit. Raises
+    QuotaExceeded (429) with the time until the budget covers the request.
+    """
+    limit = quota_limit(user)
+    if not limit:
+        return None
+    rate = limit / 60.0
+    if sum(amounts) > limit:
+        # A request larger than the whole bucket is let through once the bucket is full
+        amounts = [amount * limit / sum(amounts) for amount in amounts]
+    store = get_quota_store()
+    key = _bucket_key(user)
+    allowed, remaining = store.take(key, sum(amounts), limit, rate)
+    if not allowed:
+        raise QuotaExceeded(wait=(sum(amounts) - remaining) / rate, limit=limit, remaining=remaining)
+    reservation = QuotaReservation(store, key, limit, amounts)
+    reservation.remaining = remaining
+    return reservation
+
+
+def release_tokens(user, amount):
+    """Give back ``amount`` of an earlier reservation that outlived its QuotaReservation (a background job)."""
+    limit = quota_limit(user)
+    if limit and amount > 0:
+        get_quota_store().adjust(_bucket_key(user), amount, limit, limit / 60.0)
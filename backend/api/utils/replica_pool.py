@@ -0,0 +1,323 @@
+# backend/api/utils/replica_pool.py
+
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+
+from .backends import InferenceBackend, create_backend
+from .model_loader import get_model_path, get_thread_profile, model_config
+from .thread_profile import threads_for
+from .streaming import TokenChannel
+
+LOAD_RETRY_DELAY = 2.0  # seconds before respawning a replica whose model failed to load; doubles per failure
+LOAD_RETRY_MAX_DELAY = 60.0
+MAX_LOAD_FAILURES = 5  # in a row; then the replica stays down until the server restarts
+
+
+def _model_unavailable(error):
+    # Imported here: replica processes import this module without setting Django up
+    from ..exceptions import ModelUnavailable
+    return ModelUnavailable(detail=f"The model could not be loaded ({error})")
+
+
+def _replica_main(index, backend, model_path, config, options, cores, requests, responses, cancelled):
+    """Entry point of a replica process: load the model, then serve requests.
+
+    Runs without Django; everything it needs arrives as plain arguments.
+    ``cancelled`` is a shared integer holding the id of a request to abandon.
+    A model that fails to load is reported back and the process exits.
+    """
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    try:
+        llm = create_backend(backend, model_path, config, options)
+    except Exception as e:
+        responses.put((None, "load_error", (index, f"{type(e).__name__}: {e}")))
+        return
+    responses.put((None, "ready", index))
+    while True:
+        message = requests.get()
+        if message is None:
+            return
+        request_id, prompt, params = message
+        try:
+            for chunk in llm.stream(prompt, **params):
+                if cancelled.value == request_id:
+                    break
+                responses.put((request_id, "token", chunk))
+        except Exception as e:
+            responses.put((request_id, "error", f"{type(e).__name__}: {e}"))
+        else:
+            responses.put((request_id, "done", None))
+
+
+class _Replica:
+    def __init__(self, index, cores):
+        self.index = index
+        self.cores = cores
+        self.process = None
+        self.requests = None
+        self.in_flight = set()
+        self.ready = threading.Event()
+        self.cancelled = None
+        self.load_error = None  # Why the last load failed, while the replica is down
+        self.load_failures = 0  # In a row
+        self.restart_at = None  # Down since a failed load: monotonic time of the respawn (inf: given up)
+
+    @property
+    def down(self):
+        return self.restart_at is not None
+
+
+class ReplicaPool:
+    """N model processes, each with its own share of the cores.
+
+    Requests go to the replica with the fewest in-flight generations and
+    their tokens come back over a shared response queue. The model is loaded
+    with ``mmap`` so all replicas map the same GGUF pages instead of each
+    holding a private copy of the weights. A replica that dies fails its
+    in-flight requests and is restarted. One whose model fails to load fails
+    its requests with ModelUnavailable and is respawned with a growing delay,
+    up to MAX_LOAD_FAILURES times in a row; requests skip it meanwhile.
+    """
+
+    def __init__(self, model_path, config, replicas, threads_per_replica=None, pin_cores=True,
+                 backend="ctransformers", options=None):
+        cpu_count = os.cpu_count() or 1
+        self.backend = backend
+        self.model_path = model_path
+        self.options = options or {}
+        self.threads_per_replica = threads_per_replica or max(1, cpu_count // replicas)
+        self.config = {**config, "threads": self.threads_per_replica, "mmap": True}
+        self._ctx = multiprocessing.get_context("spawn")
+        self._responses = self._ctx.Queue()
+        self._channels = {}  # request_id -> (TokenChannel, replica)
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._replicas = []
+        for index in range(replicas):
+            cores = None
+            if pin_cores and (index + 1) * self.threads_per_replica <= cpu_count:
+                cores = set(range(index * self.threads_per_replica, (index + 1) * self.threads_per_replica))
+            replica = _Replica(index, cores)
+            self._start(replica)
+            self._replicas.append(replica)
+        self._receiver = threading.Thread(target=self._receive_loop, name="replica-receiver", daemon=True)
+        self._receiver.start()
+
+    def generate(self, prompt, **params):
+        """Stream ``prompt`` on the least-loaded replica; returns a TokenChannel."""
+        channel = TokenChannel()
+        with self._lock:
+            replicas = [r for r in self._replicas if not r.down]
+            if not replicas:
+                errors = {r.load_error for r in self._replicas} - {None}
+                raise _model_unavailable("; ".join(sorted(errors)))
+            replica = min(replicas, key=lambda r: len(r.in_flight))
+            request_id = next(self._ids)
+            replica.in_flight.add(request_id)
+            self._channels[request_id] = (channel, replica)
+            replica.requests.put((request_id, prompt, params))
+        return channel
+
+    def cancel(self, channel):
+        """Stop the replica generating for ``channel``, e.g. after its reader went away.
+
+        Each replica has a single cancel slot, which covers the request it is
+        running (dispatch keeps that to one in the common case).
+        """
+        with self._lock:
+            for request_id, (candidate, replica) in self._channels.items():
+                if candidate is channel:
+                    replica.cancelled.value = request_id
+                    return True
+        return False
+
+    def wait_ready(self, timeout=None):
+        """Block until every replica has loaded its model; False on timeout or once one gives up."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for replica in self._replicas:
+            while not replica.ready.is_set():
+                remaining = 1.0 if deadline is None else deadline - time.monotonic()
+                if remaining <= 0 or replica.load_failures >= MAX_LOAD_FAILURES:
+                    return False
+                replica.ready.wait(min(remaining, 1.0))
+        return True
+
+    def proxy(self):
+        return ReplicaModel(self)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "replicas": len(self._replicas),
+                "threads_per_replica": self.threads_per_replica,
+                "in_flight": [len(r.in_flight) for r in self._replicas],
+                "load_errors": [r.load_error for r in self._replicas],
+            }
+
+    def shutdown(self):
+        for replica in self._replicas:
+            replica.requests.put(None)
+        for replica in self._replicas:
+            replica.process.join(timeout=10)
+
+    def _start(self, replica):
+        replica.ready.clear()
+        replica.load_error, replica.restart_at = None, None
+        replica.requests = self._ctx.Queue()
+        replica.cancelled = self._ctx.Value("q", -1, lock=False)
+        replica.process = self._ctx.Process(
+            target=_replica_main,
+            args=(
+                replica.index, self.backend, self.model_path, self.config, self.options, replica.cores,
+                replica.requests, self._responses, replica.cancelled,
+            ),
+            name=f"model-replica-{replica.index}",
+            daemon=True,
+        )
+        replica.process.start()
+
+    def _receive_loop(self):
+        last_reap = time.monotonic()
+        while True:
+            if time.monotonic() - last_reap >= 1.0:
+                self._reap_dead_replicas()
+                last_reap = time.monotonic()
+            try:
+                message = self._responses.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            self._handle(*message)
+
+    def _drain(self):
+        while True:
+            try:
+                message = self._responses.get_nowait()
+            except queue.Empty:
+                return
+            self._handle(*message)
+
+    def _handle(self, request_id, kind, payload):
+        if request_id is None:
+            # Load notices: "ready" carries the replica index, "load_error" (index, error)
+            if kind == "ready":
+                replica = self._replicas[payload]
+                replica.load_error, replica.load_failures = None, 0
+                replica.ready.set()
+            else:
+                index, error = payload
+                self._replicas[index].load_error = error
+            return
+        with self._lock:
+            entry = self._channels.get(request_id)
+            if entry is not None and kind != "token":
+                del self._channels[request_id]
+                entry[1].in_flight.discard(request_id)
+        if entry is None:
+            return
+        if kind == "token":
+            entry[0].put(payload)
+        elif kind == "error":
+            entry[0].close(RuntimeError(payload))
+        else:
+            entry[0].close()
+
+    def _reap_dead_replicas(self):
+        self._drain()  # A dead replica's last messages (its load error) are in the queue already
+        failed = []
+        now = time.monotonic()
+        with self._lock:
+            for replica in self._replicas:
+                if replica.down:
+                    if now >= replica.restart_at:
+                        self._start(replica)
+                    continue
+                if replica.process.is_alive():
+                    continue
+                if replica.ready.is_set():
+                    error = RuntimeError("Model replica exited during generation")
+                else:
+                    replica.load_failures += 1
+                    replica.load_error = replica.load_error or f"replica exited with code {replica.process.exitcode}"
+                    error = _model_unavailable(replica.load_error)
+                for request_id in replica.in_flight:
+                    failed.append((self._channels.pop(request_id)[0], error))
+                replica.in_flight.clear()
+                if not replica.load_failures:
+                    self._start(replica)
+                elif replica.load_failures >= MAX_LOAD_FAILURES:
+                    replica.restart_at = float("inf")
+                else:
+                    replica.restart_at = now + min(
+                        LOAD_RETRY_MAX_DELAY, LOAD_RETRY_DELAY * 2 ** (replica.load_failures - 1)
+                    )
+        for channel, error in failed:
+            channel.close(error)
+
+
+class ReplicaModel(InferenceBackend):
+    """Stands in for a model instance on an inference worker.
+
+    Exposes the same backend interface as the in-process model, so the rest
+    of the generation path is unchanged.
+    """
+
+    needs_model_file = False
+
+    def __init__(self, pool):
+        super().__init__(pool.model_path, pool.config)
+        self.pool = pool
+
+    def stream(self, prompt, **params):
+        return self._stream(self.pool.generate(prompt, **params))
+
+    def generate(self, prompt, **params):
+        return self.pool.generate(prompt, **params).text()
+
+    def batch(self, prompts, **params):
+        channels = [self.pool.generate(prompt, **params) for prompt in prompts]  # Spread across replicas
+        return [channel.text() for channel in channels]
+
+    def _stream(self, channel):
+        finished = False
+        try:
+            yield from channel
+            finished = True
+        finally:
+            if not finished:
+                self.pool.cancel(channel)  # Reader stopped early; free the replica
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_replica_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config, profile = model_config(), get_thread_profile()
+                threads = settings.MODEL_THREADS_PER_REPLICA
+                if not threads and profile:
+                    # Replicas always run side by side: use what calibration measured for that many
+                    threads = threads_for(profile, settings.MODEL_REPLICAS, config["threads"])
+                _pool = ReplicaPool(
+                    get_model_path(),
+                    config,
+                    replicas=settings.MODEL_REPLICAS,
+                    threads_per_replica=threads or None,
+                    backend=settings.MODEL_BACKEND,
+                    options=settings.MODEL_BACKEND_OPTIONS,
+                )
+    return _pool
+
+
+def replica_pool_ready():
+    return _pool is not None and _pool.wait_ready(timeout=0)
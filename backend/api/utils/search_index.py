@@ -0,0 +1,118 @@
+# backend/api/utils/search_index.py
+
+import html
+import math
+import re
+from collections import Counter
+
+from django.db.models import Avg, Case, Count, FloatField, Sum, Value, When, Window
+from django.db.models.functions import Cast
+
+from ..models import Blog, SearchDocument, SearchPosting
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 2  # Title terms count this many times towards term frequency
+SNIPPET_RADIUS = 80
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this "
+    "to was were will with you your we our they their i".split()
+)
+
+
+def tokenize(text):
+    return [
+        token[:64]
+        for token in (t.casefold() for t in _TOKEN_RE.findall(text or ""))
+        if len(token) > 1 and token not in _STOPWORDS
+    ]
+
+
+def index_blogs(blogs):
+    """(Re)index blogs in bulk; replaces any existing postings for them."""
+    blogs = list(blogs)
+    if not blogs:
+        return
+    SearchDocument.objects.filter(blog_id__in=[b.pk for b in blogs]).delete()
+    documents, postings = [], []
+    for blog in blogs:
+        counts = Counter(tokenize(blog.text))
+        for term in tokenize(blog.title):
+            counts[term] += TITLE_WEIGHT
+        length = sum(counts.values())
+        documents.append(SearchDocument(blog_id=blog.pk, author_id=blog.author_id, length=length))
+        postings.extend(
+            SearchPosting(
+                document_id=blog.pk, author_id=blog.author_id,
+                term=term, term_frequency=tf, doc_length=length,
+            )
+            for term, tf in counts.items()
+        )
+    SearchDocument.objects.bulk_create(documents, batch_size=500)
+    SearchPosting.objects.bulk_create(postings, batch_size=2000)
+
+
+def index_blog(blog):
+    index_blogs([blog])
+
+
+def search_blogs(author, query, offset=0, limit=20):
+    """BM25-ranked search over one author's blogs.
+
+    Returns ``(total, hits)`` where each hit is ``(blog, score, snippet)``.
+    Scoring runs in the database: one aggregate for the author's corpus stats,
+    one grouped count for the query terms' document frequencies, then a grouped
+    sum over the matching postings, ordered, counted (window) and sliced there,
+    so only the page's ids and scores (and then its blogs) come back.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return 0, []
+
+    corpus = SearchDocument.objects.filter(author=author).aggregate(n=Count("blog_id"), avgdl=Avg("length"))
+    n_docs, avgdl = corpus["n"], corpus["avgdl"] or 1.0
+    if not n_docs:
+        return 0, []
+
+    postings = SearchPosting.objects.filter(author=author, term__in=terms)
+    doc_freq = dict(postings.values("term").annotate(df=Count("pk")).values_list("term", "df").order_by())
+    if not doc_freq:
+        return 0, []
+    idf = {term: math.log(1 + (n_docs - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    # idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_length / avgdl)), summed per document
+    weight = Case(*(When(term=term, then=Value(w * (BM25_K1 + 1))) for term, w in idf.items()),
+                  default=Value(0.0), output_field=FloatField())
+    tf = Cast("term_frequency", FloatField())
+    norm = Value(BM25_K1 * (1 - BM25_B)) + Value(BM25_K1 * BM25_B / avgdl) * Cast("doc_length", FloatField())
+    ranked = (
+        postings.values("document_id")
+        .annotate(score=Sum(weight * tf / (tf + norm), output_field=FloatField()))
+        .annotate(total=Window(Count("*")))  # Matching documents, counted after grouping
+        .order_by("-score", "-document_id")
+    )
+    page = list(ranked.values_list("document_id", "score", "total")[offset:offset + limit])
+    if page:
+        total = page[0][2]
+    else:  # Past the last page: nothing to read the window total from
+        total = postings.values("document_id").distinct().count()
+    blogs = Blog.objects.select_related("body").in_bulk([doc_id for doc_id, _, _ in page])
+    hits = [
+        (blogs[doc_id], round(score, 4), make_snippet(blogs[doc_id].text, terms))
+        for doc_id, score, _ in page
+        if doc_id in blogs
+    ]
+    return total, hits
+
+
+def make_snippet(content, terms):
+    """A window of ``content`` around the first query-term hit, HTML-escaped, hits in <mark>."""
+    pattern = re.compile(r"\b(" + "|".join(re.escape(t) for t in terms) + r")\b", re.IGNORECASE)
+    match = pattern.search(content)
+    start = max(0, match.start() - SNIPPET_RADIUS) if match else 0
+    end = min(len(content), (match.end() if match else 0) + SNIPPET_RADIUS)
+    window = html.escape(content[start:end])
+    window = pattern.sub(lambda m: f"<mark>{m.group(0)}</mark>", window)
+    return ("…" if start > 0 else "") + window + ("…" if end < len(content) else "")
@@ -0,0 +1,177 @@
+# backend/api/utils/similarity_index.py
+
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+
+from ..models import Blog
+from .content_store import stored_text
+from .search_index import tokenize
+
+TITLE_WEIGHT = 3  # Titles are what users type, so they dominate the vector
+
+
+def _features(title, content=""):
+    """Unigrams and bigrams; title features are repeated TITLE_WEIGHT times."""
+    features = []
+    for text, weight in ((title, TITLE_WEIGHT), (content, 1)):
+        tokens = tokenize(text)
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        features.extend(grams * weight)
+    return features
+
+
+def embed(title, content, dimensions):
+    """Signed feature-hashing vector, sublinearly scaled and L2-normalized."""
+    hashes = np.fromiter((zlib.crc32(f.encode()) for f in _features(title, content)), dtype=np.uint32)
+    if not hashes.size:
+        return np.zeros(dimensions, dtype=np.float32)
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+    vector = np.bincount(hashes % dimensions, weights=signs, minlength=dimensions)
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).astype(np.float32)
+
+
+class _UserIndex:
+    """Row-major matrix of unit vectors for one user, grown by doubling."""
+
+    def __init__(self, dimensions):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, dimensions), dtype=np.float32)
+        self.size = 0
+
+    def add(self, blog_id, vector):
+        if self.size == len(self.ids):
+            capacity = max(64, 2 * len(self.ids))
+            self.ids = np.resize(self.ids, capacity)
+            matrix = np.zeros((capacity, self.matrix.shape[1]), dtype=np.float32)
+            matrix[:self.size] = self.matrix[:self.size]
+            self.matrix = matrix
+        self.ids[self.size] = blog_id
+        self.matrix[self.size] = vector
+        self.size += 1
+
+    def copy(self):
+        index = _UserIndex(self.matrix.shape[1])
+        index.ids, index.matrix, index.size = self.ids[:self.size].copy(), self.matrix[:self.size].copy(), self.size
+        return index
+
+    @property
+    def last_id(self):
+        return int(self.ids[self.size - 1]) if self.size else 0
+
+    def top_k(self, vector, k, min_score):
+        if not self.size:
+            return []
+        scores = self.matrix[:self.size] @ vector  # Cosine: rows and query are unit length
+        k = min(k, self.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[i]), float(scores[i])) for i in top if scores[i] >= min_score]
+
+
+class SimilarityIndex:
+    """Per-user in-memory vector index over saved blogs (title + content).
+
+    Vectors are hashed unigram/bigram counts, so no vocabulary has to be
+    fitted and a new blog can be added without touching the others. Each
+    user's matrix is built from the database on first use and kept for the
+    SIMILARITY_MAX_USERS most recently queried users. Before answering, the
+    index compares its row count and highest id with the database (one
+    indexed aggregate): blogs saved by another server process are added
+    incrementally, and an index that lost rows (a delete, even one followed
+    by a save) is rebuilt. Queries and embedding run outside the lock, so a
+    user's cold build never holds up other users' lookups.
+    """
+
+    def __init__(self, dimensions=256, max_users=64):
+        self.dimensions = dimensions
+        self.max_users = max_users
+        self._users = OrderedDict()  # author_id -> _UserIndex
+        self._lock = threading.Lock()
+
+    def add(self, blog):
+        """Add a just-saved blog if its author's index is loaded."""
+        if blog.author_id not in self._users:  # Unlocked peek; rechecked below
+            return
+        vector = embed(blog.title, blog.text, self.dimensions)
+        with self._lock:
+            index = self._users.get(blog.author_id)
+            if index is not None and blog.pk > index.last_id:
+                index.add(blog.pk, vector)
+
+    def similar(self, author, title, k=5, min_score=0.0):
+        """Return ``[(blog_id, score)]`` for ``author``'s blogs closest to ``title``."""
+        vector = embed(title, "", self.dimensions)
+        if not vector.any():
+            return []
+        index = self._sync(author)
+        with self._lock:
+            return index.top_k(vector, k, min_score)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "rows": sum(index.size for index in self._users.values()),
+                "bytes": sum(index.matrix.nbytes for index in self._users.values()),
+            }
+
+    def _sync(self, author):
+        state = Blog.objects.filter(author=author).aggregate(n=Count("id"), last=Max("id"))
+        current = (state["n"], state["last"] or 0)
+        with self._lock:
+            index = self._users.get(author.pk)
+            if index is not None and (index.size, index.last_id) == current:
+                self._users.move_to_end(author.pk)
+                return index
+            # Only newer rows to add, unless some of ours were deleted (checked once they are read)
+            base = index.copy() if index is not None and index.size < current[0] else None
+
+        index = self._build(author, base, current[0])
+        with self._lock:
+            self._users[author.pk] = index
+            self._users.move_to_end(author.pk)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return index
+
+    def _build(self, author, base, count):
+        if base is not None:
+            rows = list(self._embedded_rows(author, base.last_id))
+            if base.size + len(rows) == count:
+                for blog_id, vector in rows:
+                    base.add(blog_id, vector)
+                return base
+        index = _UserIndex(self.dimensions)  # First use, or blogs were deleted
+        for blog_id, vector in self._embedded_rows(author, 0):
+            index.add(blog_id, vector)
+        return index
+
+    def _embedded_rows(self, author, after_id):
+        rows = (
+            Blog.objects.filter(author=author, pk__gt=after_id)
+            .order_by("pk").values_list("pk", "title", "content", "body__codec", "body__data")
+        )
+        for blog_id, title, content, codec, data in rows.iterator(chunk_size=1000):
+            yield blog_id, embed(title, stored_text(content, codec, data), self.dimensions)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_similarity_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SimilarityIndex(
+                    dimensions=settings.SIMILARITY_DIMENSIONS,
+                    max_users=settings.SIMILARITY_MAX_USERS,
+                )
+    return _index
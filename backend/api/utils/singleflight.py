@@ -0,0 +1,49 @@
+# backend/api/utils/singleflight.py
+
+import threading
+
+
+class SingleFlight:
+    """Deduplicates identical in-flight generations.
+
+    The first caller for a key starts the work and gets back its TokenChannel;
+    callers arriving while it is still running attach to the same channel and
+    read the same tokens. The key is dropped as soon as the channel closes, so
+    later requests start fresh (or hit the result cache); so do requests that
+    find the channel already cancelled but not yet closed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> TokenChannel
+        self._started = 0
+        self._shared = 0
+
+    def attach(self, key, start):
+        """Return ``(channel, shared)``; ``start()`` is only called by the leader."""
+        with self._lock:
+            channel = self._inflight.get(key)
+            # A cancelled run is only waiting for its worker to close it; it will produce nothing more
+            if channel is not None and not channel.cancel_token.cancelled:
+                self._shared += 1
+                return channel, True
+            channel = start()
+            self._inflight[key] = channel
+            self._started += 1
+        channel.on_close(lambda: self._forget(key, channel))
+        return channel, False
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._inflight), "started": self._started, "coalesced": self._shared}
+
+    def _forget(self, key, channel):
+        with self._lock:
+            if self._inflight.get(key) is channel:
+                del self._inflight[key]
+
+
+_singleflight = SingleFlight()
+
+def get_singleflight():
+    return _singleflight
@@ -0,0 +1,32 @@
+# backend/api/utils/startup.py
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Imported first thing by the wsgi/asgi modules, so this is (almost) the moment the server starts loading Django.
+_origin = time.perf_counter()
+_phases = {}
+_lock = threading.Lock()
+
+
+def mark(phase):
+    """Record that ``phase`` finished, as seconds since settings were loaded."""
+    elapsed = round(time.perf_counter() - _origin, 3)
+    with _lock:
+        _phases.setdefault(phase, elapsed)
+    logger.info("startup: %s at %.3fs", phase, elapsed)
+
+
+def record(phase, seconds):
+    """Record the duration of a phase that can happen at any time (e.g. model load)."""
+    with _lock:
+        _phases[phase] = round(seconds, 3)
+    logger.info("startup: %s took %.3fs", phase, seconds)
+
+
+def phases():
+    with _lock:
+        return dict(_phases)
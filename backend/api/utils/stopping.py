@@ -0,0 +1,173 @@
+# backend/api/utils/stopping.py
+
+import re
+from collections import Counter, deque
+
+# Llama-2 chat sometimes starts a new turn instead of ending the blog.
+DEFAULT_STOP_SEQUENCES = ("[INST]", "</s>")
+REPETITION_NGRAM = 8  # words
+REPETITION_LIMIT = 3  # an n-gram seen this many times means the model is looping
+MIN_PARAGRAPH_WORDS = 5
+
+# Reasons that cut a call short of max_new_tokens, i.e. saved tokens
+EARLY_STOP_REASONS = ("word_count", "repetition", "stop_sequence", "cancelled")
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class StopCriteria:
+    """Streaming stop checks for one model call.
+
+    ``feed`` takes each chunk from the model and returns the text that may be
+    passed on (text that could be the start of a stop sequence is held back
+    until it is clear either way). Once ``finish_reason`` is set the caller
+    stops pulling from the model:
+
+    - ``word_count``: ``word_target`` words were reached and the text is at a sentence end
+    - ``repetition``: a word n-gram recurred REPETITION_LIMIT times, or a paragraph repeated
+    - ``stop_sequence``: a stop sequence appeared (it is not emitted)
+    - ``cancelled``: the request's CancelToken was set (checked by ``stream_with_stops``)
+    - ``max_tokens`` / ``end_of_text``: the model ran out of budget or ended by itself
+    """
+
+    def __init__(self, max_tokens, word_target=None, stop_sequences=DEFAULT_STOP_SEQUENCES):
+        self.max_tokens = max_tokens
+        self.word_target = word_target
+        self.stop_sequences = tuple(s for s in stop_sequences if s)
+        self.tokens = 0
+        self.words = 0
+        self.finish_reason = None
+        self._pending = ""  # Held back: might be the start of a stop sequence
+        self._partial = ""  # Trailing word not yet ended by whitespace
+        self._last_char = ""
+        self._ngram = deque(maxlen=REPETITION_NGRAM)
+        self._ngram_counts = Counter()
+        self._paragraph = ""
+        self._paragraphs = set()
+
+    @property
+    def tokens_saved(self):
+        return max(0, self.max_tokens - self.tokens) if self.finish_reason in EARLY_STOP_REASONS else 0
+
+    def feed(self, chunk):
+        self.tokens += 1
+        self._pending += chunk
+        for sequence in self.stop_sequences:
+            at = self._pending.find(sequence)
+            if at != -1:
+                text, self._pending = self._pending[:at], ""
+                self._consume(text)
+                self.finish_reason = "stop_sequence"
+                return text
+        hold = self._prefix_overlap(self._pending)
+        text = self._pending[:len(self._pending) - hold]
+        self._pending = self._pending[len(text):]
+        self._consume(text)
+        return text
+
+    def flush(self):
+        """Call when the model stopped on its own; returns any held-back text."""
+        text, self._pending = self._pending, ""
+        if self.finish_reason is None:
+            self.finish_reason = "max_tokens" if self.tokens >= self.max_tokens else "end_of_text"
+        return text
+
+    def _prefix_overlap(self, text):
+        """Length of the longest tail of ``text`` that starts a stop sequence."""
+        longest = 0
+        for sequence in self.stop_sequences:
+            for size in range(min(len(sequence) - 1, len(text)), longest, -1):
+                if sequence.startswith(text[-size:]):
+                    longest = size
+                    break
+        return longest
+
+    def _consume(self, text):
+        if not text:
+            return
+        stripped = text.rstrip()
+        if stripped:
+            self._last_char = stripped[-1]
+
+        buffer = self._partial + text
+        parts = buffer.split()
+        self._partial = "" if not parts or buffer[-1].isspace() else parts.pop()
+        for word in parts:
+            self.words += 1
+            self._track_ngram(word)
+
+        self._paragraph += text
+        while "\n\n" in self._paragraph:
+            paragraph, self._paragraph = self._paragraph.split("\n\n", 1)
+            self._track_paragraph(paragraph)
+
+        if (
+            self.finish_reason is None and self.word_target
+            and self.words + bool(self._partial) >= self.word_target
+            and self._last_char in ".!?"
+        ):
+            self.finish_reason = "word_count"
+
+    def _track_ngram(self, word):
+        self._ngram.append(word.casefold())
+        if len(self._ngram) == REPETITION_NGRAM:
+            key = tuple(self._ngram)
+            self._ngram_counts[key] += 1
+            if self._ngram_counts[key] >= REPETITION_LIMIT and self.finish_reason is None:
+                self.finish_reason = "repetition"
+
+    def _track_paragraph(self, paragraph):
+        words = _WORD_RE.findall(paragraph.casefold())
+        if len(words) < MIN_PARAGRAPH_WORDS:
+            return
+        key = " ".join(words)
+        if key in self._paragraphs and self.finish_reason is None:
+            self.finish_reason = "repetition"
+        self._paragraphs.add(key)
+
+
+def stream_with_stops(chunks, criteria, cancel=None):
+    """Pass ``chunks`` through ``criteria``, abandoning the model call once it says stop.
+
+    ``cancel`` (a CancelToken) is checked between tokens.
+    """
+    try:
+        for chunk in chunks:
+            if cancel is not None and cancel.cancelled:
+                criteria.finish_reason = "cancelled"
+                return
+            text = criteria.feed(chunk)
+            if text:
+                yield text
+            if criteria.finish_reason is not None:
+                return
+        tail = criteria.flush()
+        if tail:
+            yield tail
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()  # Stops the underlying generator instead of leaving it to the GC
+
+
+class GenerationOutcome:
+    """Why a generation ended and what stopping early saved, across its model calls."""
+
+    def __init__(self):
+        self._calls = []
+        self._skipped_tokens = 0
+
+    def add(self, criteria):
+        self._calls.append(criteria)
+        return criteria
+
+    def skip(self, tokens):
+        """Count the budget of calls that were never made (e.g. sections after a cancel)."""
+        self._skipped_tokens += tokens
+
+    def summary(self):
+        return {
+            "finish_reason": self._calls[-1].finish_reason if self._calls else None,
+            "tokens_saved": sum(c.tokens_saved for c in self._calls) + self._skipped_tokens,
+            "model_tokens": sum(c.tokens for c in self._calls),
+        }
@@ -0,0 +1,156 @@
+# backend/api/utils/streaming.py
+
+import asyncio
+import json
+import threading
+import time
+
+from .cancellation import CancelToken
+
+
+def sse_event(event, data):
+    """Format a single Server-Sent Events frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class StreamStats:
+    """Time-to-first-token and throughput bookkeeping for one generation."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.tokens = 0
+
+    def record_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.tokens += 1
+
+    @property
+    def ttft_ms(self):
+        if self.first_token_at is None:
+            return None
+        return round((self.first_token_at - self.started_at) * 1000, 1)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            "tokens": self.tokens,
+            "ttft_ms": self.ttft_ms,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "tokens_per_sec": round(self.tokens / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+class TokenChannel:
+    """Hands tokens from an inference worker to the threads writing responses.
+
+    Tokens are buffered, so any number of readers can iterate the channel and
+    each sees the full output from the start, even if it attached late.
+    ``info`` carries what the producer reports on close (e.g. finish_reason).
+    Readers that ``subscribe`` keep the generation alive; when the last one
+    unsubscribes before the end, ``cancel_token`` tells the producer to stop.
+    Async code reads it with ``async for``, which waits on the event loop
+    instead of holding a thread.
+    """
+
+    def __init__(self):
+        self.info = {}
+        self.cancel_token = CancelToken()
+        self._subscribers = 0
+        self._subscribed = False
+        self._chunks = []
+        self._done = False
+        self._error = None
+        self._callbacks = []
+        self._async_waiters = []  # (loop, asyncio.Event) of async readers waiting for more
+        self._cond = threading.Condition()
+
+    def put(self, token):
+        with self._cond:
+            self._chunks.append(token)
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        self._wake(waiters)
+
+    def close(self, error=None, info=None):
+        with self._cond:
+            self._done = True
+            self.info = info or {}
+            self._error = error
+            callbacks, self._callbacks = self._callbacks, []
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        self._wake(waiters)
+        for callback in callbacks:
+            callback()
+
+    def subscribe(self, deadline=None):
+        """Add a reader; the generation may run until the latest reader deadline."""
+        with self._cond:
+            first = not self._subscribed
+            self._subscribers += 1
+            self._subscribed = True
+        if first:
+            self.cancel_token.deadline = deadline
+        else:
+            self.cancel_token.extend_deadline(deadline)
+
+    def unsubscribe(self, reason):
+        with self._cond:
+            self._subscribers -= 1
+            abandoned = self._subscribers == 0 and not self._done
+        if abandoned:
+            self.cancel_token.cancel(reason)
+
+    def on_close(self, callback):
+        with self._cond:
+            if not self._done:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def text(self):
+        return "".join(self)
+
+    def __iter__(self):
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self._chunks) and not self._done:
+                    self._cond.wait()
+                if index < len(self._chunks):
+                    chunk = self._chunks[index]
+                    index += 1
+                elif self._error is not None:
+                    raise self._error
+                else:
+                    return
+            yield chunk
+
+    def __aiter__(self):
+        return self._aiter()
+
+    async def _aiter(self):
+        index = 0
+        while True:
+            with self._cond:
+                chunks = self._chunks[index:]
+                index += len(chunks)
+                if not chunks:
+                    if self._done:
+                        if self._error is not None:
+                            raise self._error
+                        return
+                    waiter = asyncio.Event()
+                    self._async_waiters.append((asyncio.get_running_loop(), waiter))
+            if chunks:
+                for chunk in chunks:
+                    yield chunk
+            else:
+                await waiter.wait()
+
+    @staticmethod
+    def _wake(waiters):
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(waiter.set)
@@ -0,0 +1,58 @@
+# backend/api/utils/thread_profile.py
+#
+# Thread and batch-size profiles written by `manage.py calibrate_threads`.
+# One JSON file holds a profile per host and model, so a fleet can share it:
+#
+#   {"profiles": {"<host>|<cpus>|<model id>": {"threads": 8, "batch_size": 64,
+#                 "threads_by_concurrency": {"1": 8, "2": 6, "4": 3}, ...}}}
+#
+# No Django here; model_loader reads the profile for the running model.
+
+import json
+import os
+import platform
+import tempfile
+
+
+def host_key(model):
+    return f"{platform.node()}|{os.cpu_count()}|{model}"
+
+
+def load_profiles(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("profiles", {})
+    except FileNotFoundError:
+        return {}
+
+
+def load_profile(path, model):
+    """This host's profile for ``model``, or None if it was never calibrated here."""
+    return load_profiles(path).get(host_key(model))
+
+
+def save_profile(path, model, profile):
+    """Store ``profile`` for this host and ``model``, keeping other hosts' profiles."""
+    profiles = load_profiles(path)
+    profiles[host_key(model)] = profile
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"profiles": profiles}, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def threads_for(profile, running, default):
+    """Threads for each of ``running`` concurrent model calls.
+
+    Uses the profile's measurement for the largest concurrency not above
+    ``running``; without one, splits the cores evenly, never above ``default``.
+    """
+    measured = {int(n): threads for n, threads in (profile or {}).get("threads_by_concurrency", {}).items()}
+    fitting = [n for n in measured if n <= running]
+    if fitting and max(fitting) == running:
+        return measured[running]
+    cores_share = max(1, (os.cpu_count() or 1) // max(running, 1))
+    if fitting:
+        return min(measured[max(fitting)], cores_share)
+    return min(default, cores_share)
@@ -2,16 +2,58 @@
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from rest_framework.renderers import JSONRenderer
+from rest_framework.exceptions import APIException
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.conf import settings
-from .models import User, Blog
-from .serializers import BlogSerializer
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.db.models.functions import Substr
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import User, Blog, GenerationJob
+from .serializers import BlogListSerializer, BlogSerializer, GenerationJobSerializer, GenerationOptionsSerializer
+from .pagination import BlogHistoryPagination
+from .renderers import EventStreamRenderer, NDJSONRenderer
+from .authentication import TokenUserAuthentication
+from .exceptions import QuotaExceeded
+import json
+import uuid
 import os
-from .utils.model_loader import load_llama_model
-# ----------------- Load LLaMA Model Once -----------------
-llm = load_llama_model()
+from .utils import startup
+from .utils.cancellation import get_cancel_registry, get_cancellation_stats
+from .utils.content_store import stored_text
+from .utils.conditional import make_etag, not_modified, set_validators
+from .utils.generation import finish_info, submit_candidates, stream_blog_events
+from .utils.generation_cache import get_generation_cache
+from .utils.singleflight import get_singleflight
+from .utils.inference_queue import Tenant, get_scheduler
+from .utils.longform import token_budget
+from .utils.model_loader import get_prefix_states
+from .utils.prompts import get_template
+from .utils.metrics import add_model_stages, render as render_metrics
+from .utils.quotas import reserve_tokens
+from .utils.jobs import get_job_runner
+from .utils.replica_pool import get_replica_pool
+from .utils.search_index import index_blog, index_blogs, search_blogs
+from .utils.similarity_index import get_similarity_index
+from .utils.streaming import StreamStats
+# The model is loaded lazily by the inference workers on the first generation
+# request, or up front via POST /api/ready/ (admins) or MODEL_WARMUP_ON_START.
+
+def with_queue_headers(response, queue_info, reservation=None):
+    response["X-Queue-Depth"] = queue_info["queue_depth"]
+    response["X-Queue-Estimated-Wait"] = queue_info["estimated_wait_s"]
+    if reservation is not None:
+        for header, value in reservation.headers.items():
+            response[header] = value
+    return response
+
+def parse_flag(value):
+    return value in ("1", "true", "True", "yes")
 
 # ----------------- Simple Home -----------------
 def home(request):
@@ -61,23 +103,261 @@ class LoginAPIView(APIView):
         return Response({"error": "Invalid username or password."}, status=401)
 
 # ----------------- Blog Generation (Local Model) -----------------
+def parse_generation_data(data):
+    """Validate a generate request body; returns ``(generation, error_message)``."""
+    title = data.get("title")
+    audience = data.get("audience")
+    word_count = data.get("word_count")
+
+    if not all([title, audience, word_count]):
+        return None, "All fields are required"
+    try:
+        word_count = int(word_count)
+    except (TypeError, ValueError):
+        return None, "word_count must be a whole number"
+    if not 1 <= word_count <= settings.GENERATION_MAX_WORDS:
+        return None, f"word_count must be between 1 and {settings.GENERATION_MAX_WORDS}"
+
+    options = GenerationOptionsSerializer(data=data)
+    if not options.is_valid():
+        field, errors = next(iter(options.errors.items()))
+        return None, f"{field}: {errors[0]}"
+
+    return {
+        "title": title,
+        "audience": audience,
+        "word_count": word_count,
+        "n": options.validated_data["n"],
+        "variant": options.validated_data["variant"],
+        "params": options.sampling_params(),
+        "fresh": options.validated_data["fresh"],
+        "coalesce": options.validated_data["coalesce"],
+    }, None
+
+def parse_generation_request(request):
+    generation, error = parse_generation_data(request.data)
+    return generation, (Response({"error": error}, status=400) if error else None)
+
+def open_cancel_scope(request):
+    """Start tracking a generation request for cancellation.
+
+    ``X-Generation-Timeout`` (seconds) sets the deadline, capped at
+    GENERATION_TIMEOUT_MAX; ``X-Request-ID`` (a UUID) lets the client cancel
+    it later with ``DELETE /api/generate-blog/<id>/``. Returns ``(scope, error_message)``.
+    """
+    try:
+        timeout = float(request.headers.get("X-Generation-Timeout", settings.GENERATION_TIMEOUT))
+        request_id = uuid.UUID(request.headers["X-Request-ID"]) if "X-Request-ID" in request.headers else None
+    except ValueError:
+        return None, "X-Generation-Timeout must be seconds and X-Request-ID a UUID"
+    if timeout <= 0:
+        return None, "X-Generation-Timeout must be positive"
+    timeout = min(timeout, settings.GENERATION_TIMEOUT_MAX)
+    return get_cancel_registry().open(request.user.id, timeout, request_id), None
+
+def user_tenant(user):
+    # Staff are the priority class: a bigger fair share, not a queue jump
+    return Tenant(user.pk, settings.FAIR_SHARE_STAFF_WEIGHT if user.is_staff else 1)
+
+def submit_for_user(request, generation, scope):
+    """Charge the user's token quota and queue the candidates at their fair share.
+
+    QuotaExceeded (429) and InferenceQueueFull (503) are raised before
+    anything runs (candidates queued before the queue filled are cancelled),
+    with ``scope`` released and the reservation refunded.
+    Returns ``(candidates, reservation)``; reservation is None for unlimited users.
+    """
+    try:
+        reservation = reserve_tokens(request.user, [token_budget(generation["word_count"])] * generation["n"])
+    except QuotaExceeded:
+        scope.release()
+        raise
+    try:
+        candidates = submit_candidates(**generation, tenant=user_tenant(request.user))
+    except Exception:
+        scope.release()
+        if reservation is not None:
+            reservation.refund()
+        raise
+    for tokens, _ in candidates:
+        scope.hold(tokens)
+    if reservation is not None:
+        reservation.settle(candidates)  # Unused budget goes back as each candidate ends
+    return candidates, reservation
+
 class BlogGenerateAPIView(APIView):
     permission_classes = [IsAuthenticated]
     def post(self, request):
-        title = request.data.get("title")
-        audience = request.data.get("audience")
-        word_count = request.data.get("word_count")
-
-        if not all([title, audience, word_count]):
-            return Response({"error": "All fields are required"}, status=400)
+        generation, error = parse_generation_request(request)
+        if error:
+            return error
+        scope, error = open_cancel_scope(request)
+        if error:
+            return Response({"error": error}, status=400)
 
-        prompt = f"Write a {word_count}-word blog for {audience} about {title}."
+        queue_info = get_scheduler().load()
         try:
-            blog_content = llm.invoke(prompt)
+            candidates, reservation = submit_for_user(request, generation, scope)
+            blog_contents = ["".join(tokens) for tokens, _ in candidates]
+        except APIException:
+            raise  # Queue full / model unavailable (503), quota (429)
         except Exception as e:
             return Response({"error": f"Model error: {str(e)}"}, status=500)
+        finally:
+            scope.release()
+        add_model_stages(tokens for tokens, _ in candidates)
+
+        reasons = [finish_info(tokens).get("cancel_reason") for tokens, _ in candidates]
+        if any(reasons):
+            reason = next(r for r in reasons if r)
+            return Response(
+                {"error": f"Generation cancelled ({reason})", "request_id": str(scope.id)},
+                status=504 if reason == "deadline" else 409,
+            )
+
+        return with_queue_headers(Response({
+            "request_id": str(scope.id),
+            "blog_content": blog_contents[0],
+            "blog_contents": blog_contents,
+            "candidates": [{**info, **finish_info(tokens)} for tokens, info in candidates],
+        }, status=200), queue_info, reservation)
+
+# ----------------- Blog Generation (Streaming, SSE) -----------------
+class BlogGenerateStreamAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+    def post(self, request):
+        generation, error = parse_generation_request(request)
+        if error:
+            return error
+
+        scope, error = open_cancel_scope(request)
+        if error:
+            return Response({"error": error}, status=400)
+
+        stats = StreamStats()
+        queue_info = get_scheduler().load()
+        # Raises QuotaExceeded (429) or InferenceQueueFull (503), with Retry-After, before the stream starts
+        candidates, reservation = submit_for_user(request, generation, scope)
+        meta = {
+            **queue_info, "request_id": str(scope.id),
+            "n": len(candidates), "candidates": [info for _, info in candidates],
+        }
+        response = StreamingHttpResponse(
+            stream_blog_events([tokens for tokens, _ in candidates], stats, meta, scope),
+            content_type="text/event-stream",
+        )
+        response["X-Request-ID"] = str(scope.id)
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # Stop nginx from buffering the stream
+        return with_queue_headers(response, queue_info, reservation)
+
+# ----------------- Cancel an In-flight Generation -----------------
+class BlogGenerateCancelAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    def delete(self, request, request_id):
+        if not get_cancel_registry().cancel(request_id, request.user.id):
+            return Response({"error": "No such in-flight generation"}, status=404)
+        return Response({"request_id": str(request_id), "cancelled": True}, status=200)
 
-        return Response({"blog_content": blog_content}, status=200)
+# ----------------- Generation Jobs (Submit / Poll / Cancel) -----------------
+class GenerationJobListAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    def post(self, request):
+        generation, error = parse_generation_request(request)
+        if error:
+            return error
+        if generation["n"] != 1:
+            return Response({"error": "n: A job generates one blog; submit one job per candidate"}, status=400)
+
+        # Raises QuotaExceeded (429); the job gives back what it doesn't use when it ends
+        reservation = reserve_tokens(request.user, [token_budget(generation["word_count"])])
+        try:
+            job = GenerationJob.objects.create(
+                author=request.user,
+                title=generation["title"],
+                audience=generation["audience"],
+                word_count=generation["word_count"],
+                params=generation["params"],
+                quota_tokens=reservation.amounts[0] if reservation is not None else 0,
+            )
+        except Exception:
+            if reservation is not None:
+                reservation.refund()
+            raise
+        get_job_runner().wake()
+        response = Response(GenerationJobSerializer(job).data, status=202)
+        response["Location"] = f"/api/jobs/{job.id}/"
+        if reservation is not None:
+            for header, value in reservation.headers.items():
+                response[header] = value
+        return response
+
+class GenerationJobDetailAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    def get(self, request, job_id):
+        job = GenerationJob.objects.filter(pk=job_id, author=request.user).first()
+        if job is None:
+            return Response({"error": "Job not found"}, status=404)
+        get_job_runner().start()  # Picks up jobs left queued by a previous process
+        return Response(GenerationJobSerializer(job).data, status=200)
+
+    def delete(self, request, job_id):
+        job = GenerationJob.objects.filter(pk=job_id, author=request.user).first()
+        if job is None:
+            return Response({"error": "Job not found"}, status=404)
+        if job.status in GenerationJob.FINISHED_STATUSES:
+            return Response(GenerationJobSerializer(job).data, status=200)
+        job = get_job_runner().cancel(job)
+        # 202 while a running job is still winding down
+        return Response(GenerationJobSerializer(job).data, status=200 if job.status in GenerationJob.FINISHED_STATUSES else 202)
+
+# ----------------- Readiness / Warmup -----------------
+class ReadinessAPIView(APIView):
+    # Anyone may probe readiness; only admins may make every worker load the model
+    def get_permissions(self):
+        return [IsAdminUser()] if self.request.method == "POST" else [AllowAny()]
+
+    def get(self, request):
+        status = get_scheduler().model_status()
+        return Response({**status, "startup": startup.phases()}, status=200 if status["ready"] else 503)
+
+    def post(self, request):
+        get_scheduler().warm_up()
+        status = get_scheduler().model_status()
+        return Response({**status, "startup": startup.phases()}, status=200 if status["ready"] else 202)
+
+# ----------------- Inference Queue & Cache Status -----------------
+class InferenceStatusAPIView(APIView):
+    permission_classes = [AllowAny]
+    def get(self, request):
+        return Response({
+            "queue": get_scheduler().stats(),
+            "cache": get_generation_cache().stats(),
+            "singleflight": get_singleflight().stats(),
+            "replicas": get_replica_pool().stats() if settings.MODEL_REPLICAS > 1 else None,
+            "cancellation": get_cancellation_stats().stats(),
+            "prefix_state": {"template": get_template().key, **get_prefix_states().stats()},
+        }, status=200)
+
+# ----------------- Metrics (Prometheus) -----------------
+def metrics(request):
+    queue = get_scheduler().stats()
+    cache = get_generation_cache().stats()
+    prefix = get_prefix_states().stats()
+    scraped = [
+        ("inference_queue_jobs", "gauge", "Jobs waiting for an inference worker", queue["queue_depth"]),
+        ("inference_workers_busy", "gauge", "Inference workers running a job", queue["busy"]),
+        ("inference_jobs_completed", "counter", "Jobs finished", queue["completed"]),
+        ("inference_jobs_rejected", "counter", "Jobs turned away with 503", queue["rejected"]),
+        ("generation_cache_hits", "counter", "Generation cache hits", cache["hits"]),
+        ("generation_cache_misses", "counter", "Generation cache misses", cache["misses"]),
+        ("generation_cache_hit_ratio", "gauge", "Cache hits over lookups since start", cache["hit_rate"] or 0),
+        ("generation_cache_entries", "gauge", "Entries in the generation cache", cache["entries"]),
+        ("prefix_state_hits", "counter", "Model calls resumed from a prompt-prefix snapshot", prefix["hits"]),
+        ("prefix_state_builds", "counter", "Prompt-prefix snapshots built by evaluating the prefix", prefix["builds"]),
+    ]
+    return HttpResponse(render_metrics(scraped), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 # ----------------- Save Blog -----------------
 class SaveBlogAPIView(APIView):
@@ -89,12 +369,254 @@ class SaveBlogAPIView(APIView):
         if not title or not content:
             return Response({"error": "Title and content are required"}, status=400)
 
-        blog = Blog.objects.create(title=title, content=content, author=request.user)
+        with transaction.atomic():
+            blog = Blog(title=title, author=request.user)
+            Blog.set_texts([blog], [content])
+            blog.save()
+            index_blog(blog)  # Keep /blogs/search/ current
+            transaction.on_commit(lambda: get_similarity_index().add(blog))
         return Response(BlogSerializer(blog).data, status=201)
 
 # ----------------- Blog History -----------------
+EXCERPT_LENGTH = 160
+
+# Blogs are only ever added or removed through the API, so (count, newest
+# created_at) changes whenever the history does; one index-only aggregate.
+# The history is validated by this ETag alone: a Last-Modified (whole
+# seconds, blind to deletes) would answer 304 for a blog saved in the same
+# second as the client's last fetch.
+HISTORY_VERSION = {"count": Count("id"), "latest": Max("created_at")}
+
+def history_etag(request, version):
+    return make_etag("blogs", request.user.pk, version["count"], version["latest"], request.GET.urlencode())
+
+def blog_history_page(request, blogs):
+    """One page of the history as response data; ``request`` is a DRF Request."""
+    excerpt = parse_flag(request.query_params.get("excerpt"))
+    if excerpt:
+        # Plain bodies are cut in SQL; compressed ones have to come along (one join) and be decompressed
+        blogs = blogs.select_related("body").only("id", "title", "created_at", "body", "body__codec", "body__data")
+        blogs = blogs.annotate(excerpt=Substr("content", 1, EXCERPT_LENGTH))
+    else:
+        blogs = blogs.only("id", "title", "created_at")
+
+    paginator = BlogHistoryPagination()
+    page = paginator.paginate_queryset(blogs, request)
+    if excerpt:
+        for blog in page:
+            if blog.body_id:
+                blog.excerpt = blog.body.text[:EXCERPT_LENGTH]
+    return paginator.get_paginated_response(BlogListSerializer(page, many=True).data).data
+
 class BlogHistoryAPIView(APIView):
+    authentication_classes = [TokenUserAuthentication]
     permission_classes = [IsAuthenticated]
     def get(self, request):
-        blogs = Blog.objects.filter(author=request.user)
-        return Response(BlogSerializer(blogs, many=True).data, status=200)
+        blogs = Blog.objects.filter(author_id=request.user.id)
+        version = blogs.aggregate(**HISTORY_VERSION)
+        etag = history_etag(request, version)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        return set_validators(Response(blog_history_page(request, blogs), status=200), etag)
+
+# ----------------- Blog Detail -----------------
+class BlogDetailAPIView(APIView):
+    authentication_classes = [TokenUserAuthentication]
+    permission_classes = [IsAuthenticated]
+    def get(self, request, pk):
+        created_at = Blog.objects.filter(pk=pk, author_id=request.user.id).values_list("created_at", flat=True).first()
+        if created_at is None:
+            return Response({"error": "Blog not found"}, status=404)
+
+        etag = make_etag("blog", pk, created_at)
+        response = not_modified(request, etag, created_at)
+        if response is not None:
+            return response
+
+        blog = Blog.objects.select_related("body").get(pk=pk)
+        return set_validators(Response(BlogSerializer(blog).data, status=200), etag, created_at)
+
+# ----------------- Bulk Import / Export (NDJSON) -----------------
+def parse_bulk_line(number, line):
+    """One import line as ``(title, content, created_at)``; other keys (e.g. an export's id) are ignored.
+
+    ``created_at`` is the ISO 8601 date an export wrote, so a restored blog
+    keeps its place in the history; None when the line has none.
+    """
+    try:
+        item = json.loads(line)
+    except ValueError:
+        raise ValueError(f"Line {number}: invalid JSON")
+    if not isinstance(item, dict):
+        raise ValueError(f"Line {number}: expected a JSON object")
+    title, content = item.get("title"), item.get("content")
+    if not (isinstance(title, str) and title and isinstance(content, str) and content):
+        raise ValueError(f"Line {number}: title and content are required")
+    if len(title) > Blog._meta.get_field("title").max_length:
+        raise ValueError(f"Line {number}: title is too long")
+    created_at = item.get("created_at")
+    if created_at is not None:
+        try:
+            created_at = parse_datetime(created_at) if isinstance(created_at, str) else None
+        except ValueError:
+            created_at = None
+        if created_at is None:
+            raise ValueError(f"Line {number}: created_at must be an ISO 8601 date and time")
+        if timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at)
+        if created_at > timezone.now():
+            raise ValueError(f"Line {number}: created_at is in the future")
+    return title, content, created_at
+
+def import_blogs(author_id, lines):
+    """Insert NDJSON ``lines`` as ``author_id``'s blogs; all or nothing.
+
+    Rows go in with one bulk_create per BLOG_BULK_BATCH_SIZE lines, each
+    batch indexed for search as it lands, so memory stays bounded by the
+    batch however long the upload is. The similarity index picks the new
+    rows up on its next sync. Raises ValueError (and rolls back) on the
+    first bad line.
+    """
+    batch_size = settings.BLOG_BULK_BATCH_SIZE
+    created, batch = 0, []
+    with transaction.atomic():
+        # MySQL doesn't return ids from a bulk insert. Rows are inserted with a
+        # marker in `content` and found again by it: a range past the last id
+        # would also catch blogs the same author saves meanwhile.
+        last_id = marker = None
+        if not connection.features.can_return_rows_from_bulk_insert:
+            last_id = Blog.objects.filter(author_id=author_id).aggregate(last=Max("id"))["last"] or 0
+            marker = f"bulk-import:{uuid.uuid4().hex}:"
+
+        def flush():
+            nonlocal last_id
+            blogs = [Blog(author_id=author_id, title=title) for title, _, _ in batch]
+            Blog.set_texts(blogs, [content for _, content, _ in batch])
+            contents = [blog.content for blog in blogs]
+            if marker:
+                for position, blog in enumerate(blogs):
+                    blog.content = f"{marker}{position}"
+            blogs = Blog.objects.bulk_create(blogs)
+            fields = ["created_at"]
+            if marker:
+                inserted = Blog.objects.filter(author_id=author_id, pk__gt=last_id, content__startswith=marker)
+                blogs = sorted(inserted.select_related("body"), key=lambda blog: int(blog.content[len(marker):]))
+                if len(blogs) != len(batch):
+                    raise RuntimeError(f"Bulk import re-read {len(blogs)} rows for a batch of {len(batch)}")
+                last_id = max(blog.pk for blog in blogs)
+                for blog, content in zip(blogs, contents):
+                    blog.content = content
+                fields.append("content")
+            # auto_now_add stamped every row with the import time; put back the dates the lines carry
+            for blog, (_, _, created_at) in zip(blogs, batch):
+                if created_at is not None:
+                    blog.created_at = created_at
+            changed = blogs if marker else [blog for blog, line in zip(blogs, batch) if line[2] is not None]
+            if changed:
+                Blog.objects.bulk_update(changed, fields)
+            index_blogs(blogs)
+            batch.clear()
+
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            if created >= settings.BLOG_BULK_MAX_ROWS:
+                raise ValueError(f"At most {settings.BLOG_BULK_MAX_ROWS} blogs per import")
+            batch.append(parse_bulk_line(number, line))
+            created += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    return created
+
+def export_blogs(author_id):
+    """Yield ``author_id``'s blogs as NDJSON lines, oldest first.
+
+    Reads BLOG_EXPORT_CHUNK_SIZE rows per query, continuing after the last
+    id, rather than one ``iterator()`` over everything: MySQL's client
+    buffers a whole result set, so that alone wouldn't keep memory flat.
+    """
+    chunk_size = settings.BLOG_EXPORT_CHUNK_SIZE
+    rows = (
+        Blog.objects.filter(author_id=author_id).order_by("pk")
+        .values_list("id", "title", "content", "body__codec", "body__data", "created_at")
+    )
+    last_id = 0
+    while True:
+        chunk = list(rows.filter(pk__gt=last_id)[:chunk_size])
+        yield "".join(
+            json.dumps(
+                {"id": pk, "title": title, "content": stored_text(content, codec, data), "created_at": created_at},
+                cls=DjangoJSONEncoder,
+            ) + "\n"
+            for pk, title, content, codec, data, created_at in chunk
+        )
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+class BlogBulkAPIView(APIView):
+    """GET streams the user's blogs as NDJSON; POST imports NDJSON (one ``{"title", "content"[, "created_at"]}`` per line)."""
+    # The default CachedJWTAuthentication: imports write rows, so they get a real user
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer, NDJSONRenderer]
+
+    def get(self, request):
+        response = StreamingHttpResponse(export_blogs(request.user.id), content_type="application/x-ndjson")
+        response["Content-Disposition"] = 'attachment; filename="blogs.ndjson"'
+        return response
+
+    def post(self, request):
+        try:
+            created = import_blogs(request.user.id, request.stream or ())
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response({"created": created}, status=201)
+
+# ----------------- Blog Search (BM25) -----------------
+class BlogSearchAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": "Query parameter q is required"}, status=400)
+        try:
+            page = max(1, int(request.query_params.get("page", 1)))
+            page_size = min(100, max(1, int(request.query_params.get("page_size", 20))))
+        except ValueError:
+            return Response({"error": "page and page_size must be whole numbers"}, status=400)
+
+        total, hits = search_blogs(request.user, query, offset=(page - 1) * page_size, limit=page_size)
+        return Response({
+            "count": total,
+            "page": page,
+            "page_size": page_size,
+            "results": [
+                {"id": blog.id, "title": blog.title, "created_at": blog.created_at, "score": score, "snippet": snippet}
+                for blog, score, snippet in hits
+            ],
+        }, status=200)
+
+# ----------------- Similar Blogs (shown before generating, to reuse instead) -----------------
+class BlogSimilarAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    def get(self, request):
+        title = request.query_params.get("title", "").strip()
+        if not title:
+            return Response({"error": "Query parameter title is required"}, status=400)
+        try:
+            k = min(20, max(1, int(request.query_params.get("k", 5))))
+        except ValueError:
+            return Response({"error": "k must be a whole number"}, status=400)
+
+        matches = get_similarity_index().similar(request.user, title, k=k, min_score=settings.SIMILARITY_MIN_SCORE)
+        blogs = Blog.objects.only("id", "title", "created_at").in_bulk([blog_id for blog_id, _ in matches])
+        return Response({
+            "results": [
+                {"id": blog_id, "title": blogs[blog_id].title, "created_at": blogs[blog_id].created_at, "score": round(score, 4)}
+                for blog_id, score in matches
+                if blog_id in blogs
+            ],
+        }, status=200)
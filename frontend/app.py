@@ -1,6 +1,8 @@
 import streamlit as st
 import requests
+import json
 import os
+from urllib.parse import urlencode
 
 # ✅ API Base URL
 API_BASE_URL = "http://127.0.0.1:8000/api"
@@ -27,6 +29,36 @@ def login(username, password):
     else:
         st.error("❌ Invalid Credentials")
 
+def parse_sse(response):
+    """Yield (event, data) pairs from a text/event-stream response."""
+    event, data = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
+def cached_get(url, headers):
+    """GET with If-None-Match; a 304 reuses the copy kept from the last 200."""
+    cache = st.session_state.setdefault("http_cache", {})
+    cached = cache.get(url)
+    request_headers = dict(headers)
+    if cached:
+        request_headers["If-None-Match"] = cached["etag"]
+    response = requests.get(url, headers=request_headers)
+    if response.status_code == 304 and cached:
+        return 200, cached["data"]
+    if response.status_code != 200:
+        return response.status_code, None
+    data = response.json()
+    if response.headers.get("ETag"):
+        cache[url] = {"etag": response.headers["ETag"], "data": data}
+    return 200, data
+
 def logout():
     st.session_state.clear()
     st.rerun()
@@ -67,18 +99,35 @@ if "page" not in st.session_state:
     st.session_state["page"] = "generate"  # ✅ Default to blog generator page
 
 headers = {"Authorization": f"Bearer {st.session_state['token']}"}
-response = requests.get(f"{API_BASE_URL}/blogs/", headers=headers)
+# ✅ History is paginated (titles only); "Load more" follows the cursor
+pages_wanted = st.session_state.setdefault("history_pages", 1)
+blogs, next_url, history_ok = [], f"{API_BASE_URL}/blogs/", True
+for _ in range(pages_wanted):
+    if not next_url:
+        break
+    status, page = cached_get(next_url, headers)  # ✅ Unchanged history costs a 304, no payload
+    if status != 200:
+        history_ok = False
+        break
+    blogs.extend(page["results"])
+    next_url = page["next"]
 
-if response.status_code == 200:
-    blogs = response.json()
+if history_ok:
     if not blogs:
         st.sidebar.info("No saved blogs yet!")
     else:
         for blog in blogs:
             if st.sidebar.button(blog["title"], key=f"blog_{blog['id']}"):
-                st.session_state["page"] = f"blog_{blog['id']}"
-                st.session_state["selected_blog"] = blog  # ✅ Store selected blog
-                st.rerun()
+                status, detail = cached_get(f"{API_BASE_URL}/blogs/{blog['id']}/", headers)
+                if status == 200:
+                    st.session_state["page"] = f"blog_{blog['id']}"
+                    st.session_state["selected_blog"] = detail  # ✅ Full content fetched on demand
+                    st.rerun()
+                else:
+                    st.sidebar.error("❌ Failed to load blog.")
+        if next_url and st.sidebar.button("⬇️ Load more"):
+            st.session_state["history_pages"] = pages_wanted + 1
+            st.rerun()
 else:
     st.sidebar.error("❌ Failed to fetch saved blogs.")
 
@@ -104,34 +153,88 @@ elif st.session_state["page"] == "generate":
     word_count = st.slider("📝 Word Count", 100, 1000, 500)
     audience = st.selectbox("🎯 Target Audience", ["General", "Researchers", "Travellers", "Content Creators", "Tech Enthusiasts", "Students", "Professionals"])
 
-    @st.cache_data
-    def generate_blogs(title, audience, word_count):
-        blogs = []
+    fresh = st.checkbox("🔄 Fresh results (skip server cache)")
+
+    # ✅ Offer saved blogs close to this title before spending a generation on it
+    if title.strip():
+        status, similar = cached_get(f"{API_BASE_URL}/blogs/similar/?{urlencode({'title': title})}", headers)
+        if status == 200 and similar["results"]:
+            st.info("📚 You already have similar saved blogs:")
+            for match in similar["results"]:
+                if st.button(f"📖 {match['title']}", key=f"similar_{match['id']}"):
+                    status, detail = cached_get(f"{API_BASE_URL}/blogs/{match['id']}/", headers)
+                    if status == 200:
+                        st.session_state["page"] = f"blog_{match['id']}"
+                        st.session_state["selected_blog"] = detail
+                        st.rerun()
+
+    def stream_blogs(title, audience, word_count, placeholders, fresh=False):
+        # ✅ One request returns every candidate; the server runs them in parallel
         headers = {"Authorization": f"Bearer {st.session_state['token']}"}
-        for i in range(3):  
-            response = requests.post(
-                f"{API_BASE_URL}/generate-blog/",
-                json={"title": title, "audience": audience, "word_count": word_count},
-                headers=headers
-            )
-            if response.status_code == 200:
-                blog = response.json().get("blog_content", "")
-                blogs.append(blog if blog.strip() else "❌ Error: No valid content generated.")
-            else:
-                blogs.append(f"❌ API Error: {response.status_code} - {response.text}")
-        return blogs
+        texts = [""] * len(placeholders)
+        errors = {}
+        with requests.post(
+            f"{API_BASE_URL}/generate-blog/stream/",
+            json={"title": title, "audience": audience, "word_count": word_count, "n": len(placeholders), "fresh": fresh},
+            headers=headers,
+            stream=True
+        ) as response:
+            if response.status_code == 503:
+                message = f"⏳ Server busy, please retry in {response.headers.get('Retry-After', 'a few')} seconds."
+                return texts, dict.fromkeys(range(len(placeholders)), message)
+            if response.status_code == 429:
+                message = f"🚦 Generation quota used up, please retry in {response.headers.get('Retry-After', 'a few')} seconds."
+                return texts, dict.fromkeys(range(len(placeholders)), message)
+            if response.status_code != 200:
+                message = f"❌ API Error: {response.status_code} - {response.text}"
+                return texts, dict.fromkeys(range(len(placeholders)), message)
+            for event, data in parse_sse(response):
+                if event == "token":
+                    idx = data["index"]
+                    texts[idx] += data["text"]
+                    placeholders[idx].write(texts[idx] + "▌")  # ✅ Render tokens as they arrive
+                elif event == "candidate_done":
+                    placeholders[data["index"]].write(texts[data["index"]])
+                elif event == "error":
+                    errors[data.get("index", 0)] = f"❌ Model Error: {data.get('error')}"
+        for idx, text in enumerate(texts):
+            if idx not in errors and not text.strip():
+                errors[idx] = "❌ Error: No valid content generated."
+        return texts, errors  # ✅ errors: candidate index -> message, shown instead of that candidate
+
+    def generate_blogs(title, audience, word_count, fresh=False):
+        # ✅ Streamed output can't go through st.cache_data, so memoize per session
+        cache = st.session_state.setdefault("generation_cache", {})
+        key = (title, audience, word_count)
+        if fresh or key not in cache:
+            placeholders = []
+            for i in range(3):
+                st.write(f"#### Blog Option {i+1}")
+                placeholders.append(st.empty())
+            texts, errors = stream_blogs(title, audience, word_count, placeholders, fresh=fresh)
+            if errors:
+                return texts, errors  # ✅ Not memoized: the next click asks the server again
+            cache[key] = (texts, errors)
+        return cache[key]
 
     if st.button("Generate Blog"):
-        st.session_state["generated_blogs"] = generate_blogs(title, audience, word_count)
+        st.session_state["generated_blogs"], st.session_state["generation_errors"] = generate_blogs(
+            title, audience, word_count, fresh
+        )
         st.session_state["blog_saved"] = False  # ✅ Reset save flag
+        st.rerun()
 
     if "generated_blogs" in st.session_state:
         blogs = st.session_state["generated_blogs"]
+        errors = st.session_state.get("generation_errors", {})
         st.write("### ✨ AI Generated Blogs")
 
         for idx, blog in enumerate(blogs):
             with st.container():
                 st.write(f"#### Blog Option {idx+1}")
+                if idx in errors:
+                    st.error(errors[idx])  # ✅ Failed candidates can't be saved
+                    continue
                 st.write(blog)
 
                 # ✅ Allow only ONE blog to be saved